@@ -0,0 +1,101 @@
+"""
+Lógica compartida de POST /expenses/bulk y POST /aportes/bulk.
+
+1. Valida todo antes de escribir: los períodos de las creaciones y los
+   documentos editados o eliminados deben existir y ser del usuario
+2. Aplica todas las operaciones con un solo bulk_write ordenado (ExpenseCRUD/AporteCRUD).
+   Si MongoDB rechaza una escritura (ej: clave duplicada), las anteriores
+   quedan aplicadas y las siguientes no se ejecutan; cada resultado lo indica
+   con `error` y la respuesta es 207
+3. Recalcula total_gastado una vez por cada período de crédito tocado
+"""
+from typing import Callable, List
+
+from fastapi import HTTPException, status
+
+from app.core.serialization import MongoJSONResponse
+from app.crud.period import PeriodCRUD
+from app.models.period import TipoPeriodo
+
+
+async def apply_bulk_operations(
+    db,
+    user_id: str,
+    operations: List,
+    crud,
+    serialize: Callable[[dict], dict],
+    not_found_detail: str,
+    update_total_gastado: bool = False
+) -> List[dict]:
+    """
+    Ejecutar las operaciones y retornar un resultado por operación, en orden
+    (el límite de operaciones lo valida el schema del request)
+    """
+    creates = [(operation.periodo_id, operation.data) for operation in operations if operation.op == "create"]
+    updates = [(operation.id, operation.data) for operation in operations if operation.op == "update"]
+    deletes = [operation.id for operation in operations if operation.op == "delete"]
+
+    # Documentos existentes (una consulta) y sus períodos
+    periodo_ids = await crud.get_periodo_ids(user_id, [doc_id for doc_id, _ in updates] + deletes)
+    missing = [doc_id for doc_id, _ in updates if doc_id not in periodo_ids]
+    missing += [doc_id for doc_id in deletes if doc_id not in periodo_ids]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{not_found_detail}: {', '.join(missing)}"
+        )
+
+    # Períodos tocados (una consulta): los de las creaciones deben existir
+    period_crud = PeriodCRUD(db, expense_crud=crud)
+    touched_ids = {periodo_id for periodo_id, _ in creates} | {str(periodo_id) for periodo_id in periodo_ids.values()}
+    periods = await period_crud.get_documents_by_ids(user_id, list(touched_ids), fields=["tipo_periodo"])
+    found_ids = {str(period["_id"]) for period in periods}
+    missing_periods = sorted({periodo_id for periodo_id, _ in creates} - found_ids)
+    if missing_periods:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Period not found: {', '.join(missing_periods)}"
+        )
+
+    outcome = await crud.bulk_write(user_id, creates, updates, deletes, periodo_ids)
+
+    # total_gastado una sola vez por período de crédito, no una vez por operación
+    if update_total_gastado:
+        for period in periods:
+            if period["tipo_periodo"] == TipoPeriodo.CICLO_CREDITO:
+                await period_crud.update_total_gastado(user_id, str(period["_id"]))
+
+    created_items = [serialize(document) for document in outcome.created]
+    updated_by_id = {str(document["_id"]): document for document in outcome.updated}
+    positions = {"create": 0, "update": 0, "delete": 0}
+    results = []
+    for operation in operations:
+        position = positions[operation.op]
+        positions[operation.op] += 1
+
+        if (operation.op, position) not in outcome.applied:
+            # MongoDB aplica creaciones, ediciones y eliminaciones en ese orden
+            # y se detiene en la primera que falla
+            is_failure = outcome.failure is not None and outcome.failure[:2] == (operation.op, position)
+            error = outcome.failure[2] if is_failure else "No se ejecutó porque falló una operación anterior"
+            results.append({"op": operation.op, "id": getattr(operation, "id", None), "item": None, "error": error})
+        elif operation.op == "create":
+            item = created_items[position]
+            results.append({"op": "create", "id": item["_id"], "item": item})
+        elif operation.op == "update":
+            document = updated_by_id.get(operation.id)
+            results.append({"op": "update", "id": operation.id, "item": serialize(document) if document else None})
+        else:
+            results.append({"op": "delete", "id": operation.id, "item": None})
+    return results
+
+
+def bulk_response(results: List[dict]) -> MongoJSONResponse:
+    """
+    200 si se aplicaron todas las operaciones, 207 si alguna falló
+    """
+    failed = any(result.get("error") for result in results)
+    return MongoJSONResponse(
+        {"results": results},
+        status_code=status.HTTP_207_MULTI_STATUS if failed else status.HTTP_200_OK
+    )
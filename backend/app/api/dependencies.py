@@ -1,24 +1,33 @@
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.database import get_database
-from app.core.security import decode_access_token
+from app.core.security import STREAM_TICKET_PURPOSE, decode_access_token
+from app.core.serialization import parse_fields
+from app.core.structured_logging import bind_user
+from app.core.tracing import tracer
 from app.crud.user import UserCRUD
 from app.models.user import UserInDB
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Variante sin error automático, para endpoints que también aceptan un ticket por query
+optional_security = HTTPBearer(auto_error=False)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db=Depends(get_database)
-) -> UserInDB:
+# Clave del scope ASGI con el usuario ya autenticado por POST /batch
+BATCH_USER_SCOPE_KEY = "batch_user"
+
+
+async def authenticate_token(token: Optional[str], db, purpose: Optional[str] = None) -> UserInDB:
     """
-    Dependency to get the current authenticated user.
+    Validar un JWT y retornar su usuario activo.
 
-    Validates the JWT token and returns the user from the database.
-    Raises HTTPException if token is invalid or user not found.
+    `purpose` elige los tokens de un solo uso (ej: tickets de streaming); los
+    tokens de acceso no tienen purpose, así que ninguno se acepta en lugar del otro.
+
+    Lanza HTTPException si el token falta o es inválido, o si el usuario no
+    existe o está inactivo.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -26,11 +35,13 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    if not token:
+        raise credentials_exception
+
     # Decode token
-    token = credentials.credentials
     payload = decode_access_token(token)
 
-    if payload is None:
+    if payload is None or payload.get("purpose") != purpose:
         raise credentials_exception
 
     # Get user_id from token
@@ -52,9 +63,53 @@ async def get_current_user(
             detail="Inactive user"
         )
 
+    bind_user(user.id)
     return user
 
 
+async def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db=Depends(get_database)
+) -> UserInDB:
+    """
+    Dependency to get the current authenticated user.
+
+    Validates the JWT token and returns the user from the database.
+    Raises HTTPException if token is invalid or user not found.
+
+    Las sub-requests de POST /batch reutilizan el usuario autenticado una
+    sola vez para todo el lote (lo fija el servidor en el scope ASGI, nunca el cliente).
+    """
+    with tracer.start_as_current_span("get_current_user"):
+        batch_user = request.scope.get(BATCH_USER_SCOPE_KEY)
+        if batch_user is not None:
+            return batch_user
+
+        return await authenticate_token(credentials.credentials, db)
+
+
+async def get_stream_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    ticket: Optional[str] = Query(
+        None,
+        description="Ticket de POST /events/ticket, para clientes que no pueden enviar headers (EventSource)"
+    ),
+    db=Depends(get_database)
+) -> UserInDB:
+    """
+    Dependencia de los endpoints de streaming (Server-Sent Events).
+
+    EventSource no puede enviar el header Authorization, así que también se
+    acepta un ticket de corta duración en el parámetro `ticket`. El token de
+    acceso nunca va en la URL: quedaría en los logs de acceso y de proxies.
+    """
+    with tracer.start_as_current_span("get_stream_user"):
+        if credentials:
+            return await authenticate_token(credentials.credentials, db)
+        return await authenticate_token(ticket, db, purpose=STREAM_TICKET_PURPOSE)
+
+
 async def get_current_active_user(
     current_user: UserInDB = Depends(get_current_user)
 ) -> UserInDB:
@@ -69,3 +124,27 @@ async def get_current_active_user(
             detail="Inactive user"
         )
     return current_user
+
+
+def sparse_fields(model: type):
+    """
+    Dependency factory para el parámetro `fields=` (sparse fieldsets).
+
+    Valida los campos pedidos contra el modelo de respuesta y retorna la lista
+    de claves a proyectar y serializar (None = todos los campos).
+    """
+    def dependency(
+        fields: Optional[str] = Query(
+            None,
+            description="Campos a retornar separados por coma (ej: nombre,monto,categoria_id)"
+        )
+    ) -> Optional[List[str]]:
+        try:
+            return parse_fields(model, fields)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(e)
+            )
+
+    return dependency
@@ -0,0 +1,85 @@
+"""
+Perfil a pedido de un request: header X-Profile, solo para administradores.
+
+    X-Profile: speedscope   (o 1 / true)  -> perfil para https://www.speedscope.app
+    X-Profile: html                       -> perfil HTML de pyinstrument
+
+El usuario se valida con las mismas dependencias que las rutas de admin
+(get_current_admin_user) antes de empezar a perfilar; sin permisos, el
+request se responde con 401/403 sin ejecutarse. El perfil se guarda en
+PROFILING_DIR y su nombre vuelve en el header X-Profile de la respuesta
+(descarga: GET /admin/profiles/{name}).
+"""
+import logging
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.dependencies import authenticate_token, get_current_active_user
+from app.api.dependencies_admin import get_current_admin_user
+from app.core.database import get_database
+from app.core.profiling import (
+    DEFAULT_PROFILE_FORMAT,
+    PROFILE_FORMATS,
+    request_profile_name,
+    request_profiler,
+    save_request_profile,
+)
+from app.core.serialization import MongoJSONResponse
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+
+
+async def _authorize_admin(headers: Headers) -> None:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    user = await authenticate_token(token if scheme.lower() == "bearer" else None, get_database())
+    await get_current_admin_user(await get_current_active_user(user))
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que ejecuta bajo el profiler los requests con X-Profile
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        requested = headers.get(PROFILE_HEADER)
+        if not requested:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await _authorize_admin(headers)
+        except HTTPException as exc:
+            response = MongoJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+            await response(scope, receive, send)
+            return
+
+        profile_format = requested.lower() if requested.lower() in PROFILE_FORMATS else DEFAULT_PROFILE_FORMAT
+        name = request_profile_name(scope["method"], scope["path"], profile_format)
+
+        async def send_with_profile_name(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(PROFILE_HEADER, name)
+            await send(message)
+
+        profiler = request_profiler()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_name)
+        finally:
+            profiler.stop()
+            try:
+                await save_request_profile(profiler, name, profile_format)
+            except Exception:
+                logger.exception(f"No se pudo guardar el perfil {name}")
@@ -0,0 +1,28 @@
+"""
+Clase de ruta de la API.
+
+NegotiatedRoute deja el response_model de la ruta en un ContextVar mientras
+corre el endpoint, para que MongoJSONResponse pueda codificar en MessagePack
+las fechas según los tipos del modelo (ver app.core.serialization).
+"""
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.serialization import response_model
+
+
+class NegotiatedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        model = self.response_model
+
+        async def route_handler(request: Request) -> Response:
+            token = response_model.set(model)
+            try:
+                return await handler(request)
+            finally:
+                response_model.reset(token)
+
+        return route_handler
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, periods, categories, expenses, aportes, admin
+from app.api.routing import NegotiatedRoute
+from app.api.v1.endpoints import auth, users, periods, categories, expenses, aportes, admin, batch, events, sync
 
-api_router = APIRouter()
+api_router = APIRouter(route_class=NegotiatedRoute)
 
 # Include routers
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
@@ -11,6 +12,9 @@ api_router.include_router(periods.router, prefix="/periods", tags=["Periods"])
 api_router.include_router(categories.router, prefix="/categories", tags=["Categories"])
 api_router.include_router(expenses.router, prefix="/expenses", tags=["Expenses"])
 api_router.include_router(aportes.router, prefix="/aportes", tags=["Aportes"])
+api_router.include_router(batch.router, prefix="/batch", tags=["Batch"])
+api_router.include_router(events.router, prefix="/events", tags=["Events"])
+api_router.include_router(sync.router, prefix="/sync", tags=["Sync"])
 
 
 @api_router.get("/status")
@@ -2,13 +2,25 @@
 Endpoints de administración.
 Solo accesibles para usuarios con rol ADMIN.
 """
-from typing import List
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Literal, Optional
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from pymongo.errors import OperationFailure
+from app.core.config import settings
 from app.core.database import get_database
+from app.core.profiling import list_profiles, profile_path
+from app.core.query_budget import get_overruns
+from app.core.serialization import MongoJSONResponse, make_serializer
+from app.api.dependencies import sparse_fields
 from app.api.dependencies_admin import get_current_admin_user
+from app.api.routing import NegotiatedRoute
 from app.crud.user import UserCRUD
 from app.crud.category import CategoryCRUD
+from app.crud.usage_stats import UsageStatsCRUD
+from app.schemas.slow_queries import ProfilerSettings
+from app.slow_queries import get_profiler_status, set_profiler, slow_query_report
+from app.capacity import capacity_report
 from app.models.user import (
     UserInDB,
     UserCreate,
@@ -17,37 +29,31 @@ from app.models.user import (
     UserRole
 )
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+
+# Documento de MongoDB -> dict con la forma de UserResponse (sin modelos intermedios)
+serialize_user = make_serializer(UserResponse)
 
 
 @router.get("/users", response_model=List[UserResponse])
 async def get_all_users(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[List[str]] = Depends(sparse_fields(UserResponse)),
     current_admin: UserInDB = Depends(get_current_admin_user),
     db=Depends(get_database)
 ):
     """
     Obtener todos los usuarios del sistema.
     Solo accesible para administradores.
+
+    - fields: campos a retornar (ej: username,email,is_active)
     """
     user_crud = UserCRUD(db)
-    users = await user_crud.get_all_users(skip=skip, limit=limit)
-
-    return [
-        UserResponse(
-            _id=str(user.id),
-            email=user.email,
-            username=user.username,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            role=user.role,
-            is_active=user.is_active,
-            created_at=user.created_at,
-            updated_at=user.updated_at
-        )
-        for user in users
-    ]
+    users = await user_crud.get_all_documents(skip=skip, limit=limit, fields=fields)
+
+    serialize = serialize_user.only(fields)
+    return MongoJSONResponse([serialize(user) for user in users])
 
 
 @router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -220,3 +226,143 @@ async def get_admin_stats(
         "admin_users": admin_users,
         "regular_users": regular_users
     }
+
+
+@router.get("/query-budgets")
+async def get_query_budgets(
+    current_admin: UserInDB = Depends(get_current_admin_user)
+):
+    """
+    Presupuestos de tiempo por clase de consulta y excesos acumulados
+    por método del CRUD (en este proceso).
+    Solo accesible para administradores.
+    """
+    return {
+        "budgets_ms": {
+            "read": settings.QUERY_BUDGET_READ_MS,
+            "aggregate": settings.QUERY_BUDGET_AGGREGATE_MS,
+            "write": settings.QUERY_BUDGET_WRITE_MS
+        },
+        "overruns": get_overruns()
+    }
+
+
+@router.get("/profiles")
+async def get_profiles(
+    current_admin: UserInDB = Depends(get_current_admin_user)
+):
+    """
+    Perfiles de CPU guardados: los pedidos con el header X-Profile
+    (.speedscope.json / .html) y los del muestreo continuo (.folded).
+    Solo accesible para administradores.
+    """
+    return {
+        "sampler_enabled": settings.PROFILING_SAMPLER_ENABLED,
+        "profiles": list_profiles()
+    }
+
+
+@router.get("/profiles/{name}")
+async def download_profile(
+    name: str,
+    current_admin: UserInDB = Depends(get_current_admin_user)
+):
+    """
+    Descargar un perfil guardado (abrir en https://www.speedscope.app).
+    Solo accesible para administradores.
+    """
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil no encontrado"
+        )
+    return FileResponse(path, filename=name)
+
+
+@router.get("/usage/top")
+async def get_top_consumers(
+    hours: int = Query(24, ge=1, le=24 * 90, description="Ventana de tiempo hacia atrás, en horas"),
+    sort_by: Literal["requests", "commands", "docs_returned", "docs_written", "db_ms", "cpu_ms"] = Query(
+        "commands", description="Métrica por la que se ordena"
+    ),
+    limit: int = Query(20, ge=1, le=100),
+    current_admin: UserInDB = Depends(get_current_admin_user),
+    db=Depends(get_database)
+):
+    """
+    Usuarios con mayor consumo de recursos en la ventana (contadores por hora,
+    guardados cada USAGE_FLUSH_SECONDS), con el desglose por endpoint.
+    Solo accesible para administradores.
+    """
+    since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    usage_crud = UsageStatsCRUD(db)
+    consumers = await usage_crud.get_top_consumers(since, sort_by, limit)
+
+    return MongoJSONResponse({
+        "since": since,
+        "sort_by": sort_by,
+        "users": [{"user_id": consumer.pop("_id"), **consumer} for consumer in consumers]
+    })
+
+
+@router.get("/slow-queries/profiler")
+async def get_slow_query_profiler(
+    current_admin: UserInDB = Depends(get_current_admin_user),
+    db=Depends(get_database)
+):
+    """
+    Estado del profiler de MongoDB de la base de datos.
+    Solo accesible para administradores.
+    """
+    return await get_profiler_status(db)
+
+
+@router.put("/slow-queries/profiler")
+async def update_slow_query_profiler(
+    profiler: ProfilerSettings,
+    current_admin: UserInDB = Depends(get_current_admin_user),
+    db=Depends(get_database)
+):
+    """
+    Activar (solo operaciones más lentas que slowms) o desactivar el profiler.
+    Solo accesible para administradores.
+    """
+    try:
+        return await set_profiler(db, profiler.enabled, profiler.slowms)
+    except OperationFailure as e:
+        # Ej: clusters administrados que no permiten el comando profile
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"MongoDB rechazó el cambio del profiler: {e.details.get('errmsg', str(e)) if e.details else e}"
+        )
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    minutes: int = Query(60, ge=1, le=7 * 24 * 60, description="Ventana de tiempo hacia atrás, en minutos"),
+    limit: int = Query(20, ge=1, le=200, description="Formas de consulta a retornar"),
+    current_admin: UserInDB = Depends(get_current_admin_user),
+    db=Depends(get_database)
+):
+    """
+    Operaciones lentas registradas por el profiler, agrupadas por forma de
+    consulta, con el método del CRUD que las lanzó.
+    Solo accesible para administradores.
+    """
+    since = datetime.utcnow() - timedelta(minutes=minutes)
+    return MongoJSONResponse(await slow_query_report(db, since, limit))
+
+
+@router.get("/capacity")
+async def get_capacity(
+    months: int = Query(12, ge=1, le=60, description="Meses a proyectar"),
+    current_admin: UserInDB = Depends(get_current_admin_user),
+    db=Depends(get_database)
+):
+    """
+    Tamaño de datos e índices de gastos, aportes y periodos, documentos por
+    usuario, creación mensual y proyección frente a la caché de WiredTiger.
+    Solo accesible para administradores.
+    """
+    return MongoJSONResponse(await capacity_report(db, months))
@@ -1,17 +1,26 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from app.core.database import get_database
-from app.api.dependencies import get_current_active_user
+from app.core.etag import make_etag, is_not_modified, not_modified, set_etag
+from app.core.serialization import MongoJSONResponse, make_serializer
+from app.api.bulk import apply_bulk_operations, bulk_response
+from app.api.dependencies import get_current_active_user, sparse_fields
+from app.api.routing import NegotiatedRoute
 from app.crud.aporte import AporteCRUD
 from app.crud.period import PeriodCRUD
+from app.models.common import PyObjectId
 from app.models.user import UserInDB
+from app.schemas.bulk import AporteBulkRequest, AporteBulkResponse
 from app.models.aporte import (
     AporteCreate,
     AporteUpdate,
     AporteResponse
 )
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+
+# Documento de MongoDB -> dict con la forma de AporteResponse (sin modelos intermedios)
+serialize_aporte = make_serializer(AporteResponse)
 
 
 @router.post("/", response_model=AporteResponse, status_code=status.HTTP_201_CREATED)
@@ -59,11 +68,40 @@ async def create_aporte(
     )
 
 
+@router.post("/bulk", response_model=AporteBulkResponse)
+async def bulk_aportes(
+    bulk_request: AporteBulkRequest,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """
+    Crear, editar y eliminar varios aportes (de uno o más períodos) en un request
+
+    Se valida todo antes de escribir: si algún período o aporte no existe,
+    no se aplica ninguna operación. Las operaciones se aplican con un solo
+    bulk_write; si MongoDB rechaza una escritura, las anteriores quedan
+    aplicadas y la respuesta es 207 con `error` en las que no se aplicaron.
+    """
+    results = await apply_bulk_operations(
+        db,
+        str(current_user.id),
+        bulk_request.operations,
+        AporteCRUD(db),
+        serialize_aporte,
+        not_found_detail="Aporte not found",
+        update_total_gastado=False
+    )
+
+    return bulk_response(results)
+
+
 @router.get("/", response_model=List[AporteResponse])
 async def get_aportes(
+    request: Request,
     periodo_id: str = Query(..., description="ID del período"),
     es_fijo: Optional[bool] = Query(None, description="Filtrar por tipo (true=fijo, false=variable)"),
-    categoria_id: Optional[str] = Query(None, description="Filtrar por categoría"),
+    categoria_id: Optional[PyObjectId] = Query(None, description="Filtrar por categoría"),
+    fields: Optional[List[str]] = Depends(sparse_fields(AporteResponse)),
     current_user: UserInDB = Depends(get_current_active_user),
     db=Depends(get_database)
 ):
@@ -73,31 +111,26 @@ async def get_aportes(
     Filtros opcionales:
     - es_fijo: True para aportes fijos, False para variables
     - categoria_id: ID de la categoría
+    - fields: campos a retornar (ej: nombre,monto,categoria_id)
+
+    Responde 304 si If-None-Match coincide con la versión de datos del período.
     """
     aporte_crud = AporteCRUD(db)
-    aportes = await aporte_crud.get_by_periodo(
+    version = await aporte_crud.versions.get_version(str(current_user.id), periodo_id=periodo_id)
+    etag = make_etag(str(current_user.id), version, request)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    aportes = await aporte_crud.get_documents_by_periodo(
         str(current_user.id),
         periodo_id,
         es_fijo=es_fijo,
-        categoria_id=categoria_id
+        categoria_id=categoria_id,
+        fields=fields
     )
 
-    return [
-        AporteResponse(
-            _id=str(ap.id),
-            user_id=str(ap.user_id),
-            periodo_id=str(ap.periodo_id),
-            categoria_id=str(ap.categoria_id),
-            nombre=ap.nombre,
-            monto=ap.monto,
-            es_fijo=ap.es_fijo,
-            descripcion=ap.descripcion,
-            fecha_registro=ap.fecha_registro,
-            created_at=ap.created_at,
-            updated_at=ap.updated_at
-        )
-        for ap in aportes
-    ]
+    serialize = serialize_aporte.only(fields)
+    return set_etag(MongoJSONResponse([serialize(ap) for ap in aportes]), etag)
 
 
 @router.get("/{aporte_id}", response_model=AporteResponse)
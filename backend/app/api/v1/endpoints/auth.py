@@ -1,5 +1,6 @@
 from datetime import timedelta, datetime
 from fastapi import APIRouter, Depends, HTTPException, status
+from app.api.routing import NegotiatedRoute
 from app.core.config import settings
 from app.core.database import get_database
 from app.core.security import verify_password, create_access_token
@@ -8,7 +9,7 @@ from app.crud.category import CategoryCRUD
 from app.models.user import UserCreate, UserResponse
 from app.schemas.auth import Token, LoginRequest
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,196 @@
+"""
+Multiplexación de requests: POST /batch ejecuta una lista ordenada de
+sub-requests contra las rutas existentes de /api/v1 en un solo viaje HTTP.
+
+- El usuario se autentica una sola vez para todo el lote
+- Las sub-requests independientes corren en paralelo (hasta BATCH_MAX_CONCURRENCY)
+- Las que declaran depends_on esperan a sus dependencias; si alguna falló,
+  responden 424 sin ejecutarse
+- Cada sub-request pasa por el router de FastAPI (validación, dependencias,
+  handlers de errores), pero no por los middlewares: la compresión y la
+  negociación de formato se aplican una vez a la respuesta del lote
+- Cada sub-request corre en su propia tarea (contexto copiado del lote) con su
+  propio UnitOfWork: identity map aparte y escrituras pendientes aplicadas
+  antes de su respuesta, así las que dependen de ella ya ven las versiones
+  nuevas. El resto del contexto se comparte a propósito: request_id, usuario
+  y el conteo de comandos de MongoDB del lote
+- Las rutas de streaming (SSE y WebSocket de /events/summary) no se pueden incluir, y
+  cada sub-request tiene un máximo de BATCH_ITEM_TIMEOUT_SECONDS (504 si lo excede)
+"""
+import asyncio
+import logging
+from typing import Dict, List
+
+import orjson
+from fastapi import APIRouter, Depends, Request, status
+from starlette.types import Message
+
+from app.api.dependencies import BATCH_USER_SCOPE_KEY, get_current_active_user
+from app.api.routing import NegotiatedRoute
+from app.core.config import settings
+from app.core.serialization import MSGPACK_MEDIA_TYPE, MongoJSONResponse, dumps, unpackb
+from app.core.unit_of_work import UnitOfWorkMiddleware
+from app.models.user import UserInDB
+from app.schemas.batch import BatchRequest, BatchRequestItem, BatchResponse, BatchResponseItem
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(route_class=NegotiatedRoute)
+
+# Headers que el lote no deja sobrescribir en las sub-requests
+RESERVED_HEADERS = {"authorization", "content-length", "content-type", "host"}
+
+# Headers de la respuesta de la sub-request que no se devuelven en el lote
+SKIPPED_RESPONSE_HEADERS = {"content-length", "content-type", "vary"}
+
+# Rutas que responden en streaming: no terminan mientras el cliente siga conectado
+STREAMING_PREFIXES = ("/events/summary",)
+
+
+def _decode_body(content_type: str, body: bytes):
+    if not body:
+        return None
+    if content_type.startswith("application/json"):
+        return orjson.loads(body)
+    if content_type.startswith(MSGPACK_MEDIA_TYPE):
+        return unpackb(body)
+    return body.decode("utf-8", errors="replace")
+
+
+async def _dispatch(request: Request, item: BatchRequestItem, user: UserInDB) -> BatchResponseItem:
+    """
+    Ejecutar una sub-request directamente en el router de la aplicación
+    """
+    path, _, query = item.path.partition("?")
+    if not path.startswith("/"):
+        path = "/" + path
+    if path.rstrip("/") == "/batch":
+        return BatchResponseItem(
+            id=item.id,
+            status=status.HTTP_400_BAD_REQUEST,
+            body={"detail": "No se puede anidar /batch"}
+        )
+    if path.startswith(STREAMING_PREFIXES):
+        return BatchResponseItem(
+            id=item.id,
+            status=status.HTTP_400_BAD_REQUEST,
+            body={"detail": "Las rutas de streaming no se pueden incluir en un lote"}
+        )
+
+    body = dumps(item.body) if item.body is not None else b""
+    headers = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in item.headers.items()
+        if name.lower() not in RESERVED_HEADERS
+    ]
+    # HTTPBearer exige el header aunque el usuario ya venga autenticado
+    headers.append((b"authorization", request.headers["authorization"].encode("latin-1")))
+    if body:
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode()))
+
+    full_path = settings.API_V1_STR + path
+    scope = dict(request.scope)
+    for key in ("path_params", "endpoint", "route"):
+        scope.pop(key, None)
+    scope.update({
+        "method": item.method,
+        "path": full_path,
+        "raw_path": full_path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        BATCH_USER_SCOPE_KEY: user,
+    })
+
+    body_sent = False
+
+    async def receive() -> Message:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # No hay más body: lo siguiente que podría esperar la ruta es la desconexión
+        return {"type": "http.disconnect"}
+
+    response_start: Dict = {}
+    chunks: List[bytes] = []
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            response_start.update(message)
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await asyncio.wait_for(
+            UnitOfWorkMiddleware(request.app.router)(scope, receive, send),
+            settings.BATCH_ITEM_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"Sub-request {item.id} del lote excedió {settings.BATCH_ITEM_TIMEOUT_SECONDS}s: {item.method} {item.path}")
+        return BatchResponseItem(
+            id=item.id,
+            status=status.HTTP_504_GATEWAY_TIMEOUT,
+            body={"detail": f"La sub-request excedió {settings.BATCH_ITEM_TIMEOUT_SECONDS}s"}
+        )
+    except Exception:
+        logger.exception(f"Error en sub-request {item.id} del lote: {item.method} {item.path}")
+        return BatchResponseItem(
+            id=item.id,
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            body={"detail": "Internal Server Error"}
+        )
+
+    response_headers = {
+        name.decode("latin-1"): value.decode("latin-1")
+        for name, value in response_start.get("headers", [])
+    }
+    content_type = response_headers.get("content-type", "")
+    return BatchResponseItem(
+        id=item.id,
+        status=response_start.get("status", status.HTTP_500_INTERNAL_SERVER_ERROR),
+        headers={
+            name: value for name, value in response_headers.items()
+            if name not in SKIPPED_RESPONSE_HEADERS
+        },
+        body=_decode_body(content_type, b"".join(chunks))
+    )
+
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    batch_request: BatchRequest,
+    request: Request,
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Ejecutar varias sub-requests en un solo viaje
+
+    Cada elemento indica method, path (relativo a /api/v1), body, headers
+    opcionales y depends_on. La respuesta mantiene el orden del lote con el
+    status, headers y body de cada sub-request.
+    """
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(item: BatchRequestItem) -> BatchResponseItem:
+        if item.depends_on:
+            dependencies = await asyncio.gather(*(tasks[dep] for dep in item.depends_on))
+            failed = [dep.id for dep in dependencies if dep.status >= 400]
+            if failed:
+                return BatchResponseItem(
+                    id=item.id,
+                    status=status.HTTP_424_FAILED_DEPENDENCY,
+                    body={"detail": f"No se ejecutó porque falló: {', '.join(failed)}"}
+                )
+
+        async with semaphore:
+            return await _dispatch(request, item, current_user)
+
+    for item in batch_request.requests:
+        tasks[item.id] = asyncio.create_task(run(item))
+
+    responses = await asyncio.gather(*tasks.values())
+
+    # Los bodies ya vienen serializados por cada sub-request: sin pasar otra vez por response_model
+    return MongoJSONResponse(BatchResponse(responses=list(responses)).model_dump())
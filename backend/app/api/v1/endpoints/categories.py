@@ -1,7 +1,9 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from app.core.database import get_database
+from app.core.etag import make_etag, is_not_modified, not_modified, set_etag
 from app.api.dependencies import get_current_active_user
+from app.api.routing import NegotiatedRoute
 from app.crud.category import CategoryCRUD
 from app.models.user import UserInDB
 from app.models.category import (
@@ -11,7 +13,7 @@ from app.models.category import (
     TipoCategoria
 )
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -42,16 +44,26 @@ async def create_category(
 
 @router.get("/", response_model=List[CategoryResponse])
 async def get_categories(
+    request: Request,
+    response: Response,
     current_user: UserInDB = Depends(get_current_active_user),
     db=Depends(get_database)
 ):
     """
     Obtener todas las categorías del usuario
     Verifica y crea las 4 categorías por defecto si no existen
+
+    Responde 304 si If-None-Match coincide con la versión de las categorías.
     """
     category_crud = CategoryCRUD(db)
+    version = await category_crud.versions.get_version(str(current_user.id), categories=True)
+    etag = make_etag(str(current_user.id), version, request)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
     categories = await category_crud.check_and_init_if_needed(str(current_user.id))
 
+    set_etag(response, etag)
     return [
         CategoryResponse(
             _id=str(cat.id),
@@ -0,0 +1,190 @@
+"""
+Resumen del período en vivo: el cliente se suscribe una vez y recibe los
+cambios en vez de volver a pedir GET /periods/{id}/summary tras cada escritura.
+
+- GET /events/summary: Server-Sent Events (EventSource)
+- WS  /events/summary/ws: el mismo flujo por WebSocket
+- POST /events/ticket: ticket de corta duración para conectarse a los dos
+  anteriores; EventSource y el handshake del WebSocket no envían headers, así
+  que va en la URL en lugar del token de acceso
+
+Eventos:
+- snapshot: resumen compacto completo (al conectar, o si el cliente se atrasó)
+- delta: solo lo que cambió (total_gastado, liquidez_calculada, totales por categoría)
+
+Todas las conexiones de un usuario en un worker comparten un solo cálculo
+(ver app.core.live_updates).
+"""
+import asyncio
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.api.dependencies import authenticate_token, get_current_active_user, get_stream_user
+from app.api.routing import NegotiatedRoute
+from app.api.v1.endpoints.periods import PeriodSummaryResponse, build_period_summary
+from app.core import live_updates
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.security import STREAM_TICKET_PURPOSE, create_stream_ticket
+from app.core.serialization import dumps
+from app.crud.data_version import DataVersionCRUD
+from app.models.user import UserInDB
+from app.schemas.auth import StreamTicket
+
+router = APIRouter(route_class=NegotiatedRoute)
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+
+def summary_snapshot(summary: PeriodSummaryResponse) -> dict:
+    """
+    Forma compacta del resumen que se envía por el stream
+    """
+    return {
+        "periodo_id": summary.period.id,
+        "total_gastado": summary.period.total_gastado,
+        "liquidez_calculada": summary.liquidez_calculada,
+        "categorias": {
+            category.categoria_id: {
+                "total_gastos": category.total_gastos,
+                "total_aportes": category.total_aportes,
+                "total_real": category.total_real,
+                "meta": category.meta,
+            }
+            for category in summary.categories_summary
+        },
+    }
+
+
+async def _subscribe(db, user_id: str, periodo_id: str) -> tuple:
+    versions = DataVersionCRUD(db)
+
+    async def load_snapshot(user_id: str, periodo_id: str) -> Optional[dict]:
+        summary = await build_period_summary(db, user_id, periodo_id)
+        return summary_snapshot(summary) if summary else None
+
+    return await live_updates.subscribe(user_id, periodo_id, versions.get_version, load_snapshot)
+
+
+async def _events(subscriber) -> AsyncIterator[tuple]:
+    """
+    Eventos del suscriptor; None cada SUMMARY_STREAM_HEARTBEAT_SECONDS sin cambios
+    """
+    while True:
+        try:
+            yield await asyncio.wait_for(
+                subscriber.queue.get(),
+                timeout=settings.SUMMARY_STREAM_HEARTBEAT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            yield None
+
+
+def _sse_message(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+@router.post("/ticket", response_model=StreamTicket)
+async def create_ticket(current_user: UserInDB = Depends(get_current_active_user)):
+    """
+    Ticket para abrir el resumen en vivo (parámetro `ticket`)
+
+    Solo sirve para conectarse a /events y vence en STREAM_TICKET_EXPIRE_SECONDS;
+    una conexión ya abierta sigue activa después de que vence.
+    """
+    return StreamTicket(
+        ticket=create_stream_ticket(str(current_user.id)),
+        expires_in=settings.STREAM_TICKET_EXPIRE_SECONDS
+    )
+
+
+@router.get("/summary")
+async def stream_summary(
+    periodo_id: str = Query(..., description="Período cuyo resumen se quiere seguir"),
+    current_user: UserInDB = Depends(get_stream_user),
+    db=Depends(get_database)
+):
+    """
+    Resumen del período en vivo por Server-Sent Events
+
+    EventSource no permite headers: se autentica con `ticket` (POST /events/ticket).
+    """
+    user_id = str(current_user.id)
+    subscriber, snapshot = await _subscribe(db, user_id, periodo_id)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Period not found"
+        )
+
+    async def stream() -> AsyncIterator[bytes]:
+        # retry: milisegundos que espera EventSource antes de reconectar
+        yield b"retry: 5000\n" + _sse_message(live_updates.SNAPSHOT_EVENT, snapshot)
+        async for message in _events(subscriber):
+            if message is None:
+                yield b": ping\n\n"
+            else:
+                yield _sse_message(*message)
+
+    # La baja va como tarea de fondo: corre también si el cliente se desconecta
+    # antes de que el stream empiece
+    return StreamingResponse(
+        stream(),
+        background=BackgroundTask(live_updates.unsubscribe, user_id, subscriber),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={
+            "Cache-Control": "no-cache",
+            # Evitar que nginx acumule el stream
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+@router.websocket("/summary/ws")
+async def websocket_summary(
+    websocket: WebSocket,
+    periodo_id: str = Query(...),
+    ticket: Optional[str] = Query(None),
+    db=Depends(get_database)
+):
+    """
+    Resumen del período en vivo por WebSocket
+
+    Mensajes JSON {"event": "snapshot" | "delta" | "ping", "data": {...}}.
+    Se autentica con `ticket` (POST /events/ticket): los navegadores no envían
+    headers en el handshake.
+    """
+    try:
+        current_user = await authenticate_token(ticket, db, purpose=STREAM_TICKET_PURPOSE)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    user_id = str(current_user.id)
+    subscriber, snapshot = await _subscribe(db, user_id, periodo_id)
+    if snapshot is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Period not found")
+        return
+
+    await websocket.accept()
+
+    async def send_events() -> None:
+        await websocket.send_text(dumps({"event": live_updates.SNAPSHOT_EVENT, "data": snapshot}).decode())
+        async for message in _events(subscriber):
+            if message is None:
+                await websocket.send_text(dumps({"event": "ping"}).decode())
+            else:
+                event, data = message
+                await websocket.send_text(dumps({"event": event, "data": data}).decode())
+
+    sender = asyncio.create_task(send_events())
+    try:
+        # El cliente no envía mensajes: solo se espera la desconexión para soltar el canal
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        live_updates.unsubscribe(user_id, subscriber)
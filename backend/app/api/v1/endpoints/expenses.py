@@ -1,10 +1,16 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from app.core.database import get_database
-from app.api.dependencies import get_current_active_user
+from app.core.etag import make_etag, is_not_modified, not_modified, set_etag
+from app.core.serialization import MongoJSONResponse, make_serializer
+from app.api.bulk import apply_bulk_operations, bulk_response
+from app.api.dependencies import get_current_active_user, sparse_fields
+from app.api.routing import NegotiatedRoute
 from app.crud.expense import ExpenseCRUD
 from app.crud.period import PeriodCRUD
+from app.models.common import PyObjectId
 from app.models.user import UserInDB
+from app.schemas.bulk import ExpenseBulkRequest, ExpenseBulkResponse
 from app.models.expense import (
     ExpenseCreate,
     ExpenseUpdate,
@@ -12,7 +18,10 @@ from app.models.expense import (
     TipoGasto
 )
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+
+# Documento de MongoDB -> dict con la forma de ExpenseResponse (sin modelos intermedios)
+serialize_expense = make_serializer(ExpenseResponse)
 
 
 @router.post("/", response_model=ExpenseResponse, status_code=status.HTTP_201_CREATED)
@@ -65,11 +74,41 @@ async def create_expense(
     )
 
 
+@router.post("/bulk", response_model=ExpenseBulkResponse)
+async def bulk_expenses(
+    bulk_request: ExpenseBulkRequest,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """
+    Crear, editar y eliminar varios expenses (de uno o más períodos) en un request
+
+    Se valida todo antes de escribir: si algún período o expense no existe,
+    no se aplica ninguna operación. Las operaciones se aplican con un solo
+    bulk_write; si MongoDB rechaza una escritura, las anteriores quedan
+    aplicadas y la respuesta es 207 con `error` en las que no se aplicaron.
+    En períodos de crédito, total_gastado se recalcula una vez por período.
+    """
+    results = await apply_bulk_operations(
+        db,
+        str(current_user.id),
+        bulk_request.operations,
+        ExpenseCRUD(db),
+        serialize_expense,
+        not_found_detail="Expense not found",
+        update_total_gastado=True
+    )
+
+    return bulk_response(results)
+
+
 @router.get("/", response_model=List[ExpenseResponse])
 async def get_expenses(
+    request: Request,
     periodo_id: str = Query(..., description="ID del período"),
     tipo: Optional[TipoGasto] = Query(None, description="Filtrar por tipo (fijo o variable)"),
-    categoria_id: Optional[str] = Query(None, description="Filtrar por categoría"),
+    categoria_id: Optional[PyObjectId] = Query(None, description="Filtrar por categoría"),
+    fields: Optional[List[str]] = Depends(sparse_fields(ExpenseResponse)),
     current_user: UserInDB = Depends(get_current_active_user),
     db=Depends(get_database)
 ):
@@ -79,33 +118,26 @@ async def get_expenses(
     Filtros opcionales:
     - tipo: TipoGasto.FIJO o TipoGasto.VARIABLE
     - categoria_id: ID de la categoría
+    - fields: campos a retornar (ej: nombre,monto,categoria_id)
+
+    Responde 304 si If-None-Match coincide con la versión de datos del período.
     """
     expense_crud = ExpenseCRUD(db)
-    expenses = await expense_crud.get_by_periodo(
+    version = await expense_crud.versions.get_version(str(current_user.id), periodo_id=periodo_id)
+    etag = make_etag(str(current_user.id), version, request)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    expenses = await expense_crud.get_documents_by_periodo(
         str(current_user.id),
         periodo_id,
         tipo=tipo,
-        categoria_id=categoria_id
+        categoria_id=categoria_id,
+        fields=fields
     )
 
-    return [
-        ExpenseResponse(
-            _id=str(exp.id),
-            user_id=str(exp.user_id),
-            periodo_id=str(exp.periodo_id),
-            categoria_id=str(exp.categoria_id),
-            nombre=exp.nombre,
-            monto=exp.monto,
-            tipo=exp.tipo,
-            es_permanente=exp.es_permanente,
-            periodos_restantes=exp.periodos_restantes,
-            descripcion=exp.descripcion,
-            fecha_registro=exp.fecha_registro,
-            created_at=exp.created_at,
-            updated_at=exp.updated_at
-        )
-        for exp in expenses
-    ]
+    serialize = serialize_expense.only(fields)
+    return set_etag(MongoJSONResponse([serialize(exp) for exp in expenses]), etag)
 
 
 @router.get("/{expense_id}", response_model=ExpenseResponse)
@@ -1,15 +1,21 @@
+import logging
 from typing import List, Optional
 from datetime import datetime
 from calendar import monthrange
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from pydantic import BaseModel
 from bson import ObjectId
+from app.core import unit_of_work
 from app.core.database import get_database
-from app.api.dependencies import get_current_active_user
+from app.core.etag import make_etag, is_not_modified, not_modified, set_etag
+from app.core.serialization import MongoJSONResponse, make_serializer
+from app.api.dependencies import get_current_active_user, sparse_fields
+from app.api.routing import NegotiatedRoute
 from app.crud.period import PeriodCRUD
 from app.crud.category import CategoryCRUD
 from app.crud.expense import ExpenseCRUD
 from app.crud.aporte import AporteCRUD
+from app.crud.data_version import DataVersionCRUD
 from app.models.user import UserInDB
 from app.models.period import (
     PeriodCreate,
@@ -22,7 +28,9 @@ from app.models.period import (
 )
 from app.models.category import TipoCategoria
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+
+logger = logging.getLogger(__name__)
 
 
 # ====================
@@ -47,6 +55,10 @@ def period_to_response(period: 'PeriodInDB') -> PeriodResponse:
     )
 
 
+# Documento de MongoDB -> dict con la forma de PeriodResponse (sin modelos intermedios)
+serialize_period = make_serializer(PeriodResponse)
+
+
 # ====================
 # SCHEMAS ADICIONALES
 # ====================
@@ -115,8 +127,10 @@ async def get_active_period(
 
 @router.get("/", response_model=List[PeriodResponse])
 async def get_periods(
+    request: Request,
     tipo_periodo: Optional[TipoPeriodo] = Query(None, description="Filtrar por tipo"),
     estado: Optional[EstadoPeriodo] = Query(None, description="Filtrar por estado"),
+    fields: Optional[List[str]] = Depends(sparse_fields(PeriodResponse)),
     current_user: UserInDB = Depends(get_current_active_user),
     db=Depends(get_database)
 ):
@@ -126,27 +140,46 @@ async def get_periods(
     Filtros:
     - tipo_periodo: mensual_estandar o ciclo_credito
     - estado: activo, cerrado o proyectado
+    - fields: campos a retornar (ej: tipo_periodo,fecha_inicio,estado)
+
+    Responde 304 si If-None-Match coincide con la versión de datos del usuario.
     """
     period_crud = PeriodCRUD(db)
-    periods = await period_crud.get_all(
+    version = await period_crud.versions.get_version(str(current_user.id))
+    etag = make_etag(str(current_user.id), version, request)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    periods = await period_crud.get_all_documents(
         str(current_user.id),
         tipo_periodo=tipo_periodo,
-        estado=estado
+        estado=estado,
+        fields=fields
     )
 
-    return [period_to_response(per) for per in periods]
+    serialize = serialize_period.only(fields)
+    return set_etag(MongoJSONResponse([serialize(per) for per in periods]), etag)
 
 
 @router.get("/{period_id}", response_model=PeriodResponse)
 async def get_period(
     period_id: str,
+    request: Request,
+    response: Response,
     current_user: UserInDB = Depends(get_current_active_user),
     db=Depends(get_database)
 ):
     """
     Obtener un período por ID
+
+    Responde 304 si If-None-Match coincide con la versión de datos del período.
     """
     period_crud = PeriodCRUD(db)
+    version = await period_crud.versions.get_version(str(current_user.id), periodo_id=period_id)
+    etag = make_etag(str(current_user.id), version, request)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
     period = await period_crud.get_by_id(str(current_user.id), period_id)
 
     if not period:
@@ -155,23 +188,14 @@ async def get_period(
             detail="Period not found"
         )
 
+    set_etag(response, etag)
     return period_to_response(period)
 
 
-@router.get("/{period_id}/summary", response_model=PeriodSummaryResponse)
-async def get_period_summary(
-    period_id: str,
-    current_user: UserInDB = Depends(get_current_active_user),
-    db=Depends(get_database)
-):
+async def build_period_summary(db, user_id: str, period_id: str) -> Optional[PeriodSummaryResponse]:
     """
-    Obtener resumen completo del período con desglose de todas las categorías
-
-    Incluye:
-    - Información del período
-    - Total de gastos y aportes por categoría
-    - Total real por categoría (gastos - aportes)
-    - Liquidez calculada
+    Calcular el resumen del período (None si no existe).
+    Lo usan GET /periods/{id}/summary y el stream de resúmenes en vivo.
     """
     expense_crud = ExpenseCRUD(db)
     aporte_crud = AporteCRUD(db)
@@ -179,15 +203,12 @@ async def get_period_summary(
     category_crud = CategoryCRUD(db)
 
     # Obtener período
-    period = await period_crud.get_by_id(str(current_user.id), period_id)
+    period = await period_crud.get_by_id(user_id, period_id)
     if not period:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Period not found"
-        )
+        return None
 
     # Obtener categorías
-    categories = await category_crud.get_all(str(current_user.id))
+    categories = await category_crud.get_all(user_id)
 
     # Calcular resumen por categoría
     categories_summary = []
@@ -197,7 +218,7 @@ async def get_period_summary(
 
     # Obtener el período de crédito activo para calcular gastos de crédito
     periodo_credito = await period_crud.get_active(
-        str(current_user.id),
+        user_id,
         TipoPeriodo.CICLO_CREDITO
     )
 
@@ -211,17 +232,19 @@ async def get_period_summary(
 
         # Calcular totales
         total_gastos = await expense_crud.calculate_total_by_categoria(
-            str(current_user.id), periodo_para_gastos, cat_id
+            user_id, periodo_para_gastos, cat_id
         )
 
         total_aportes = await aporte_crud.calculate_total_by_categoria(
-            str(current_user.id), periodo_para_gastos, cat_id
+            user_id, periodo_para_gastos, cat_id
         )
 
         total_real = total_gastos - total_aportes
 
-        # DEBUG: Log de totales por categoría
-        print(f"DEBUG: Categoría {cat.nombre} ({cat.slug}): periodo_usado={periodo_para_gastos}, gastos=${total_gastos}, aportes=${total_aportes}, total_real=${total_real}")
+        logger.debug(
+            "Categoría %s (%s): periodo_usado=%s gastos=%s aportes=%s total_real=%s",
+            cat.nombre, cat.slug, periodo_para_gastos, total_gastos, total_aportes, total_real
+        )
 
         # Guardar IDs de categorías ahorro, arriendo y liquidez para calcular liquidez
         if cat.slug == TipoCategoria.AHORRO:
@@ -254,10 +277,10 @@ async def get_period_summary(
         )
 
     # Calcular liquidez
-    liquidez_calculada = 0.0
+    liquidez_calculada = 0
     if period.tipo_periodo == TipoPeriodo.MENSUAL_ESTANDAR and categoria_ahorro_id and categoria_arriendo_id:
         liquidez_calculada = await period_crud.calculate_liquidez(
-            str(current_user.id),
+            user_id,
             period,
             categoria_ahorro_id,
             categoria_arriendo_id,
@@ -271,6 +294,43 @@ async def get_period_summary(
     )
 
 
+@router.get("/{period_id}/summary", response_model=PeriodSummaryResponse)
+async def get_period_summary(
+    period_id: str,
+    request: Request,
+    response: Response,
+    current_user: UserInDB = Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """
+    Obtener resumen completo del período con desglose de todas las categorías
+
+    Incluye:
+    - Información del período
+    - Total de gastos y aportes por categoría
+    - Total real por categoría (gastos - aportes)
+    - Liquidez calculada
+
+    Responde 304 si If-None-Match coincide: el resumen también depende del
+    período de crédito activo y de las categorías, por eso usa la versión de
+    todo el usuario, más la fecha (el cambio de período ocurre al cambiar el día).
+    """
+    version = await DataVersionCRUD(db).get_version(str(current_user.id))
+    etag = make_etag(str(current_user.id), version, request, datetime.utcnow().date().isoformat())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    summary = await build_period_summary(db, str(current_user.id), period_id)
+    if not summary:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Period not found"
+        )
+
+    set_etag(response, etag)
+    return summary
+
+
 @router.put("/{period_id}", response_model=PeriodResponse)
 async def update_period(
     period_id: str,
@@ -379,6 +439,7 @@ async def repair_current_periods(
                     "updated_at": datetime.utcnow()
                 }}
             )
+            unit_of_work.forget(period_crud.collection, mensual.id)
             result.fechas = f"Corregidas: {expected_start.date()} - {expected_end.date()}"
         else:
             result.fechas = f"OK: {mensual.fecha_inicio.date()} - {mensual.fecha_fin.date()}"
@@ -395,6 +456,7 @@ async def repair_current_periods(
                     "updated_at": datetime.utcnow()
                 }}
             )
+            unit_of_work.forget(period_crud.collection, mensual.id)
             result.sueldo = f"Recuperado: ${previous.sueldo:,.0f}"
         elif mensual.sueldo > 0:
             result.sueldo = f"OK: ${mensual.sueldo:,.0f}"
@@ -445,6 +507,9 @@ async def repair_current_periods(
         else:
             result.fijos_copiados = "Sin período anterior"
 
+        # Las correcciones de arriba escriben directo en la colección
+        await period_crud.versions.bump(user_id, mensual_id)
+
         result.repaired = True
 
     except Exception as e:
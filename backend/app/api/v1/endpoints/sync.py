@@ -0,0 +1,107 @@
+"""
+Sincronización incremental: GET /sync?since=<token> retorna solo lo que cambió
+desde el token (períodos, gastos, aportes y categorías creados o editados, más
+los IDs eliminados) y un token nuevo.
+
+- Sin `since`, o con un token más antiguo que la retención de tombstones,
+  la respuesta es completa (full=true) y el cliente reemplaza su copia local
+- El token vuelve SYNC_WINDOW_SECONDS hacia atrás para no perder escrituras
+  que estaban en curso al sincronizar: el cliente puede recibir de nuevo
+  algunos documentos, que aplica como upserts por _id
+"""
+import asyncio
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.api.dependencies import get_current_active_user
+from app.api.routing import NegotiatedRoute
+from app.api.v1.endpoints.aportes import serialize_aporte
+from app.api.v1.endpoints.expenses import serialize_expense
+from app.api.v1.endpoints.periods import serialize_period
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.serialization import MongoJSONResponse, make_serializer
+from app.crud.aporte import AporteCRUD
+from app.crud.category import CategoryCRUD
+from app.crud.deletion_log import DeletionLogCRUD
+from app.crud.expense import ExpenseCRUD
+from app.crud.period import PeriodCRUD
+from app.models.category import CategoryResponse
+from app.models.user import UserInDB
+from app.schemas.sync import SyncResponse
+
+router = APIRouter(route_class=NegotiatedRoute)
+
+serialize_category = make_serializer(CategoryResponse)
+
+SYNC_COLLECTIONS = ("periods", "expenses", "aportes", "categories")
+
+
+def encode_sync_token(timestamp: datetime) -> str:
+    # Naive = UTC (convención de la app); .timestamp() de un naive usaría la hora local
+    payload = orjson.dumps({"t": int(timestamp.replace(tzinfo=timezone.utc).timestamp() * 1000)})
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> datetime:
+    """
+    Instante (UTC naive) guardado en el token; ValueError si no es válido
+    """
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return datetime.utcfromtimestamp(payload["t"] / 1000)
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError, OverflowError):
+        raise ValueError("Token de sincronización inválido")
+
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    since: Optional[str] = Query(None, description="Token del GET /sync anterior (vacío = sincronización completa)"),
+    current_user: UserInDB = Depends(get_current_active_user),
+    db=Depends(get_database)
+):
+    """
+    Cambios desde `since`: documentos creados o editados y tombstones de los eliminados
+    """
+    # El instante se toma antes de leer: lo escrito durante la lectura entra en la próxima
+    now = datetime.utcnow()
+
+    changed_since = None
+    if since:
+        try:
+            changed_since = decode_sync_token(since) - timedelta(seconds=settings.SYNC_WINDOW_SECONDS)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        # Los tombstones de ese momento ya expiraron: no se puede calcular un delta exacto
+        if changed_since < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            changed_since = None
+
+    user_id = str(current_user.id)
+    periods, expenses, aportes, categories, deleted = await asyncio.gather(
+        PeriodCRUD(db).get_documents_changed_since(user_id, changed_since),
+        ExpenseCRUD(db).get_documents_changed_since(user_id, changed_since),
+        AporteCRUD(db).get_documents_changed_since(user_id, changed_since),
+        CategoryCRUD(db).get_documents_changed_since(user_id, changed_since),
+        DeletionLogCRUD(db).get_since(user_id, changed_since),
+    )
+
+    return MongoJSONResponse({
+        "token": encode_sync_token(now),
+        "full": changed_since is None,
+        "periods": [serialize_period(period) for period in periods],
+        "expenses": [serialize_expense(expense) for expense in expenses],
+        "aportes": [serialize_aporte(aporte) for aporte in aportes],
+        "categories": [serialize_category(category) for category in categories],
+        "deleted": {
+            collection: [str(doc_id) for doc_id in deleted.get(collection, [])]
+            for collection in SYNC_COLLECTIONS
+        },
+    })
@@ -12,8 +12,9 @@ from app.models.user import (
     UpdateProfileRequest
 )
 from app.api.dependencies import get_current_active_user
+from app.api.routing import NegotiatedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
 
 
 @router.get("/me", response_model=UserResponse)
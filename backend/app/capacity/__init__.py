@@ -0,0 +1,231 @@
+"""
+Capacidad y crecimiento de las colecciones principales.
+
+Para expenses, aportes y periods:
+- Tamaño de datos (sin comprimir y en disco), tamaño medio por documento y
+  tamaño de cada índice, desde $collStats (storageStats)
+- Documentos por usuario: p50/p90/p99/máximo entre los usuarios con datos
+- Histograma mensual de creación (created_at; los documentos compactos no
+  lo guardan y se toma del ObjectId, ver app.crud.document_layout) y la
+  proyección a N meses con el promedio de los últimos meses completos
+
+La proyección se compara con la caché de WiredTiger del servidor: los
+índices deberían caber holgados en ella (CAPACITY_INDEX_CACHE_TARGET) para
+que las consultas no lean de disco. El histograma cuenta los documentos que
+siguen existiendo, así que el ritmo ya descuenta los eliminados.
+
+Se usa desde GET /admin/capacity y desde la CLI:
+    python -m app.capacity [--months N]
+"""
+import math
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+from app.core.config import settings
+
+COLLECTIONS = ("expenses", "aportes", "periods")
+
+PERCENTILES = (50, 90, 99)
+
+
+def _percentile(sorted_values: List[int], percentile: float) -> int:
+    # Nearest-rank
+    index = max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _month_start(moment: datetime, months_back: int = 0) -> datetime:
+    month_index = moment.year * 12 + moment.month - 1 - months_back
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+async def _storage_stats(collection) -> Dict:
+    """
+    Tamaños de la colección en bytes (en un cluster con shards, la suma de todos)
+    """
+    stats = {"count": 0, "size": 0, "storage_size": 0, "free_storage_size": 0,
+             "total_index_size": 0, "index_sizes": {}}
+    try:
+        shards = await collection.aggregate(
+            [{"$collStats": {"storageStats": {}}}],
+            maxTimeMS=settings.CAPACITY_MAX_TIME_MS
+        ).to_list(length=None)
+    except OperationFailure as e:
+        # La colección todavía no existe
+        if e.code != 26:
+            raise
+        shards = []
+
+    for shard in shards:
+        storage = shard["storageStats"]
+        stats["count"] += storage.get("count", 0)
+        stats["size"] += storage.get("size", 0)
+        stats["storage_size"] += storage.get("storageSize", 0)
+        stats["free_storage_size"] += storage.get("freeStorageSize", 0)
+        stats["total_index_size"] += storage.get("totalIndexSize", 0)
+        for name, size in storage.get("indexSizes", {}).items():
+            stats["index_sizes"][name] = stats["index_sizes"].get(name, 0) + size
+
+    stats["avg_obj_size"] = round(stats["size"] / stats["count"]) if stats["count"] else 0
+    return stats
+
+
+async def _documents_per_user(collection) -> Dict:
+    counts = await collection.aggregate(
+        [
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+            {"$project": {"_id": 0, "count": 1}},
+        ],
+        maxTimeMS=settings.CAPACITY_MAX_TIME_MS
+    ).to_list(length=None)
+    counts = sorted(document["count"] for document in counts)
+
+    if not counts:
+        return {"users": 0, **{f"p{p}": 0 for p in PERCENTILES}, "max": 0}
+    return {
+        "users": len(counts),
+        **{f"p{p}": _percentile(counts, p) for p in PERCENTILES},
+        "max": counts[-1],
+    }
+
+
+async def _monthly_histogram(collection, since: datetime) -> Dict[datetime, int]:
+    """
+    Documentos creados por mes desde `since` (filtra por _id, que está indexado)
+    """
+    buckets = await collection.aggregate(
+        [
+            {"$match": {"_id": {"$gte": ObjectId.from_datetime(since)}}},
+            {
+                "$group": {
+                    "_id": {
+                        "$dateTrunc": {
+                            "date": {"$ifNull": ["$created_at", {"$toDate": "$_id"}]},
+                            "unit": "month"
+                        }
+                    },
+                    "count": {"$sum": 1}
+                }
+            },
+        ],
+        maxTimeMS=settings.CAPACITY_MAX_TIME_MS
+    ).to_list(length=None)
+    return {bucket["_id"]: bucket["count"] for bucket in buckets}
+
+
+def project_growth(stats: Dict, histogram: List[Dict], projection_months: int) -> Dict:
+    """
+    Proyectar documentos y bytes a `projection_months` con el promedio mensual
+    de los últimos CAPACITY_TREND_MONTHS meses completos del histograma
+    (el último mes del histograma es el actual, incompleto)
+    """
+    complete_months = histogram[:-1][-settings.CAPACITY_TREND_MONTHS:]
+    monthly_documents = (
+        sum(month["count"] for month in complete_months) / len(complete_months)
+        if complete_months else 0
+    )
+
+    count = stats["count"]
+    documents = round(count + monthly_documents * projection_months)
+    # Sin documentos no hay tamaño medio: se proyecta en 0
+    growth_factor = documents / count if count else 0
+    return {
+        "months": projection_months,
+        "monthly_documents": round(monthly_documents, 1),
+        "monthly_index_bytes": round(stats["total_index_size"] / count * monthly_documents) if count else 0,
+        "documents": documents,
+        "size": round(stats["size"] * growth_factor),
+        "storage_size": round(stats["storage_size"] * growth_factor),
+        "total_index_size": round(stats["total_index_size"] * growth_factor),
+    }
+
+
+async def _wiredtiger_cache(db) -> Optional[Dict]:
+    """
+    Caché de WiredTiger del servidor (requiere el rol clusterMonitor; None si no se puede leer)
+    """
+    try:
+        status = await db.command({"serverStatus": 1, "repl": 0, "metrics": 0, "locks": 0})
+    except OperationFailure:
+        return None
+
+    cache = status.get("wiredTiger", {}).get("cache")
+    if cache is None:
+        return None
+    return {
+        "maximum_bytes": cache.get("maximum bytes configured", 0),
+        "current_bytes": cache.get("bytes currently in the cache", 0),
+    }
+
+
+def _cache_outlook(totals: Dict, cache: Optional[Dict], projection_months: int) -> Optional[Dict]:
+    """
+    Uso de la caché por los índices, hoy y proyectado, y meses hasta superar
+    CAPACITY_INDEX_CACHE_TARGET
+    """
+    if not cache or not cache["maximum_bytes"]:
+        return None
+
+    budget = cache["maximum_bytes"] * settings.CAPACITY_INDEX_CACHE_TARGET
+    index_bytes = totals["total_index_size"]
+    monthly_index_bytes = totals["monthly_index_bytes"]
+
+    if index_bytes >= budget:
+        months_until_target = 0
+    elif monthly_index_bytes:
+        months_until_target = round((budget - index_bytes) / monthly_index_bytes, 1)
+    else:
+        months_until_target = None
+
+    return {
+        **cache,
+        "index_target_ratio": settings.CAPACITY_INDEX_CACHE_TARGET,
+        "index_ratio": round(index_bytes / cache["maximum_bytes"], 3),
+        "projected_index_ratio": round(totals["projected_index_size"] / cache["maximum_bytes"], 3),
+        "months_until_index_target": months_until_target,
+        "projection_months": projection_months,
+    }
+
+
+async def capacity_report(db, projection_months: int) -> Dict:
+    """
+    Tamaños, documentos por usuario, histograma mensual y proyección de cada colección
+    """
+    now = datetime.utcnow()
+    since = _month_start(now, settings.CAPACITY_HISTORY_MONTHS)
+    months = [_month_start(now, back) for back in range(settings.CAPACITY_HISTORY_MONTHS, -1, -1)]
+
+    collections = []
+    totals = {"size": 0, "storage_size": 0, "total_index_size": 0,
+              "projected_size": 0, "projected_index_size": 0, "monthly_index_bytes": 0}
+    for name in COLLECTIONS:
+        collection = db[name]
+        stats = await _storage_stats(collection)
+        created = await _monthly_histogram(collection, since)
+        histogram = [{"month": month, "count": created.get(month, 0)} for month in months]
+        projection = project_growth(stats, histogram, projection_months)
+
+        collections.append({
+            "collection": name,
+            **stats,
+            "documents_per_user": await _documents_per_user(collection),
+            "created_per_month": histogram,
+            "projection": projection,
+        })
+
+        totals["size"] += stats["size"]
+        totals["storage_size"] += stats["storage_size"]
+        totals["total_index_size"] += stats["total_index_size"]
+        totals["projected_size"] += projection["size"]
+        totals["projected_index_size"] += projection["total_index_size"]
+        totals["monthly_index_bytes"] += projection["monthly_index_bytes"]
+
+    return {
+        "generated_at": now,
+        "collections": collections,
+        "totals": totals,
+        "wiredtiger_cache": _cache_outlook(totals, await _wiredtiger_cache(db), projection_months),
+    }
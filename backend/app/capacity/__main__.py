@@ -0,0 +1,65 @@
+"""
+CLI del reporte de capacidad.
+
+Uso (desde backend/):
+    python -m app.capacity [--months N]
+"""
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.capacity import capacity_report
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+async def main(args: argparse.Namespace) -> int:
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB_NAME]
+
+    try:
+        report = await capacity_report(db, args.months)
+        for collection in report["collections"]:
+            per_user = collection["documents_per_user"]
+            projection = collection["projection"]
+            print(f"\n{collection['collection']}: {collection['count']} documentos "
+                  f"(medio {collection['avg_obj_size']} B), datos {_mb(collection['size'])}, "
+                  f"disco {_mb(collection['storage_size'])}, índices {_mb(collection['total_index_size'])}")
+            for name, size in collection["index_sizes"].items():
+                print(f"        índice {name}: {_mb(size)}")
+            print(f"        por usuario ({per_user['users']} usuarios): p50={per_user['p50']} "
+                  f"p90={per_user['p90']} p99={per_user['p99']} máx={per_user['max']}")
+            print("        creados por mes: "
+                  + ", ".join(f"{month['month']:%Y-%m} {month['count']}" for month in collection["created_per_month"]))
+            print(f"        en {projection['months']} meses (~{projection['monthly_documents']}/mes): "
+                  f"{projection['documents']} documentos, datos {_mb(projection['size'])}, "
+                  f"índices {_mb(projection['total_index_size'])}")
+
+        totals = report["totals"]
+        print(f"\nTotal: datos {_mb(totals['size'])}, disco {_mb(totals['storage_size'])}, "
+              f"índices {_mb(totals['total_index_size'])} "
+              f"(en {args.months} meses: datos {_mb(totals['projected_size'])}, "
+              f"índices {_mb(totals['projected_index_size'])})")
+
+        cache = report["wiredtiger_cache"]
+        if cache is None:
+            print("Caché de WiredTiger: no disponible (requiere el rol clusterMonitor)")
+        else:
+            print(f"Caché de WiredTiger: {_mb(cache['maximum_bytes'])}, índices al {cache['index_ratio']:.0%} "
+                  f"(en {args.months} meses: {cache['projected_index_ratio']:.0%}, "
+                  f"objetivo {cache['index_target_ratio']:.0%}, "
+                  f"meses hasta el objetivo: {cache['months_until_index_target']})")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.capacity", description="Capacidad y crecimiento de las colecciones")
+    parser.add_argument("--months", type=int, default=12, help="Meses a proyectar")
+
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,217 @@
+"""
+Contabilidad de comandos de MongoDB por request.
+
+Un CommandListener de pymongo atribuye cada comando al request en curso
+(contextvar; Motor copia el contexto al thread que ejecuta la operación):
+- Server-Timing en la respuesta: cantidad de comandos y tiempo total en MongoDB
+- Log de advertencia si el request supera QUERY_COUNT_WARN_THRESHOLD comandos
+- Detección de N+1: la misma "forma" de comando (operación + colección + filtro
+  sin valores) repetida N_PLUS_ONE_THRESHOLD veces o más en un mismo request
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.structured_logging import current_request_context
+from app.core.usage import aggregator, cpu_timed
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCommandStats:
+    """
+    Comandos de MongoDB de un request (se actualiza desde los threads de Motor)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration_micros = 0
+        self.docs_returned = 0
+        self.docs_written = 0
+        self.shapes: Counter = Counter()
+        # Métodos del CRUD que lanzaron cada forma (comment de app.core.query_tags)
+        self.methods: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def record_start(self, shape: str, method: Optional[str] = None) -> None:
+        with self._lock:
+            self.count += 1
+            self.shapes[shape] += 1
+            if method is not None:
+                self.methods.setdefault(shape, Counter())[method] += 1
+
+    def record_duration(self, duration_micros: int, docs_returned: int = 0, docs_written: int = 0) -> None:
+        with self._lock:
+            self.duration_micros += duration_micros
+            self.docs_returned += docs_returned
+            self.docs_written += docs_written
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration_micros / 1000
+
+    def repeated_shapes(self, threshold: int):
+        return [
+            (shape, count, list(self.methods.get(shape, {})))
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+_current: ContextVar[Optional[RequestCommandStats]] = ContextVar("command_stats", default=None)
+
+
+def current_command_stats() -> Optional[RequestCommandStats]:
+    return _current.get()
+
+
+# Partes del comando que definen su forma (sin valores)
+_SHAPE_FIELDS = ("filter", "query", "pipeline", "updates", "deletes")
+
+
+def _shape(value: Any) -> Any:
+    """
+    Estructura de un filtro o pipeline con los valores reemplazados por "?"
+    """
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Los stages de un pipeline importan todos; los $in y similares solo por su tipo
+        if value and all(isinstance(item, dict) for item in value):
+            return [_shape(item) for item in value]
+        return ["?"]
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> str:
+    """
+    Forma del comando: operación + colección + filtro o pipeline sin valores.
+    Dos consultas que solo difieren en los valores tienen la misma forma.
+    """
+    collection = command.get(command_name)
+    parts = [command_name, collection if isinstance(collection, str) else ""]
+    for field in _SHAPE_FIELDS:
+        if field in command:
+            value = command[field]
+            if field in ("updates", "deletes"):
+                # update/delete: importa el filtro (q) de cada sentencia, no el cambio
+                value = [statement.get("q", {}) for statement in value]
+            parts.append(f"{field}={_shape(value)}")
+    return " ".join(parts)
+
+
+def command_method(command: dict) -> Optional[str]:
+    """
+    Método del CRUD que lanzó el comando (comment de app.core.query_tags)
+    """
+    comment = command.get("comment")
+    return comment if isinstance(comment, str) else None
+
+
+# Comandos de escritura: la respuesta trae en "n" los documentos afectados
+_WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+
+def reply_documents(command_name: str, reply: dict) -> tuple:
+    """
+    (documentos devueltos, documentos escritos) según la respuesta del comando
+    """
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch", ()))
+        return len(batch), 0
+    if command_name == "findAndModify":
+        return (1, 1) if reply.get("value") is not None else (0, 0)
+    if command_name in _WRITE_COMMANDS:
+        n = reply.get("n", 0)
+        return 0, n if isinstance(n, int) else 0
+    return 0, 0
+
+
+class CommandAccountingListener(monitoring.CommandListener):
+    """
+    Atribuye cada comando de MongoDB al request en curso
+    """
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        stats = _current.get()
+        if stats is not None:
+            stats.record_start(command_shape(event.command_name, event.command), command_method(event.command))
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        stats = _current.get()
+        if stats is not None:
+            docs_returned, docs_written = reply_documents(event.command_name, event.reply)
+            stats.record_duration(event.duration_micros, docs_returned, docs_written)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        stats = _current.get()
+        if stats is not None:
+            stats.record_duration(event.duration_micros)
+
+
+class CommandAccountingMiddleware:
+    """
+    Middleware ASGI que abre la contabilidad del request, agrega Server-Timing,
+    registra los requests con demasiados comandos o con patrones N+1 y suma
+    el consumo del usuario autenticado (app.core.usage)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestCommandStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.SERVER_TIMING_ENABLED:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                MutableHeaders(scope=message).append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration_ms:.2f};desc="{stats.count} queries", app;dur={elapsed_ms:.2f}'
+                )
+            await send(message)
+
+        timed = cpu_timed(self.app(scope, receive, send_with_timing))
+        try:
+            await timed
+        finally:
+            _current.reset(token)
+            self._report(scope, stats)
+            self._record_usage(scope, stats, timed.cpu_seconds)
+
+    @staticmethod
+    def _report(scope: Scope, stats: RequestCommandStats) -> None:
+        request_line = f"{scope['method']} {scope['path']}"
+
+        if stats.count > settings.QUERY_COUNT_WARN_THRESHOLD:
+            logger.warning(
+                f"{request_line}: {stats.count} comandos a MongoDB ({stats.duration_ms:.1f} ms), "
+                f"más que el umbral de {settings.QUERY_COUNT_WARN_THRESHOLD}"
+            )
+
+        for shape, count, methods in stats.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD):
+            origin = f" (desde {', '.join(methods)})" if methods else ""
+            logger.warning(f"{request_line}: posible N+1, {count} comandos con la forma: {shape}{origin}")
+
+    @staticmethod
+    def _record_usage(scope: Scope, stats: RequestCommandStats, cpu_seconds: float) -> None:
+        context = current_request_context()
+        if not settings.USAGE_ACCOUNTING_ENABLED or context is None or context.user_id is None:
+            return
+        route = scope.get("route")
+        aggregator.record(context.user_id, getattr(route, "path", "unmatched"), scope["method"], stats, cpu_seconds)
@@ -0,0 +1,233 @@
+"""
+Middleware de compresión de respuestas negociada con Accept-Encoding.
+
+- Codificaciones soportadas: br (brotli), zstd y gzip. brotli y zstd son
+  opcionales: si el paquete no está instalado, simplemente no se ofrecen.
+- Solo se comprimen los content-types permitidos en Settings y las respuestas
+  de al menos COMPRESSION_MIN_SIZE bytes.
+- Las respuestas en streaming (más de un mensaje de body) se comprimen por
+  partes, con un flush por cada parte, en vez de acumularlas en memoria.
+"""
+import zlib
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+
+class _Compressor:
+    """Compresor incremental: compress() para cada parte, finish() al final"""
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def flush(self) -> bytes:
+        return b""
+
+    def finish(self) -> bytes:
+        raise NotImplementedError
+
+
+class _GzipCompressor(_Compressor):
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = formato gzip
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor(_Compressor):
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor(_Compressor):
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings() -> List[str]:
+    """
+    Codificaciones habilitadas en Settings cuyo compresor está instalado
+    """
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return [encoding for encoding in settings.COMPRESSION_ENCODINGS if installed.get(encoding)]
+
+
+def make_compressor(encoding: str) -> _Compressor:
+    if encoding == "br":
+        return _BrotliCompressor(settings.COMPRESSION_BROTLI_QUALITY)
+    if encoding == "zstd":
+        return _ZstdCompressor(settings.COMPRESSION_ZSTD_LEVEL)
+    return _GzipCompressor(settings.COMPRESSION_GZIP_LEVEL)
+
+
+def negotiate_encoding(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """
+    Elegir la codificación según Accept-Encoding (con valores q).
+    A igual q, gana el orden de preferencia del servidor.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        pieces = part.strip().split(";")
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprime respuestas con br, zstd o gzip
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.encodings = available_encodings()
+        self.content_types = tuple(settings.COMPRESSION_CONTENT_TYPES)
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.content_types, self.min_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """
+    Estado de compresión de una respuesta.
+
+    Retiene el mensaje http.response.start hasta ver el primer body para decidir:
+    - Body completo en un mensaje: comprimir si supera el mínimo
+    - Streaming (more_body=True): comprimir cada parte a medida que llega
+    """
+
+    def __init__(self, send: Send, encoding: str, content_types: tuple, min_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.content_types = content_types
+        self.min_size = min_size
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    def _compressible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type.startswith(self.content_types)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.start_message = message
+            headers = MutableHeaders(raw=message["headers"])
+            self.passthrough = message["status"] in (204, 304) or not self._compressible(headers)
+            if self.passthrough:
+                await self._send(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        # Primer body: decidir si se comprime
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+
+            if not more_body:
+                if len(body) < self.min_size:
+                    self.passthrough = True
+                    await self._send(self.start_message)
+                    await self._send(message)
+                    return
+
+                compressor = make_compressor(self.encoding)
+                compressed = compressor.compress(body) + compressor.finish()
+                self._set_encoding_headers(headers)
+                headers["Content-Length"] = str(len(compressed))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+
+            # Streaming: el largo final no se conoce
+            self.compressor = make_compressor(self.encoding)
+            self._set_encoding_headers(headers)
+            if "content-length" in headers:
+                del headers["content-length"]
+            await self._send(self.start_message)
+
+        if more_body:
+            chunk = self.compressor.compress(body) + self.compressor.flush()
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _set_encoding_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
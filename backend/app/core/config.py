@@ -36,6 +36,118 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Compresión de respuestas (negociada con Accept-Encoding)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ENCODINGS: Union[List[str], str] = ["br", "zstd", "gzip"]  # Orden de preferencia del servidor
+    COMPRESSION_MIN_SIZE: int = 1024  # Bytes; respuestas más pequeñas se envían sin comprimir
+    COMPRESSION_CONTENT_TYPES: Union[List[str], str] = [
+        "application/json",
+        "application/msgpack",
+        "text/event-stream",
+        "text/plain",
+        "text/html"
+    ]
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1-9
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11
+    COMPRESSION_ZSTD_LEVEL: int = 3  # 1-22
+
+    @field_validator('COMPRESSION_ENCODINGS', 'COMPRESSION_CONTENT_TYPES', mode='before')
+    @classmethod
+    def parse_comma_separated(cls, v):
+        if isinstance(v, str):
+            return [item.strip() for item in v.split(',') if item.strip()]
+        return v
+
+    # Presupuestos de tiempo por clase de consulta (maxTimeMS)
+    QUERY_BUDGET_READ_MS: int = 2000  # find / find_one / count_documents
+    QUERY_BUDGET_AGGREGATE_MS: int = 5000  # Agregaciones de totales
+    QUERY_BUDGET_WRITE_MS: int = 3000  # find_one_and_update
+    QUERY_BUDGET_RETRY_AFTER_SECONDS: int = 5  # Retry-After del 503 cuando se excede un presupuesto
+
+    # Escrituras secundarias del request (versiones de datos y tombstones, app.core.unit_of_work)
+    UNIT_OF_WORK_FLUSH_ATTEMPTS: int = 3  # Intentos antes de responder y seguir reintentando en segundo plano
+
+    # Migraciones
+    MIGRATIONS_RUN_ON_STARTUP: bool = True  # Ejecutar migraciones pendientes al iniciar (bajo lock)
+    MIGRATIONS_BATCH_SIZE: int = 500  # Documentos por lote (un bulk_write por lote)
+    MIGRATIONS_BATCH_DELAY_MS: int = 50  # Pausa entre lotes para no saturar MongoDB
+    MIGRATIONS_LOCK_TTL_SECONDS: int = 300  # Tiempo tras el cual un lock abandonado se puede tomar
+
+    # Multiplexación de requests (POST /batch)
+    BATCH_MAX_REQUESTS: int = 20  # Sub-requests por lote
+    BATCH_MAX_CONCURRENCY: int = 5  # Sub-requests independientes ejecutándose a la vez
+    BATCH_ITEM_TIMEOUT_SECONDS: float = 30  # Máximo por sub-request (504 en su resultado)
+
+    # Operaciones bulk (POST /expenses/bulk, POST /aportes/bulk)
+    BULK_MAX_OPERATIONS: int = 500  # Operaciones por request
+
+    # Resumen en vivo (GET /events/summary)
+    SUMMARY_STREAM_POLL_SECONDS: float = 5.0  # Revisión de la versión de datos (escrituras de otros workers)
+    SUMMARY_STREAM_HEARTBEAT_SECONDS: float = 15.0  # Ping para mantener viva la conexión
+    SUMMARY_STREAM_QUEUE_SIZE: int = 20  # Eventos pendientes por cliente antes de reenviar el snapshot
+    STREAM_TICKET_EXPIRE_SECONDS: int = 30  # Vigencia del ticket de POST /events/ticket (solo para conectar)
+
+    # Métricas Prometheus (GET /metrics). Con varios workers, definir además la
+    # variable de entorno PROMETHEUS_MULTIPROC_DIR antes de iniciar uvicorn
+    METRICS_ENABLED: bool = True
+
+    # Comandos de MongoDB por request (Server-Timing y detección de N+1)
+    SERVER_TIMING_ENABLED: bool = True  # Header Server-Timing con comandos y tiempo en MongoDB
+    QUERY_COUNT_WARN_THRESHOLD: int = 25  # Comandos por request a partir de los cuales se registra una advertencia
+    N_PLUS_ONE_THRESHOLD: int = 5  # Repeticiones de la misma forma de comando que se registran como N+1
+
+    # Trazas OpenTelemetry (HTTP, dependencias, CRUD, comandos de MongoDB, serialización)
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATIO: float = 1.0  # Fracción de requests trazados (0.0 a 1.0)
+    TRACING_EXPORTER: str = "stdout"  # stdout o file (un span JSON por línea)
+    TRACING_FILE: str = "traces.jsonl"  # Destino con TRACING_EXPORTER=file
+    TRACING_SERVICE_NAME: str = "emo-finance-api"
+
+    # Readiness (GET /health/ready)
+    HEALTH_CACHE_SECONDS: float = 2.0  # Resultado compartido por los probes durante este tiempo
+    HEALTH_MONGO_TIMEOUT_MS: int = 1000  # Timeout del ping a MongoDB
+    HEALTH_MONGO_MAX_LATENCY_MS: float = 250.0  # Latencia máxima del ping
+    HEALTH_POOL_MAX_UTILIZATION: float = 0.9  # Fracción máxima de conexiones del pool en uso
+    HEALTH_LOOP_MAX_LAG_MS: float = 200.0  # Retraso máximo del event loop
+
+    # Monitor del event loop (histograma event_loop_lag_seconds)
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_MS: float = 250.0  # Cada cuánto se mide el retraso
+    LOOP_BLOCK_DETECTION_ENABLED: bool = False  # Debug/staging: registrar el stack de los bloqueos
+    LOOP_BLOCK_THRESHOLD_MS: float = 100.0  # Bloqueo mínimo que se registra
+
+    # Consumo de recursos por usuario (GET /admin/usage/top)
+    USAGE_ACCOUNTING_ENABLED: bool = True
+    USAGE_FLUSH_SECONDS: float = 60.0  # Cada cuánto se guarda lo acumulado en memoria
+    USAGE_RETENTION_DAYS: int = 90  # Los contadores por hora expiran tras este tiempo
+
+    # Consultas lentas (profiler de MongoDB, GET /admin/slow-queries)
+    SLOW_QUERY_DEFAULT_SLOWMS: int = 100  # Umbral al activar el profiler sin indicar uno
+    SLOW_QUERY_MAX_ENTRIES: int = 5000  # Entradas de system.profile leídas por reporte
+
+    # Capacidad y crecimiento (GET /admin/capacity)
+    CAPACITY_HISTORY_MONTHS: int = 12  # Meses del histograma de creación
+    CAPACITY_TREND_MONTHS: int = 3  # Meses completos promediados para proyectar
+    CAPACITY_INDEX_CACHE_TARGET: float = 0.5  # Fracción de la caché de WiredTiger que pueden ocupar los índices
+    CAPACITY_MAX_TIME_MS: int = 60000  # maxTimeMS de cada agregación del reporte
+
+    # Logs estructurados (JSON por línea, escritos desde un thread aparte)
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # Niveles por módulo, ej: "app.crud.period=DEBUG,pymongo=WARNING"
+    LOG_FORMAT: str = "json"  # json o text (legible en desarrollo)
+
+    # Perfiles de CPU (header X-Profile para admins y muestreo continuo)
+    PROFILING_ENABLED: bool = True  # Acepta el header X-Profile (solo administradores)
+    PROFILING_DIR: str = "profiles"  # Directorio donde se guardan los perfiles
+    PROFILING_INTERVAL_MS: float = 1.0  # Intervalo de muestreo del perfil por request
+    PROFILING_SAMPLER_ENABLED: bool = False  # Muestreo continuo del event loop
+    PROFILING_SAMPLER_INTERVAL_MS: float = 100.0  # Baja frecuencia: 10 muestras por segundo
+    PROFILING_SAMPLER_FLUSH_SECONDS: float = 300.0  # Cada cuánto se escribe un archivo .folded
+
+    # Sincronización incremental (GET /sync)
+    SYNC_WINDOW_SECONDS: int = 5  # Solape hacia atrás del token, cubre escrituras en curso al sincronizar
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30  # Tokens más antiguos reciben una sincronización completa
+
     class Config:
         env_file = ".env"
         case_sensitive = True
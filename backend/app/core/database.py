@@ -1,5 +1,12 @@
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.core.metrics import mongo_event_listeners
+from app.core.command_accounting import CommandAccountingListener
+from app.core.health import pool_usage
+from app.core.tracing import MongoTracingListener
+
+logger = logging.getLogger(__name__)
 
 client = None
 database = None
@@ -7,16 +14,23 @@ database = None
 
 async def connect_to_mongo():
     global client, database
-    client = AsyncIOMotorClient(settings.MONGO_URI)
+    # Listeners de pymongo: latencia por comando y estado del pool para /metrics,
+    # comandos por request (Server-Timing, N+1), uso del pool para readiness
+    # y un span por comando si hay trazas
+    event_listeners = mongo_event_listeners() if settings.METRICS_ENABLED else []
+    event_listeners.extend([CommandAccountingListener(), pool_usage])
+    if settings.TRACING_ENABLED:
+        event_listeners.append(MongoTracingListener())
+    client = AsyncIOMotorClient(settings.MONGO_URI, event_listeners=event_listeners)
     database = client[settings.MONGO_DB_NAME]
-    print(f"Connected to MongoDB: {settings.MONGO_DB_NAME}")
+    logger.info("Connected to MongoDB: %s", settings.MONGO_DB_NAME)
 
 
 async def close_mongo_connection():
     global client
     if client:
         client.close()
-        print("Closed MongoDB connection")
+        logger.info("Closed MongoDB connection")
 
 
 def get_database():
@@ -0,0 +1,65 @@
+"""
+ETags y GET condicional a partir de las versiones de datos (DataVersionCRUD).
+
+El ETag se calcula sin leer los datos: versión del alcance (período, categorías
+o usuario) + usuario + URL. Si el cliente envía If-None-Match con el mismo
+valor, el endpoint responde 304 sin consultar ni recalcular nada.
+
+Los ETags son débiles (W/"..."): identifican la versión de los datos, no los
+bytes, y la misma respuesta sale con distinto Content-Encoding según
+CompressionMiddleware. If-None-Match usa comparación débil, así que el 304
+funciona igual.
+"""
+import hashlib
+
+from fastapi import Request, Response, status
+
+from app.core.metrics import record_cache_lookup
+from app.core.serialization import response_format
+
+# El navegador guarda la respuesta pero la revalida siempre con If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(user_id: str, version: int, request: Request, *extra: str) -> str:
+    """
+    ETag débil para la versión de datos y la representación pedida
+    (path + query + formato negociado, JSON o MessagePack).
+    `extra` agrega otras entradas de las que depende la respuesta (ej: la fecha).
+    """
+    key = ":".join([
+        user_id,
+        str(version),
+        f"{request.url.path}?{request.url.query}",
+        response_format.get(),
+        *extra
+    ])
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Verificar If-None-Match (comparación débil, como indica RFC 9110)
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        record_cache_lookup("etag", True)
+        return True
+
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    hit = etag.removeprefix("W/") in candidates
+    record_cache_lookup("etag", hit)
+    return hit
+
+
+def set_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def not_modified(etag: str) -> Response:
+    return set_etag(Response(status_code=status.HTTP_304_NOT_MODIFIED), etag)
@@ -0,0 +1,176 @@
+"""
+Liveness y readiness del worker.
+
+- Liveness (GET /health, /health/live): el proceso responde. No toca MongoDB:
+  una caída de la base no debe hacer que el orquestador reinicie los workers
+- Readiness (GET /health/ready): el worker puede atender tráfico. Revisa:
+  - mongo: latencia de un ping, con timeout
+  - pool: conexiones del pool en uso respecto del máximo (maxPoolSize)
+  - indexes: ensure_indexes terminó al iniciar
+  - event_loop: retraso del loop para volver a ejecutar una tarea lista
+  Si alguna falla responde 503 y el balanceador deja de enviar requests
+  a este worker hasta que se recupere.
+
+El resultado de readiness se cachea HEALTH_CACHE_SECONDS y los probes
+simultáneos comparten la misma revisión: muchos probes no multiplican los
+pings a MongoDB.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from pymongo import monitoring
+from pymongo.common import MAX_POOL_SIZE
+
+from app.core.config import settings
+from app.core.indexes import indexes_ready
+from app.core.loop_monitor import last_loop_lag
+
+
+class PoolUsage(monitoring.ConnectionPoolListener):
+    """
+    Conexiones en uso y máximo de cada pool (uno por servidor de MongoDB)
+    """
+
+    def __init__(self):
+        self.checked_out: Dict[Any, int] = {}
+        self.max_size: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, address, amount: int) -> None:
+        with self._lock:
+            self.checked_out[address] = self.checked_out.get(address, 0) + amount
+
+    def utilization(self) -> float:
+        """
+        Fracción del pool más ocupado (0.0 si no hay pools)
+        """
+        with self._lock:
+            return max(
+                (count / self.max_size.get(address, MAX_POOL_SIZE) for address, count in self.checked_out.items()),
+                default=0.0,
+            )
+
+    def pool_created(self, event) -> None:
+        self.max_size[event.address] = event.options.get("maxPoolSize", MAX_POOL_SIZE) or MAX_POOL_SIZE
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        with self._lock:
+            self.checked_out.pop(event.address, None)
+
+    def connection_created(self, event) -> None:
+        pass
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        pass
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_check_out_failed(self, event) -> None:
+        pass
+
+    def connection_checked_out(self, event) -> None:
+        self._add(event.address, 1)
+
+    def connection_checked_in(self, event) -> None:
+        self._add(event.address, -1)
+
+
+pool_usage = PoolUsage()
+
+
+async def _check_mongo(db) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=settings.HEALTH_MONGO_TIMEOUT_MS / 1000)
+    except asyncio.TimeoutError:
+        return {"ok": False, "error": f"ping sin respuesta en {settings.HEALTH_MONGO_TIMEOUT_MS} ms"}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    latency_ms = (time.perf_counter() - start) * 1000
+    return {
+        "ok": latency_ms <= settings.HEALTH_MONGO_MAX_LATENCY_MS,
+        "latency_ms": round(latency_ms, 2),
+        "threshold_ms": settings.HEALTH_MONGO_MAX_LATENCY_MS,
+    }
+
+
+def _check_pool() -> Dict[str, Any]:
+    utilization = pool_usage.utilization()
+    return {
+        "ok": utilization < settings.HEALTH_POOL_MAX_UTILIZATION,
+        "utilization": round(utilization, 3),
+        "threshold": settings.HEALTH_POOL_MAX_UTILIZATION,
+    }
+
+
+def _check_indexes() -> Dict[str, Any]:
+    return {"ok": indexes_ready()}
+
+
+async def _check_event_loop() -> Dict[str, Any]:
+    # Tiempo que tarda el loop en volver a esta tarea: las que ya estaban listas
+    # se ejecutan antes, así que mide cuánto trabajo tiene encolado. Se combina
+    # con la última medición del monitor continuo (app.core.loop_monitor)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.sleep(0)
+    lag_ms = max((loop.time() - start) * 1000, (last_loop_lag() or 0.0) * 1000)
+    return {
+        "ok": lag_ms <= settings.HEALTH_LOOP_MAX_LAG_MS,
+        "lag_ms": round(lag_ms, 2),
+        "threshold_ms": settings.HEALTH_LOOP_MAX_LAG_MS,
+    }
+
+
+async def _readiness(db) -> Dict[str, Any]:
+    checks = {
+        "event_loop": await _check_event_loop(),
+        "indexes": _check_indexes(),
+        "pool": _check_pool(),
+        "mongo": await _check_mongo(db),
+    }
+    return {
+        "status": "ready" if all(check["ok"] for check in checks.values()) else "not_ready",
+        "checks": checks,
+    }
+
+
+_cached: Optional[Dict[str, Any]] = None
+_cached_at = 0.0
+_in_flight: Optional[asyncio.Task] = None
+
+
+async def readiness(db) -> Dict[str, Any]:
+    """
+    Resultado de readiness (cacheado; una sola revisión a la vez)
+    """
+    global _cached, _cached_at, _in_flight
+    if _cached is not None and time.monotonic() - _cached_at < settings.HEALTH_CACHE_SECONDS:
+        return _cached
+
+    if _in_flight is None:
+        # Contexto vacío: la revisión es compartida y sus comandos no se cargan al probe que la inició
+        _in_flight = asyncio.create_task(_readiness(db), context=contextvars.Context())
+    task = _in_flight
+    try:
+        # shield: si un probe se desconecta, los demás siguen esperando la misma revisión
+        result = await asyncio.shield(task)
+    finally:
+        if task.done() and _in_flight is task:
+            _in_flight = None
+
+    _cached, _cached_at = result, time.monotonic()
+    return result
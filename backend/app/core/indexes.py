@@ -0,0 +1,88 @@
+"""
+Creación de índices de MongoDB al iniciar la aplicación.
+"""
+import logging
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, IndexModel
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Índices por colección.
+# (user_id, periodo_id, categoria_id) sirve todos los filtros de gastos y aportes:
+# por período (prefijo), por categoría y las agregaciones de totales.
+# (user_id, updated_at, _id) sirve GET /sync: los cambios desde un token, incluidos
+# los documentos compactos sin updated_at (ver document_layout.changed_since_filter).
+SYNC_INDEX = IndexModel(
+    [("user_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)],
+    name="user_updated"
+)
+
+INDEXES = {
+    "expenses": [
+        IndexModel(
+            [("user_id", ASCENDING), ("periodo_id", ASCENDING), ("categoria_id", ASCENDING)],
+            name="user_periodo_categoria"
+        ),
+        SYNC_INDEX,
+    ],
+    "aportes": [
+        IndexModel(
+            [("user_id", ASCENDING), ("periodo_id", ASCENDING), ("categoria_id", ASCENDING)],
+            name="user_periodo_categoria"
+        ),
+        SYNC_INDEX,
+    ],
+    "periods": [
+        SYNC_INDEX,
+    ],
+    "categories": [
+        SYNC_INDEX,
+    ],
+    # Tombstones de GET /sync: expiran solos tras la retención configurada
+    "deletions": [
+        IndexModel(
+            [("user_id", ASCENDING), ("deleted_at", ASCENDING)],
+            name="user_deleted"
+        ),
+        IndexModel(
+            [("deleted_at", ASCENDING)],
+            name="deleted_ttl",
+            expireAfterSeconds=settings.SYNC_TOMBSTONE_RETENTION_DAYS * 24 * 3600
+        ),
+    ],
+    # Consumo por usuario (app.core.usage): un documento por usuario, hora y endpoint.
+    # El índice TTL también sirve el filtro por ventana de GET /admin/usage/top
+    "usage_stats": [
+        IndexModel(
+            [("user_id", ASCENDING), ("bucket", ASCENDING), ("route", ASCENDING), ("method", ASCENDING)],
+            name="user_bucket_route",
+            unique=True
+        ),
+        IndexModel(
+            [("bucket", ASCENDING)],
+            name="bucket_ttl",
+            expireAfterSeconds=settings.USAGE_RETENTION_DAYS * 24 * 3600
+        ),
+    ],
+}
+
+
+# Todos los índices de INDEXES ya existen (lo revisa el readiness probe)
+_indexes_ready = False
+
+
+def indexes_ready() -> bool:
+    return _indexes_ready
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """
+    Crear los índices definidos en INDEXES (idempotente)
+    """
+    global _indexes_ready
+    for collection_name, indexes in INDEXES.items():
+        names = await db[collection_name].create_indexes(indexes)
+        logger.info(f"Índices de {collection_name}: {', '.join(names)}")
+    _indexes_ready = True
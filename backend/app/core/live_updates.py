@@ -0,0 +1,209 @@
+"""
+Push en vivo del resumen del período (Server-Sent Events / WebSocket).
+
+Un solo canal compartido por usuario y por worker:
+- Cada pestaña o dispositivo conectado es un suscriptor con su propia cola
+- Las escrituras del usuario (DataVersionCRUD.bump) despiertan el canal con
+  notify(); el canal recalcula el resumen UNA vez por período suscrito y envía
+  a cada suscriptor solo lo que cambió (delta)
+- Las escrituras hechas en otro worker no llaman a notify() aquí: el canal
+  igual revisa la versión de datos cada SUMMARY_STREAM_POLL_SECONDS (una
+  lectura por _id) y recalcula solo si cambió
+
+Este módulo no importa los CRUD (DataVersionCRUD lo importa para notify());
+el endpoint entrega las funciones para leer la versión y calcular el snapshot.
+"""
+import asyncio
+import contextvars
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Versión de datos del usuario
+VersionLoader = Callable[[str], Awaitable[int]]
+# Snapshot compacto del resumen de (usuario, período); None si el período no existe
+SnapshotLoader = Callable[[str, str], Awaitable[Optional[dict]]]
+
+SNAPSHOT_EVENT = "snapshot"
+DELTA_EVENT = "delta"
+
+
+def summary_delta(previous: dict, current: dict) -> dict:
+    """
+    Diferencia entre dos snapshots: solo las claves y categorías que cambiaron.
+    Una categoría eliminada se envía como null.
+    """
+    delta = {
+        key: value for key, value in current.items()
+        if key != "categorias" and previous.get(key) != value
+    }
+
+    previous_categories = previous.get("categorias", {})
+    current_categories = current.get("categorias", {})
+    categories = {}
+    for cat_id, totals in current_categories.items():
+        old = previous_categories.get(cat_id, {})
+        changed = {key: value for key, value in totals.items() if old.get(key) != value}
+        if changed:
+            categories[cat_id] = changed
+    for cat_id in previous_categories.keys() - current_categories.keys():
+        categories[cat_id] = None
+
+    if categories:
+        delta["categorias"] = categories
+    return delta
+
+
+class _Subscriber:
+    def __init__(self, periodo_id: str):
+        self.periodo_id = periodo_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.SUMMARY_STREAM_QUEUE_SIZE)
+
+
+class _UserChannel:
+    """
+    Fan-out de un usuario: una tarea que recalcula y reparte a todos sus suscriptores
+    """
+
+    def __init__(self, user_id: str, load_version: VersionLoader, load_snapshot: SnapshotLoader):
+        self.user_id = user_id
+        self.load_version = load_version
+        self.load_snapshot = load_snapshot
+        self.subscribers: Set[_Subscriber] = set()
+        self.snapshots: Dict[str, Optional[dict]] = {}
+        self.version: Optional[int] = None
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    async def snapshot(self, periodo_id: str) -> Optional[dict]:
+        """
+        Snapshot actual del período (compartido si otro suscriptor ya lo pidió)
+        """
+        if periodo_id not in self.snapshots:
+            if self.version is None:
+                self.version = await self.load_version(self.user_id)
+            self.snapshots[periodo_id] = await self.load_snapshot(self.user_id, periodo_id)
+        return self.snapshots[periodo_id]
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=settings.SUMMARY_STREAM_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f"Error recalculando el resumen en vivo del usuario {self.user_id}")
+
+    async def refresh(self) -> None:
+        version = await self.load_version(self.user_id)
+        if version == self.version:
+            return
+        self.version = version
+
+        for periodo_id in {subscriber.periodo_id for subscriber in self.subscribers}:
+            current = await self.load_snapshot(self.user_id, periodo_id)
+            previous = self.snapshots.get(periodo_id)
+            self.snapshots[periodo_id] = current
+            if current is None or current == previous:
+                continue
+
+            if previous is None:
+                event = (SNAPSHOT_EVENT, current)
+            else:
+                event = (DELTA_EVENT, {"periodo_id": periodo_id, **summary_delta(previous, current)})
+            self.publish(periodo_id, event)
+
+    def publish(self, periodo_id: str, event: tuple) -> None:
+        for subscriber in list(self.subscribers):
+            if subscriber.periodo_id != periodo_id:
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Cliente lento: se descartan sus deltas pendientes y recibe el snapshot completo
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait((SNAPSHOT_EVENT, self.snapshots[periodo_id]))
+
+
+_channels: Dict[str, _UserChannel] = {}
+
+
+async def subscribe(
+    user_id: str,
+    periodo_id: str,
+    load_version: VersionLoader,
+    load_snapshot: SnapshotLoader
+) -> tuple:
+    """
+    Suscribirse al resumen en vivo de un período.
+
+    Retorna (suscriptor, snapshot inicial). El snapshot es None si el período
+    no existe; en ese caso el suscriptor ya quedó dado de baja.
+    """
+    channel = _channels.get(user_id)
+    if channel is None:
+        channel = _channels[user_id] = _UserChannel(user_id, load_version, load_snapshot)
+
+    subscriber = _Subscriber(periodo_id)
+    channel.subscribers.add(subscriber)
+    if channel.task is None:
+        # Contexto vacío: el canal vive más que el request que lo creó y no
+        # debe heredar su identity map (app.core.unit_of_work)
+        channel.task = asyncio.create_task(channel.run(), context=contextvars.Context())
+
+    try:
+        snapshot = await channel.snapshot(periodo_id)
+    except BaseException:
+        unsubscribe(user_id, subscriber)
+        raise
+
+    if snapshot is None:
+        unsubscribe(user_id, subscriber)
+    return subscriber, snapshot
+
+
+def unsubscribe(user_id: str, subscriber: _Subscriber) -> None:
+    """
+    Dar de baja un suscriptor; el canal se cierra con el último
+    """
+    channel = _channels.get(user_id)
+    if channel is None:
+        return
+
+    channel.subscribers.discard(subscriber)
+    if not any(other.periodo_id == subscriber.periodo_id for other in channel.subscribers):
+        channel.snapshots.pop(subscriber.periodo_id, None)
+
+    if not channel.subscribers:
+        del _channels[user_id]
+        if channel.task is not None:
+            channel.task.cancel()
+
+
+def notify(user_id: str) -> None:
+    """
+    Avisar que cambiaron los datos del usuario (no-op si no tiene suscriptores en este worker)
+    """
+    channel = _channels.get(user_id)
+    if channel is not None:
+        channel.wakeup.set()
+
+
+def stats() -> Dict[str, Any]:
+    """
+    Canales y suscriptores activos en este worker
+    """
+    return {
+        "channels": len(_channels),
+        "subscribers": sum(len(channel.subscribers) for channel in _channels.values()),
+    }
@@ -0,0 +1,111 @@
+"""
+Monitor del event loop.
+
+- Retraso (lag): una tarea de fondo duerme un intervalo fijo y mide cuánto
+  más tardó en despertar. Ese exceso es el tiempo que el loop estuvo ocupado
+  con otro trabajo. Se registra en el histograma event_loop_lag_seconds y el
+  readiness probe usa el último valor (app.core.health)
+- Detección de bloqueos (LOOP_BLOCK_DETECTION_ENABLED, para debug/staging):
+  un thread vigila el latido de esa tarea. Si el loop no la ejecuta en
+  LOOP_BLOCK_THRESHOLD_MS, toma el stack del thread del loop en ese momento
+  (el código que lo está bloqueando: bcrypt, validación de listas grandes,
+  I/O síncrono...) y lo registra como advertencia, una vez por bloqueo
+"""
+import asyncio
+import contextvars
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, block_threshold: Optional[float]):
+        self.block_threshold = block_threshold
+        # El latido debe ser más frecuente que el umbral para no confundirse con un bloqueo
+        self.interval = min(interval, block_threshold / 2) if block_threshold else interval
+        self.last_lag = 0.0
+        self.heartbeat = time.monotonic()
+        self.loop_thread_id = threading.get_ident()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._measure(), context=contextvars.Context())
+        if self.block_threshold:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join()
+
+    async def _measure(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.heartbeat = now
+            self.last_lag = max(0.0, now - start - self.interval)
+            EVENT_LOOP_LAG.observe(self.last_lag)
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while not self._stop.wait(self.block_threshold / 4):
+            heartbeat = self.heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked < self.block_threshold or heartbeat == reported_heartbeat:
+                continue
+
+            reported_heartbeat = heartbeat
+            EVENT_LOOP_BLOCKS.inc()
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(stack no disponible)"
+            logger.warning(
+                "Event loop bloqueado hace %.0f ms (umbral %.0f ms), stack del loop:\n%s",
+                blocked * 1000, self.block_threshold * 1000, stack
+            )
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def start_loop_monitor() -> None:
+    """
+    Iniciar el monitor en el loop actual (llamar desde el lifespan)
+    """
+    global _monitor
+    if not settings.LOOP_MONITOR_ENABLED or _monitor is not None:
+        return
+    block_threshold = settings.LOOP_BLOCK_THRESHOLD_MS / 1000 if settings.LOOP_BLOCK_DETECTION_ENABLED else None
+    _monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL_MS / 1000, block_threshold)
+    _monitor.start()
+
+
+async def stop_loop_monitor() -> None:
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
+
+
+def last_loop_lag() -> Optional[float]:
+    """
+    Último retraso medido, en segundos (None si el monitor no está corriendo)
+    """
+    return _monitor.last_lag if _monitor is not None else None
@@ -0,0 +1,269 @@
+"""
+Métricas Prometheus de la API y de MongoDB, expuestas en GET /metrics.
+
+- HTTP: latencia por ruta (plantilla, ej: /api/v1/expenses/{expense_id}),
+  método y status; requests en curso
+- MongoDB: latencia de cada comando por colección y operación (CommandListener)
+  y estado del pool de conexiones (ConnectionPoolListener)
+- Event loop: retraso de planificación y bloqueos detectados
+- Caches: aciertos del identity map por request y de los GET condicionales (ETag)
+- Dominio: cierres automáticos de períodos y excesos de presupuesto de consultas
+
+Con varios workers de uvicorn, definir PROMETHEUS_MULTIPROC_DIR (un directorio
+vacío, limpiado en cada despliegue) antes de iniciar el proceso: cada worker
+escribe sus valores ahí y /metrics los agrega todos.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+# ====================
+# HTTP
+# ====================
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de los requests HTTP",
+    ["route", "method", "status"],
+)
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests HTTP en curso",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+# ====================
+# MONGODB
+# ====================
+
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "Latencia de los comandos enviados a MongoDB",
+    ["collection", "command", "status"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections",
+    "Conexiones abiertas en el pool de MongoDB",
+    ["address"],
+    multiprocess_mode="livesum",
+)
+
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongodb_pool_checked_out_connections",
+    "Conexiones del pool en uso por una operación",
+    ["address"],
+    multiprocess_mode="livesum",
+)
+
+MONGO_POOL_WAIT = Histogram(
+    "mongodb_pool_wait_seconds",
+    "Espera para obtener una conexión del pool",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total",
+    "Fallos al obtener una conexión del pool",
+    ["reason"],
+)
+
+# ====================
+# EVENT LOOP
+# ====================
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Retraso del event loop para ejecutar una tarea lista (ver app.core.loop_monitor)",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total",
+    "Veces que el event loop estuvo bloqueado más que LOOP_BLOCK_THRESHOLD_MS",
+)
+
+# ====================
+# CACHES Y DOMINIO
+# ====================
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Consultas a caches: identity_map (documentos por request) y etag (GET condicionales)",
+    ["cache", "result"],
+)
+
+PERIOD_ROLLOVERS = Counter(
+    "period_rollovers_total",
+    "Períodos creados automáticamente: rollover (cierre del vencido), skipped (intermedios) o initial",
+    ["tipo_periodo", "reason"],
+)
+
+QUERY_BUDGET_OVERRUNS = Counter(
+    "query_budget_overruns_total",
+    "Consultas cortadas por exceder su presupuesto de tiempo (maxTimeMS)",
+    ["method"],
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_metrics() -> bytes:
+    """
+    Métricas en formato de texto de Prometheus (agregadas entre workers si aplica)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide la latencia de cada request HTTP
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method=method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            # La plantilla de la ruta (no el path real) para acotar las series
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                route=getattr(route, "path", "unmatched"),
+                method=method,
+                status=str(status_code),
+            ).observe(time.perf_counter() - start)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Latencia de cada comando de MongoDB por colección y operación.
+
+    Los eventos llegan desde los threads de Motor: la colección se guarda al
+    iniciar el comando (solo el evento started trae el comando completo).
+    """
+
+    def __init__(self):
+        self._collections: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        with self._lock:
+            self._collections[self._key(event)] = collection if isinstance(collection, str) else "none"
+
+    def _finish(self, event, status: str) -> None:
+        with self._lock:
+            collection = self._collections.pop(self._key(event), "none")
+        MONGO_COMMAND_DURATION.labels(
+            collection=collection,
+            command=event.command_name,
+            status=status,
+        ).observe(event.duration_micros / 1_000_000)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "error")
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Conexiones abiertas y en uso del pool de MongoDB, y espera para obtener una
+    """
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        MONGO_POOL_CONNECTIONS.labels(address=self._address(event)).inc()
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        MONGO_POOL_CONNECTIONS.labels(address=self._address(event)).dec()
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_check_out_failed(self, event) -> None:
+        MONGO_POOL_CHECKOUT_FAILURES.labels(reason=str(event.reason)).inc()
+
+    def connection_checked_out(self, event) -> None:
+        MONGO_POOL_CHECKED_OUT.labels(address=self._address(event)).inc()
+        duration = getattr(event, "duration", None)
+        if duration is not None:
+            MONGO_POOL_WAIT.observe(duration)
+
+    def connection_checked_in(self, event) -> None:
+        MONGO_POOL_CHECKED_OUT.labels(address=self._address(event)).dec()
+
+
+def mongo_event_listeners() -> List:
+    """
+    Listeners de pymongo para registrar en el cliente de MongoDB
+    """
+    return [MongoCommandMetrics(), MongoPoolMetrics()]
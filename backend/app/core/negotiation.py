@@ -0,0 +1,121 @@
+"""
+Negociación de contenido JSON / MessagePack.
+
+- Respuestas: `Accept: application/msgpack` fija response_format para el request
+  y MongoJSONResponse codifica con MessagePack en vez de JSON.
+- Requests: un body `Content-Type: application/msgpack` se transcodifica a JSON
+  antes de llegar a FastAPI, así los modelos Pydantic lo validan igual que siempre.
+"""
+from typing import Dict
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.serialization import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    MongoJSONResponse,
+    msgpack_to_json,
+    response_format,
+)
+
+# Alias que usan algunos clientes
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+
+def negotiate_media_type(accept: str) -> str:
+    """
+    MessagePack solo si el cliente lo prefiere (q mayor o igual) sobre JSON
+    """
+    weights: Dict[str, float] = {}
+    for part in accept.split(","):
+        pieces = part.strip().split(";")
+        media_type = pieces[0].strip().lower()
+        if not media_type:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[media_type] = max(q, weights.get(media_type, 0.0))
+
+    msgpack_q = max(weights.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_q = max(weights.get(JSON_MEDIA_TYPE, 0.0), weights.get("application/*", 0.0), weights.get("*/*", 0.0))
+    return MSGPACK_MEDIA_TYPE if msgpack_q > 0 and msgpack_q >= json_q else JSON_MEDIA_TYPE
+
+
+class ContentNegotiationMiddleware:
+    """
+    Middleware ASGI que negocia MessagePack para requests y respuestas
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        token = response_format.set(negotiate_media_type(headers.get("accept", "")))
+
+        async def send_with_vary(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).add_vary_header("Accept")
+            await send(message)
+
+        try:
+            content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type in MSGPACK_MEDIA_TYPES:
+                body = await self._read_body(receive)
+                try:
+                    body = msgpack_to_json(body) if body else body
+                except Exception:
+                    response = MongoJSONResponse(
+                        {"detail": "Body MessagePack inválido"},
+                        status_code=400
+                    )
+                    await response(scope, receive, send_with_vary)
+                    return
+
+                # En el mismo scope (no una copia): el router anota ahí la ruta que
+                # leen las métricas, la contabilidad de uso y las trazas
+                scope["headers"] = list(scope["headers"])
+                request_headers = MutableHeaders(scope=scope)
+                request_headers["content-type"] = JSON_MEDIA_TYPE
+                request_headers["content-length"] = str(len(body))
+                receive = self._replay(body, receive)
+
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            response_format.reset(token)
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _replay(body: bytes, receive: Receive) -> Receive:
+        sent = False
+
+        async def replay() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay
@@ -0,0 +1,227 @@
+"""
+Perfiles de CPU guardados en PROFILING_DIR.
+
+Dos modos:
+- A pedido, por request: un admin envía el header X-Profile y ese request
+  corre bajo pyinstrument (muestreo estadístico con async_mode: los awaits se
+  atribuyen a la corrutina que los hizo). El perfil se guarda en formato
+  speedscope (https://www.speedscope.app) o HTML y su nombre vuelve en el
+  header X-Profile de la respuesta (ver app.api.profiling)
+- Siempre activo, a baja frecuencia (PROFILING_SAMPLER_ENABLED): un thread
+  toma el stack del event loop cada PROFILING_SAMPLER_INTERVAL_MS y cada
+  PROFILING_SAMPLER_FLUSH_SECONDS escribe los stacks agregados en formato
+  "folded" (speedscope y flamegraph.pl lo abren directo). Las muestras con
+  el loop esperando I/O no se cuentan (con el loop de asyncio o con uvloop).
+
+Los archivos se listan y descargan en GET /admin/profiles.
+"""
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pyinstrument import Profiler
+from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Formato pedido en el header -> (renderer, extensión)
+PROFILE_FORMATS = {
+    "speedscope": (SpeedscopeRenderer, ".speedscope.json"),
+    "html": (HTMLRenderer, ".html"),
+}
+DEFAULT_PROFILE_FORMAT = "speedscope"
+
+SAMPLED_PROFILE_EXTENSION = ".folded"
+
+_PROFILE_NAME = re.compile(r"^[\w.-]+$")
+
+
+def _profiles_dir() -> Path:
+    path = Path(settings.PROFILING_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+
+
+# ====================
+# PERFIL POR REQUEST
+# ====================
+
+def request_profile_name(method: str, path: str, profile_format: str) -> str:
+    """
+    Nombre del archivo del perfil de un request (ej: 20240115-103000-GET-api-v1-periods-summary-1a2b3c.html)
+    """
+    slug = re.sub(r"[^\w]+", "-", path).strip("-")[:80] or "root"
+    extension = PROFILE_FORMATS[profile_format][1]
+    return f"{_timestamp()}-{method}-{slug}-{uuid.uuid4().hex[:6]}{extension}"
+
+
+def request_profiler() -> Profiler:
+    return Profiler(interval=settings.PROFILING_INTERVAL_MS / 1000, async_mode="enabled")
+
+
+def _write_request_profile(profiler: Profiler, name: str, profile_format: str) -> None:
+    renderer = PROFILE_FORMATS[profile_format][0]()
+    (_profiles_dir() / name).write_text(profiler.output(renderer=renderer), encoding="utf-8")
+
+
+async def save_request_profile(profiler: Profiler, name: str, profile_format: str) -> None:
+    """
+    Renderizar y guardar el perfil fuera del event loop
+    """
+    await asyncio.to_thread(_write_request_profile, profiler, name, profile_format)
+
+
+# ====================
+# ARCHIVOS
+# ====================
+
+def list_profiles() -> List[Dict]:
+    """
+    Perfiles guardados, del más reciente al más antiguo
+    """
+    path = Path(settings.PROFILING_DIR)
+    if not path.is_dir():
+        return []
+
+    profiles = []
+    for entry in path.iterdir():
+        if entry.is_file():
+            stat = entry.stat()
+            profiles.append({
+                "name": entry.name,
+                "size": stat.st_size,
+                "modified_at": datetime.utcfromtimestamp(stat.st_mtime),
+            })
+    profiles.sort(key=lambda profile: profile["modified_at"], reverse=True)
+    return profiles
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """
+    Ruta de un perfil guardado (None si el nombre no es válido o no existe)
+    """
+    if not _PROFILE_NAME.match(name) or name.startswith("."):
+        return None
+    path = Path(settings.PROFILING_DIR) / name
+    return path if path.is_file() else None
+
+
+# ====================
+# MUESTREO CONTINUO
+# ====================
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+# Métodos que arrancan el loop; en uvloop (C) son el último frame de Python mientras espera I/O
+_LOOP_RUNNERS = {"run", "run_forever", "run_until_complete"}
+
+
+def _is_idle(frame) -> bool:
+    """
+    El loop está esperando I/O y no ejecutando código de la app: el frame más
+    interno es el selector (loop de asyncio) o el que arrancó el loop, sin
+    ningún callback por encima (uvloop, que espera I/O en C)
+    """
+    code = frame.f_code
+    if code.co_name in ("select", "poll") and code.co_filename.endswith("selectors.py"):
+        return True
+    return code.co_name in _LOOP_RUNNERS and Path(code.co_filename).parent.name in ("asyncio", "uvloop")
+
+
+class StackSampler:
+    """
+    Thread que muestrea el stack de otro thread (el del event loop) y agrega
+    los stacks en formato folded: "raíz;...;hoja cantidad" por línea
+    """
+
+    def __init__(self, thread_id: int, interval: float, flush_seconds: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.flush_seconds = flush_seconds
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None or _is_idle(frame):
+            return
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(labels))] += 1
+
+    def flush(self) -> None:
+        stacks, self.stacks = self.stacks, Counter()
+        if not stacks:
+            return
+        name = f"sampled-{_timestamp()}-{os.getpid()}{SAMPLED_PROFILE_EXTENSION}"
+        try:
+            with open(_profiles_dir() / name, "w", encoding="utf-8") as out:
+                for stack, count in stacks.most_common():
+                    out.write(f"{stack} {count}\n")
+        except OSError:
+            logger.exception("No se pudo guardar el perfil muestreado")
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_seconds
+        while not self._stop.wait(self.interval):
+            self.sample()
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_seconds
+
+
+_sampler: Optional[StackSampler] = None
+
+
+def start_sampler() -> None:
+    """
+    Iniciar el muestreo continuo del thread actual (llamar desde el event loop)
+    """
+    global _sampler
+    if not settings.PROFILING_SAMPLER_ENABLED or _sampler is not None:
+        return
+    _sampler = StackSampler(
+        threading.get_ident(),
+        interval=settings.PROFILING_SAMPLER_INTERVAL_MS / 1000,
+        flush_seconds=settings.PROFILING_SAMPLER_FLUSH_SECONDS,
+    )
+    _sampler.start()
+
+
+def stop_sampler() -> None:
+    """
+    Detener el muestreo continuo y guardar lo acumulado
+    """
+    global _sampler
+    if _sampler is not None:
+        _sampler.stop()
+        _sampler = None
@@ -0,0 +1,74 @@
+"""
+Presupuestos de tiempo (maxTimeMS) para las consultas a MongoDB.
+
+Cada consulta del CRUD pertenece a una clase con su propio presupuesto,
+configurado en Settings:
+- READ: find / find_one / count_documents
+- AGGREGATE: pipelines de agregación (totales por categoría y período)
+- WRITE: find_one_and_update
+
+Si MongoDB corta una consulta por exceder su presupuesto lanza ExecutionTimeout.
+El decorador `budgeted` cuenta el exceso por método del CRUD y main.py lo
+convierte en un 503 con Retry-After.
+"""
+import functools
+import logging
+from collections import Counter
+from typing import Dict
+
+from pymongo.errors import ExecutionTimeout
+
+from app.core.config import settings
+from app.core.metrics import QUERY_BUDGET_OVERRUNS
+
+logger = logging.getLogger(__name__)
+
+READ = "read"
+AGGREGATE = "aggregate"
+WRITE = "write"
+
+# Excesos de presupuesto por "Clase.método"
+_overruns: Counter = Counter()
+
+
+def max_time_ms(query_class: str) -> int:
+    """
+    Presupuesto en milisegundos para una clase de consulta
+    """
+    return {
+        READ: settings.QUERY_BUDGET_READ_MS,
+        AGGREGATE: settings.QUERY_BUDGET_AGGREGATE_MS,
+        WRITE: settings.QUERY_BUDGET_WRITE_MS,
+    }[query_class]
+
+
+def record_overrun(label: str) -> None:
+    _overruns[label] += 1
+    QUERY_BUDGET_OVERRUNS.labels(method=label).inc()
+    logger.warning(f"Consulta excedió su presupuesto de tiempo: {label} ({_overruns[label]} veces)")
+
+
+def get_overruns() -> Dict[str, int]:
+    """
+    Excesos de presupuesto acumulados en este proceso, de mayor a menor
+    """
+    return dict(_overruns.most_common())
+
+
+def budgeted(func):
+    """
+    Decorador para métodos async del CRUD: registra el exceso de presupuesto
+    con el nombre del método que lanzó la consulta y vuelve a lanzar el error.
+    Si el método se llama desde otro método decorado, solo cuenta el más interno.
+    """
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        try:
+            return await func(self, *args, **kwargs)
+        except ExecutionTimeout as e:
+            if not getattr(e, "_budget_recorded", False):
+                e._budget_recorded = True
+                record_overrun(f"{type(self).__name__}.{func.__name__}")
+            raise
+
+    return wrapper
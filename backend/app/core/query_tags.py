@@ -0,0 +1,43 @@
+"""
+Etiqueta de origen en cada consulta del CRUD.
+
+Las colecciones del CRUD se envuelven con tagged_collection: cada operación
+sale hacia MongoDB con comment="Clase.método", el nombre calificado de la
+función que la llamó (ej: "ExpenseCRUD.get_by_id", "UnitOfWork.flush").
+El comentario queda en system.profile, en el log de consultas lentas del
+servidor y en currentOp, así que cada consulta lenta se puede atribuir al
+método que la lanzó (ver app.slow_queries).
+"""
+import sys
+
+# Operaciones de Motor que aceptan comment (pymongo >= 4.1)
+_TAGGED_METHODS = frozenset({
+    "find", "find_one", "aggregate", "count_documents", "distinct",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "bulk_write",
+    "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+})
+
+
+class TaggedCollection:
+    """
+    Colección de Motor que agrega comment con el método que lanza cada operación
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._collection, name)
+        if name not in _TAGGED_METHODS:
+            return attribute
+
+        def tagged(*args, **kwargs):
+            kwargs.setdefault("comment", sys._getframe(1).f_code.co_qualname)
+            return attribute(*args, **kwargs)
+
+        return tagged
+
+
+def tagged_collection(collection) -> TaggedCollection:
+    return TaggedCollection(collection)
@@ -7,6 +7,9 @@ from app.core.config import settings
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# "purpose" claim of single-purpose tokens (access tokens have none)
+STREAM_TICKET_PURPOSE = "stream"
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -46,6 +49,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_stream_ticket(user_id: str) -> str:
+    """
+    Create a short-lived token that only opens live-update streams.
+
+    EventSource and the WebSocket handshake cannot send an Authorization
+    header, so the ticket travels in the URL instead of the access token.
+    """
+    return create_access_token(
+        {"sub": user_id, "purpose": STREAM_TICKET_PURPOSE},
+        expires_delta=timedelta(seconds=settings.STREAM_TICKET_EXPIRE_SECONDS)
+    )
+
+
 def decode_access_token(token: str) -> Optional[dict]:
     """
     Decode and validate a JWT token.
@@ -0,0 +1,362 @@
+"""
+Serialización rápida de respuestas (JSON y MessagePack).
+
+- MongoJSONResponse: respuesta basada en orjson que entiende ObjectId y datetime.
+  Si el cliente negoció MessagePack (ver app/core/negotiation.py) la misma
+  respuesta se codifica con packb: ObjectId como extensión binaria de 12 bytes
+  y datetime como extensión timestamp estándar (-1). Las respuestas validadas
+  con response_model recuperan sus fechas según los tipos del modelo.
+- make_serializer: precompila, a partir de un modelo *Response, una función que
+  convierte un documento de MongoDB (confiable, ya validado al escribirlo)
+  directamente en el dict de salida, sin construir modelos intermedios.
+- parse_fields: valida el parámetro `fields=` (sparse fieldsets) contra el
+  modelo de respuesta; el CRUD lo usa como proyección y el serializador con only().
+
+Los endpoints de listas usan ambos para saltarse la conversión
+Mongo -> *InDB -> *Response -> validación de response_model -> json.
+"""
+import functools
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union, get_args, get_origin
+
+import msgpack
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+from app.core.tracing import tracer
+
+Serializer = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Código de extensión MessagePack para ObjectId (12 bytes)
+OBJECT_ID_EXT = 1
+
+# Formato negociado para la respuesta del request en curso
+response_format: ContextVar[str] = ContextVar("response_format", default=JSON_MEDIA_TYPE)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, msgpack.Timestamp):
+        return value.to_datetime().replace(tzinfo=None).isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+# ====================
+# MESSAGEPACK
+# ====================
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp(value: datetime) -> msgpack.Timestamp:
+    """
+    datetime (naive = UTC, la convención de la app) -> extensión timestamp (-1)
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    # Aritmética entera: from_datetime pasa por un float y puede perder el microsegundo
+    delta = value - _EPOCH
+    return msgpack.Timestamp(delta.days * 86400 + delta.seconds, delta.microseconds * 1000)
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return msgpack.ExtType(OBJECT_ID_EXT, value.binary)
+    if isinstance(value, datetime):
+        return _timestamp(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == OBJECT_ID_EXT:
+        return ObjectId(data)
+    return msgpack.ExtType(code, data)
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+def unpackb(data: bytes) -> Any:
+    """
+    Decodificar MessagePack: ObjectId -> ObjectId, timestamp -> msgpack.Timestamp
+    """
+    return msgpack.unpackb(data, ext_hook=_ext_hook, strict_map_key=False)
+
+
+def msgpack_to_json(data: bytes) -> bytes:
+    """
+    Transcodificar un body MessagePack a JSON para que lo validen los modelos
+    Pydantic de siempre (ObjectId -> str, timestamp -> ISO 8601 naive UTC)
+    """
+    return dumps(unpackb(data))
+
+
+# Modelo de respuesta de la ruta en curso (lo fija app.api.routing.NegotiatedRoute)
+response_model: ContextVar[Any] = ContextVar("response_model", default=None)
+
+
+def _as_datetime(value: Any) -> Any:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+@functools.lru_cache(maxsize=None)
+def _restorer_for(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """
+    Conversión que devuelve a datetime los campos declarados datetime en el
+    modelo, o None si el tipo no tiene fechas. Los IDs de los modelos *Response
+    son str y se envían como str: solo los serializadores precompilados,
+    que parten del documento de MongoDB, conservan los ObjectId.
+    """
+    origin = get_origin(annotation)
+
+    if origin is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        inner = _restorer_for(args[0]) if len(args) == 1 else None
+        if inner is None:
+            return None
+        return lambda value: None if value is None else inner(value)
+
+    if origin in (list, List):
+        (item_type,) = get_args(annotation) or (Any,)
+        item = _restorer_for(item_type)
+        if item is None:
+            return None
+        return lambda value: [item(v) for v in value] if isinstance(value, list) else value
+
+    if annotation is datetime:
+        return _as_datetime
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        fields = [
+            (field.alias or name, restore)
+            for name, field in annotation.model_fields.items()
+            if (restore := _restorer_for(field.annotation)) is not None
+        ]
+        if not fields:
+            return None
+
+        def restore_model(value: Any) -> Any:
+            if not isinstance(value, dict):
+                return value
+            restored = dict(value)
+            for key, restore in fields:
+                if key in restored:
+                    restored[key] = restore(restored[key])
+            return restored
+
+        return restore_model
+
+    return None
+
+
+def restore_native_types(content: Any, model: Any) -> Any:
+    """
+    Volver a datetime las fechas que la validación de response_model ya
+    convirtió a ISO 8601, según los tipos del modelo, para que MessagePack las
+    envíe como timestamp. Sin modelo (respuestas armadas a mano) no se toca nada.
+    """
+    restore = _restorer_for(model) if model is not None else None
+    return restore(content) if restore is not None else content
+
+
+def _has_native_types(content: Any) -> bool:
+    """
+    Las listas de los serializadores precompilados ya traen ObjectId nativos
+    """
+    return (
+        isinstance(content, list)
+        and bool(content)
+        and isinstance(content[0], dict)
+        and isinstance(content[0].get("_id"), ObjectId)
+    )
+
+
+class MongoJSONResponse(JSONResponse):
+    """
+    JSONResponse serializada con orjson (ObjectId -> str, datetime -> ISO 8601),
+    o con MessagePack si el request lo negoció con Accept
+    """
+    def render(self, content: Any) -> bytes:
+        with tracer.start_as_current_span("serialize") as span:
+            if response_format.get() == MSGPACK_MEDIA_TYPE:
+                self.media_type = MSGPACK_MEDIA_TYPE
+                if not _has_native_types(content):
+                    content = restore_native_types(content, response_model.get())
+                body = packb(content)
+            else:
+                body = dumps(content)
+            span.set_attribute("http.response_content_length", len(body))
+            return body
+
+
+# ====================
+# SERIALIZADORES PRECOMPILADOS
+# ====================
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _to_str(value: Any) -> Any:
+    return str(value) if isinstance(value, ObjectId) else value
+
+
+def _to_float(value: Any) -> Any:
+    return float(value) if isinstance(value, (int, Decimal)) and not isinstance(value, bool) else value
+
+
+def _to_enum_value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _converter_for(annotation: Any, native: bool = False) -> Callable[[Any], Any]:
+    """
+    Elegir (una sola vez) la conversión de un campo según su tipo en el modelo.
+    Con native=True (MessagePack) los ObjectId se mantienen como tales.
+    """
+    origin = get_origin(annotation)
+
+    if origin is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        inner = _converter_for(args[0], native) if len(args) == 1 else _identity
+        if inner is _identity:
+            return _identity
+        return lambda value: None if value is None else inner(value)
+
+    if origin in (list, List):
+        (item_type,) = get_args(annotation) or (Any,)
+        item = _converter_for(item_type, native)
+        if item is _identity:
+            return lambda value: list(value or [])
+        return lambda value: [item(v) for v in (value or [])]
+
+    if annotation is str:
+        return _identity if native else _to_str
+    if annotation is float:
+        return _to_float
+    if annotation is datetime:
+        return _identity
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return _to_enum_value
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        nested = _compile(_plan_for(annotation, native))
+        return lambda value: nested(value) if isinstance(value, dict) else value
+
+    return _identity
+
+
+def _compile(plan: list) -> Serializer:
+    def serialize(document: Dict[str, Any]) -> Dict[str, Any]:
+        output = {}
+        for key, convert, default, default_factory in plan:
+            value = document.get(key)
+            if value is None:
+                value = default_factory() if default_factory else default
+            output[key] = convert(value)
+        return output
+
+    return serialize
+
+
+def _plan_for(model: type, native: bool) -> list:
+    plan = []
+    for name, field in model.model_fields.items():
+        key = field.alias or name
+        default = None if field.default is PydanticUndefined else field.default
+        if field.default_factory is not None:
+            default_factory = field.default_factory
+        else:
+            default_factory = None
+        plan.append((key, _converter_for(field.annotation, native), default, default_factory))
+    return plan
+
+
+def make_serializer(model: type) -> Serializer:
+    """
+    Precompilar un serializador documento -> dict para un modelo de respuesta.
+
+    Las claves de salida son los alias del modelo (ej: "_id"), igual que
+    la serialización de FastAPI con response_model.
+
+    `serializer.only(fields)` retorna (y cachea) la variante para el request en
+    curso: solo las claves de `fields=` (ver parse_fields) y, si se negoció
+    MessagePack, con los ObjectId sin convertir a str.
+    """
+    plans = {
+        JSON_MEDIA_TYPE: _plan_for(model, native=False),
+        MSGPACK_MEDIA_TYPE: _plan_for(model, native=True),
+    }
+    serialize = _compile(plans[JSON_MEDIA_TYPE])
+
+    @functools.lru_cache(maxsize=64)
+    def _variant(fields: Tuple[str, ...], media_type: str) -> Serializer:
+        plan = plans[media_type]
+        if fields:
+            plan = [entry for entry in plan if entry[0] in fields]
+        return _compile(plan)
+
+    def only(fields: Optional[List[str]]) -> Serializer:
+        return _variant(tuple(fields or ()), response_format.get())
+
+    serialize.__name__ = f"serialize_{model.__name__}"
+    serialize.only = only
+    return serialize
+
+
+# ====================
+# SPARSE FIELDSETS (?fields=)
+# ====================
+
+def response_keys(model: type) -> Dict[str, str]:
+    """
+    Nombres aceptados en `fields=` -> clave de salida (nombre del campo o su alias)
+    """
+    keys = {}
+    for name, field in model.model_fields.items():
+        key = field.alias or name
+        keys[name] = key
+        keys[key] = key
+    return keys
+
+
+def parse_fields(model: type, fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Validar `fields=nombre,monto,...` contra el modelo de respuesta.
+
+    Retorna las claves de salida en el orden del modelo, siempre con "_id"
+    (los clientes identifican los elementos por él), o None si no se pidió
+    un subconjunto. Lanza ValueError si algún campo no existe en el modelo.
+    """
+    if not fields:
+        return None
+
+    keys = response_keys(model)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in keys]
+    if unknown:
+        raise ValueError(
+            f"Campos desconocidos: {', '.join(unknown)}. "
+            f"Disponibles: {', '.join(sorted(set(keys.values())))}"
+        )
+
+    selected = {keys[name] for name in requested}
+    selected.add(keys.get("id", "_id"))
+    return [key for key in dict.fromkeys(keys.values()) if key in selected]
@@ -0,0 +1,203 @@
+"""
+Logs estructurados (una línea JSON por evento) sin bloquear el event loop.
+
+- Los loggers de la app formatean el registro y lo encolan (QueueHandler);
+  un thread (QueueListener) hace la escritura bloqueante en stdout
+- Cada línea lleva request_id y user_id del request en curso (contextvar;
+  también desde los threads de Motor, que copian el contexto)
+- Niveles: LOG_LEVEL para todo y LOG_LEVELS por módulo
+  (ej: "app.crud.period=DEBUG,pymongo=WARNING")
+- Los diagnósticos de debug usan logger.debug con argumentos %s: si el nivel
+  está desactivado no se formatea nada
+
+El request_id viene del header X-Request-ID (si el cliente o el proxy lo envía)
+o se genera, y vuelve en la respuesta con el mismo header.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Un X-Request-ID entrante solo se acepta si es corto y sin caracteres raros
+_VALID_REQUEST_ID = re.compile(r"^[\w.:-]{1,64}$")
+
+# Credenciales que pueden venir en la query string (ej: la URL del log de acceso de uvicorn)
+_URL_SECRETS = re.compile(r"((?:^|[?&])(?:ticket|access_token|token)=)[^&\s\"]+")
+
+# Atributos estándar de LogRecord; el resto (extra=...) va al JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "color_message"}
+
+# Loggers de uvicorn que se redirigen al pipeline de la app
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+class RequestContext:
+    """
+    Identidad del request en curso (mutable: get_current_user completa el usuario)
+    """
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.user_id: Optional[str] = None
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request_context() -> Optional[RequestContext]:
+    return _current.get()
+
+
+def bind_user(user_id) -> None:
+    """
+    Asociar el usuario autenticado a los logs del request en curso
+    """
+    context = _current.get()
+    if context is not None:
+        context.user_id = str(user_id)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Agrega request_id y user_id al registro (corre en el thread que loguea)
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _current.get()
+        record.request_id = context.request_id if context else None
+        record.user_id = context.user_id if context else None
+        return True
+
+
+class RedactSecretsFilter(logging.Filter):
+    """
+    Oculta tickets y tokens en URLs del mensaje y sus argumentos
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, str):
+            record.msg = _URL_SECRETS.sub(r"\1[redacted]", record.msg)
+        if isinstance(record.args, tuple):
+            record.args = tuple(
+                _URL_SECRETS.sub(r"\1[redacted]", arg) if isinstance(arg, str) else arg
+                for arg in record.args
+            )
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _parse_levels(levels: str) -> dict:
+    parsed = {}
+    for item in levels.split(","):
+        name, _, level = item.strip().partition("=")
+        if name and level:
+            parsed[name.strip()] = level.strip().upper()
+    return parsed
+
+
+def setup_logging() -> None:
+    """
+    Configurar el logger raíz: cola en memoria + thread que escribe JSON en stdout
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    # El registro se formatea al encolarlo (con request_id/user_id del contexto
+    # actual); el thread del listener solo escribe la línea ya armada
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(RedactSecretsFilter())
+    queue_handler.setFormatter(
+        JSONFormatter() if settings.LOG_FORMAT == "json"
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s %(user_id)s] %(message)s")
+    )
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for name, level in _parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    for name in _UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers[:] = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """
+    Escribir los registros pendientes y detener el thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI que asigna el request_id de los logs y lo devuelve en X-Request-ID
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        request_id = incoming if incoming and _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        token = _current.set(RequestContext(request_id))
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(REQUEST_ID_HEADER, request_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _current.reset(token)
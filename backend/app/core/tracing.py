@@ -0,0 +1,188 @@
+"""
+Trazas distribuidas (OpenTelemetry) de la API, el CRUD y MongoDB.
+
+Cada request HTTP sampleado produce un árbol de spans:
+- HTTP (middleware más externo): método, ruta y status; continúa la traza
+  del cliente si llega un header traceparent (W3C Trace Context)
+- Dependencias: get_current_user (validación del token y lectura del usuario)
+- CRUD: un span por método (ej: PeriodCRUD.get_active, con el rollover adentro)
+- MongoDB: un span por comando (CommandListener; Motor copia el contexto al
+  thread que ejecuta la operación, así el span cuelga del método del CRUD)
+- Serialización de la respuesta (JSON o MessagePack)
+
+Exportación local, sin collector externo: TRACING_EXPORTER=stdout o file
+(un span por línea en JSON, en TRACING_FILE). El sampleo es por traza
+(TRACING_SAMPLE_RATIO) y respeta la decisión del padre si viene en traceparent.
+
+Con TRACING_ENABLED=false el tracer es el no-op de OpenTelemetry y los
+métodos del CRUD no se envuelven.
+"""
+import functools
+import inspect
+import sys
+import threading
+import types
+from typing import Dict, Optional, Tuple
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+tracer = trace.get_tracer("app")
+
+_provider: Optional[TracerProvider] = None
+
+
+def _span_line(span) -> str:
+    return span.to_json(indent=None) + "\n"
+
+
+def setup_tracing() -> None:
+    """
+    Registrar el TracerProvider con el sampler y el exportador configurados
+    """
+    global _provider
+    if not settings.TRACING_ENABLED or _provider is not None:
+        return
+
+    if settings.TRACING_EXPORTER == "file":
+        out = open(settings.TRACING_FILE, "a", encoding="utf-8")
+    elif settings.TRACING_EXPORTER == "stdout":
+        out = sys.stdout
+    else:
+        raise ValueError(f"TRACING_EXPORTER inválido: {settings.TRACING_EXPORTER} (stdout o file)")
+
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME, "service.version": settings.VERSION}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter(out=out, formatter=_span_line)))
+    trace.set_tracer_provider(_provider)
+
+
+def shutdown_tracing() -> None:
+    """
+    Exportar los spans pendientes antes de terminar el proceso
+    """
+    if _provider is not None:
+        _provider.shutdown()
+
+
+def traced(cls):
+    """
+    Decorador de clase para el CRUD: un span por cada método async ("Clase.método")
+    """
+    if not settings.TRACING_ENABLED:
+        return cls
+
+    for name, value in list(vars(cls).items()):
+        if name.startswith("__") or not isinstance(value, types.FunctionType):
+            continue
+        if inspect.iscoroutinefunction(value):
+            setattr(cls, name, _traced_method(f"{cls.__name__}.{name}", value))
+    return cls
+
+
+def _traced_method(span_name: str, func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        with tracer.start_as_current_span(span_name):
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que abre el span raíz de cada request HTTP
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        method = scope["method"]
+
+        with tracer.start_as_current_span(
+            method,
+            context=propagate.extract(carrier),
+            kind=SpanKind.SERVER,
+            attributes={"http.method": method, "http.target": scope["path"]},
+        ) as span:
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # La plantilla de la ruta solo se conoce después del routing
+                route = scope.get("route")
+                if route is not None:
+                    span.set_attribute("http.route", route.path)
+                    span.update_name(f"{method} {route.path}")
+
+
+class MongoTracingListener(monitoring.CommandListener):
+    """
+    Un span por comando de MongoDB, hijo del span activo al lanzar la operación
+    """
+
+    def __init__(self):
+        self._spans: Dict[Tuple, trace.Span] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event) -> Tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if not trace.get_current_span().get_span_context().is_valid:
+            # Fuera de un request (migraciones, índices, tareas de fondo)
+            return
+        collection = event.command.get(event.command_name)
+        host, port = event.connection_id
+        span = tracer.start_span(
+            f"mongodb.{event.command_name}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "mongodb",
+                "db.name": event.database_name,
+                "db.operation": event.command_name,
+                "db.mongodb.collection": collection if isinstance(collection, str) else "",
+                "net.peer.name": host,
+                "net.peer.port": port,
+            },
+        )
+        with self._lock:
+            self._spans[self._key(event)] = span
+
+    def _finish(self, event, error: Optional[str] = None) -> None:
+        with self._lock:
+            span = self._spans.pop(self._key(event), None)
+        if span is None:
+            return
+        if error is not None:
+            span.set_status(Status(StatusCode.ERROR, error))
+        span.end()
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, str(event.failure.get("errmsg", "")))
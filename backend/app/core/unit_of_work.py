@@ -0,0 +1,281 @@
+"""
+Contexto por request compartido por todas las instancias de CRUD.
+
+- Identity map: los documentos leídos o escritos por _id quedan en memoria
+  durante el request; get_by_id no vuelve a consultar lo que ya tiene
+  (ej: PUT /expenses/{id} lee el período y update_total_gastado lo vuelve a pedir)
+- Unit of work: las escrituras secundarias (versiones de datos y tombstones)
+  se acumulan y se aplican juntas, un bulk_write por colección, justo antes
+  de enviar la respuesta. Varias escrituras al mismo documento se combinan
+  (ej: varios $inc de la versión del usuario en una sola actualización)
+- Si el flush falla, lo pendiente no se pierde: se reintenta hasta
+  UNIT_OF_WORK_FLUSH_ATTEMPTS veces y, si sigue fallando, la respuesta se
+  envía igual (la escritura principal ya está hecha) y una tarea de fondo lo
+  sigue reintentando. Mientras tanto los ETags y /sync pueden ir atrasados
+
+Fuera de un request (scripts, migraciones, tareas de fondo) no hay contexto:
+las lecturas van directo a MongoDB y las escrituras se aplican de inmediato.
+"""
+import asyncio
+import contextvars
+import logging
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Código de clave duplicada de MongoDB
+DUPLICATE_KEY = 11000
+
+
+class UnitOfWork:
+    def __init__(self):
+        self.identity_map: Dict[Tuple[str, Any], dict] = {}
+        self._collections: Dict[str, Any] = {}
+        self._increments: Dict[Tuple[str, Any], Dict[str, int]] = {}
+        self._inserts: Dict[str, List[dict]] = {}
+        self._after_flush: List[Callable[[], None]] = []
+
+    # ====================
+    # IDENTITY MAP
+    # ====================
+
+    def lookup(self, collection, doc_id: Any, user_id: Optional[str] = None) -> Optional[dict]:
+        document = self.identity_map.get((collection.name, ObjectId(doc_id)))
+        if document is not None and user_id is not None and document.get("user_id") != ObjectId(user_id):
+            document = None
+        record_cache_lookup("identity_map", document is not None)
+        return dict(document) if document is not None else None
+
+    def remember(self, collection, document: Optional[dict]) -> None:
+        if document is not None and "_id" in document:
+            self.identity_map[(collection.name, document["_id"])] = dict(document)
+
+    def forget(self, collection, doc_id: Any) -> None:
+        self.identity_map.pop((collection.name, ObjectId(doc_id)), None)
+
+    # ====================
+    # ESCRITURAS PENDIENTES
+    # ====================
+
+    def increment(self, collection, doc_id: Any, increments: Dict[str, int]) -> None:
+        """
+        $inc con upsert pendiente; se combina con los anteriores al mismo documento
+        """
+        self._collections[collection.name] = collection
+        pending = self._increments.setdefault((collection.name, doc_id), {})
+        for field, amount in increments.items():
+            pending[field] = pending.get(field, 0) + amount
+
+    def pending_increments(self, collection, doc_id: Any) -> Dict[str, int]:
+        return self._increments.get((collection.name, doc_id), {})
+
+    def insert(self, collection, documents: List[dict]) -> None:
+        self._collections[collection.name] = collection
+        self._inserts.setdefault(collection.name, []).extend(documents)
+
+    def after_flush(self, callback: Callable[[], None]) -> None:
+        self._after_flush.append(callback)
+
+    def has_pending(self) -> bool:
+        return bool(self._increments or self._inserts)
+
+    async def flush(self) -> None:
+        """
+        Aplicar las escrituras pendientes: un bulk_write por colección
+
+        Lo de cada colección sale de pendientes recién cuando su bulk_write
+        termina; si falla, lo que no se aplicó vuelve a pendientes (combinado
+        con lo agregado mientras tanto), se sigue con las demás colecciones y
+        al final se propaga el error para que se reintente. Los callbacks
+        corren solo cuando se aplicó todo.
+        """
+        error: Optional[BaseException] = None
+        for collection_name in list(self._collections):
+            keys = [key for key in self._increments if key[0] == collection_name]
+            increments = [(key, self._increments.pop(key)) for key in keys]
+            inserts = self._inserts.pop(collection_name, [])
+
+            operations = [
+                UpdateOne({"_id": doc_id}, {"$inc": amounts}, upsert=True)
+                for (_, doc_id), amounts in increments
+            ]
+            operations.extend(InsertOne(document) for document in inserts)
+            if not operations:
+                continue
+
+            try:
+                await self._collections[collection_name].bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # ordered=False: solo las operaciones con error quedan sin aplicar. Un
+                # insert con clave duplicada ya se aplicó en un intento anterior
+                failed = {
+                    error["index"]
+                    for error in e.details.get("writeErrors", [])
+                    if error["index"] < len(increments) or error.get("code") != DUPLICATE_KEY
+                }
+                self._restore(
+                    collection_name,
+                    [increments[index] for index in sorted(failed) if index < len(increments)],
+                    [inserts[index - len(increments)] for index in sorted(failed) if index >= len(increments)],
+                )
+                error = error or e
+            except PyMongoError as e:
+                self._restore(collection_name, increments, inserts)
+                error = error or e
+            except BaseException:
+                self._restore(collection_name, increments, inserts)
+                raise
+
+        if error is not None:
+            raise error
+
+        callbacks, self._after_flush = self._after_flush, []
+        for callback in callbacks:
+            callback()
+
+    def _restore(self, collection_name: str, increments: list, inserts: List[dict]) -> None:
+        """
+        Devolver a pendientes lo que no se pudo aplicar
+        """
+        for key, amounts in increments:
+            pending = self._increments.setdefault(key, {})
+            for field, amount in amounts.items():
+                pending[field] = pending.get(field, 0) + amount
+        if inserts:
+            self._inserts[collection_name] = inserts + self._inserts.get(collection_name, [])
+
+
+_current: ContextVar[Optional[UnitOfWork]] = ContextVar("unit_of_work", default=None)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    return _current.get()
+
+
+def lookup(collection, doc_id: Any, user_id: Optional[str] = None) -> Optional[dict]:
+    """
+    Documento del identity map del request (None si no está o no hay request)
+    """
+    unit_of_work = _current.get()
+    return unit_of_work.lookup(collection, doc_id, user_id) if unit_of_work else None
+
+
+def remember(collection, document: Optional[dict]) -> None:
+    """
+    Guardar un documento leído o escrito en el identity map del request
+    """
+    unit_of_work = _current.get()
+    if unit_of_work is not None:
+        unit_of_work.remember(collection, document)
+
+
+def forget(collection, doc_id: Any) -> None:
+    """
+    Sacar un documento del identity map (eliminado o editado sin leerlo de vuelta)
+    """
+    unit_of_work = _current.get()
+    if unit_of_work is not None:
+        unit_of_work.forget(collection, doc_id)
+
+
+# Reintentos en segundo plano de flushes que fallaron (referencias para que no los recolecte el GC)
+_retries: Set[asyncio.Task] = set()
+
+# Espera del primer reintento en segundo plano; se duplica hasta el máximo
+RETRY_DELAY_SECONDS = 1.0
+RETRY_MAX_DELAY_SECONDS = 60.0
+
+
+async def flush_with_retries(unit_of_work: UnitOfWork) -> None:
+    """
+    flush con hasta UNIT_OF_WORK_FLUSH_ATTEMPTS intentos; propaga el último error
+    """
+    for attempt in range(settings.UNIT_OF_WORK_FLUSH_ATTEMPTS):
+        try:
+            await unit_of_work.flush()
+            return
+        except PyMongoError:
+            if attempt == settings.UNIT_OF_WORK_FLUSH_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(0.05 * 2 ** attempt)
+
+
+async def _retry_until_applied(unit_of_work: UnitOfWork) -> None:
+    delay = RETRY_DELAY_SECONDS
+    while unit_of_work.has_pending():
+        await asyncio.sleep(delay)
+        try:
+            await unit_of_work.flush()
+            logger.info("Escrituras pendientes de un request aplicadas en segundo plano")
+        except PyMongoError:
+            delay = min(delay * 2, RETRY_MAX_DELAY_SECONDS)
+            logger.warning("Reintento de escrituras pendientes falló; siguiente en %ss", delay)
+
+
+def retry_in_background(unit_of_work: UnitOfWork) -> asyncio.Task:
+    """
+    Seguir reintentando el flush fuera del request (con un contexto vacío,
+    para no atribuirlo al request ni a su usuario)
+    """
+    task = asyncio.create_task(_retry_until_applied(unit_of_work), context=contextvars.Context())
+    _retries.add(task)
+    task.add_done_callback(_retries.discard)
+    return task
+
+
+async def _flush_or_defer(unit_of_work: UnitOfWork) -> Optional[asyncio.Task]:
+    """
+    flush_with_retries; si falla, lo deja reintentándose en segundo plano y retorna esa tarea
+    """
+    try:
+        await flush_with_retries(unit_of_work)
+        return None
+    except Exception:
+        logger.exception("No se pudieron aplicar las escrituras pendientes del request; se reintentan en segundo plano")
+        return retry_in_background(unit_of_work)
+
+
+class UnitOfWorkMiddleware:
+    """
+    Middleware ASGI que abre un UnitOfWork por request y lo aplica antes de
+    enviar la respuesta (así un GET inmediatamente posterior ya ve las versiones nuevas)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        unit_of_work = UnitOfWork()
+        token = _current.set(unit_of_work)
+
+        # Mientras un reintento en segundo plano siga activo, él aplica también lo que se agregue después
+        retry: Optional[asyncio.Task] = None
+
+        async def send_after_flush(message: Message) -> None:
+            nonlocal retry
+            if message["type"] in ("http.response.start", "websocket.accept", "websocket.close"):
+                if retry is None or retry.done():
+                    # Si no se pueden aplicar, la escritura principal ya se hizo: no es un 500
+                    retry = await _flush_or_defer(unit_of_work)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_after_flush)
+        finally:
+            # Escrituras de un request que terminó con error (o de una conexión ya cerrada)
+            if (retry is None or retry.done()) and unit_of_work.has_pending():
+                await _flush_or_defer(unit_of_work)
+            _current.reset(token)
@@ -0,0 +1,143 @@
+"""
+Consumo de recursos por usuario y endpoint.
+
+Por cada request autenticado se acumula en memoria, por (usuario, hora,
+ruta, método): requests, comandos de MongoDB, documentos devueltos y
+escritos, tiempo en MongoDB y tiempo de CPU del event loop. Cada
+USAGE_FLUSH_SECONDS una tarea de fondo suma lo acumulado en la colección
+usage_stats (un upsert por clave) y GET /admin/usage/top lista los usuarios
+de mayor consumo en una ventana de tiempo.
+
+- Comandos y documentos vienen de app.core.command_accounting. La respuesta
+  de un comando no dice cuántos documentos examinó el servidor (eso solo
+  está en el profiler de MongoDB), así que se cuentan los devueltos y los escritos
+- CPU: solo los pasos de la corrutina del request (cpu_timed); el trabajo
+  de otros requests intercalados no se le suma
+"""
+import asyncio
+import contextvars
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.crud.usage_stats import UsageStatsCRUD
+
+logger = logging.getLogger(__name__)
+
+UsageKey = Tuple[str, datetime, str, str]
+
+
+class _CPUTimed:
+    """
+    Awaitable que ejecuta una corrutina midiendo el CPU de cada uno de sus
+    pasos (entre un await que suspende y el siguiente)
+    """
+
+    def __init__(self, coroutine):
+        self.coroutine = coroutine
+        self.cpu_seconds = 0.0
+
+    def __await__(self):
+        send_value, error = None, None
+        while True:
+            start = time.thread_time()
+            try:
+                if error is not None:
+                    yielded = self.coroutine.throw(error)
+                else:
+                    yielded = self.coroutine.send(send_value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.cpu_seconds += time.thread_time() - start
+
+            try:
+                send_value, error = (yield yielded), None
+            except BaseException as e:
+                send_value, error = None, e
+
+
+def cpu_timed(coroutine) -> _CPUTimed:
+    return _CPUTimed(coroutine)
+
+
+def _hour_bucket(now: datetime) -> datetime:
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+class UsageAggregator:
+    def __init__(self):
+        self.totals: Dict[UsageKey, Dict[str, float]] = {}
+
+    def record(self, user_id: str, route: str, method: str, stats, cpu_seconds: float) -> None:
+        key = (user_id, _hour_bucket(datetime.utcnow()), route, method)
+        counters = self.totals.get(key)
+        if counters is None:
+            counters = self.totals[key] = {
+                "requests": 0, "commands": 0, "docs_returned": 0, "docs_written": 0, "db_ms": 0.0, "cpu_ms": 0.0
+            }
+        counters["requests"] += 1
+        counters["commands"] += stats.count
+        counters["docs_returned"] += stats.docs_returned
+        counters["docs_written"] += stats.docs_written
+        counters["db_ms"] += stats.duration_ms
+        counters["cpu_ms"] += cpu_seconds * 1000
+
+    def take(self) -> Dict[UsageKey, Dict[str, float]]:
+        totals, self.totals = self.totals, {}
+        return totals
+
+
+aggregator = UsageAggregator()
+
+
+async def flush(db) -> None:
+    """
+    Sumar lo acumulado en usage_stats (si falla, se reintenta en el próximo flush)
+    """
+    totals = aggregator.take()
+    try:
+        await UsageStatsCRUD(db).increment_many(totals)
+    except Exception:
+        logger.exception("No se pudo guardar el consumo por usuario; se reintenta en el próximo flush")
+        for key, counters in totals.items():
+            pending = aggregator.totals.setdefault(key, dict.fromkeys(counters, 0))
+            for field, value in counters.items():
+                pending[field] += value
+
+
+async def _flush_periodically(db) -> None:
+    while True:
+        await asyncio.sleep(settings.USAGE_FLUSH_SECONDS)
+        await flush(db)
+
+
+_task: Optional[asyncio.Task] = None
+
+
+def start_usage_flush(db) -> None:
+    """
+    Iniciar el flush periódico (llamar desde el lifespan)
+    """
+    global _task
+    if settings.USAGE_ACCOUNTING_ENABLED and _task is None:
+        # Contexto vacío: las escrituras del flush no se atribuyen a ningún request
+        _task = asyncio.create_task(_flush_periodically(db), context=contextvars.Context())
+
+
+async def stop_usage_flush(db) -> None:
+    """
+    Detener el flush periódico y guardar lo pendiente
+    """
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
+    await flush(db)
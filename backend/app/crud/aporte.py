@@ -1,8 +1,17 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-
+from pymongo import DeleteOne, InsertOne, UpdateOne
+
+from app.core import unit_of_work
+from app.core.query_budget import budgeted, max_time_ms, AGGREGATE, READ, WRITE
+from app.core.query_tags import tagged_collection
+from app.core.tracing import traced
+from app.crud.bulk_write import BulkEntry, BulkOutcome, write_ordered
+from app.crud.data_version import DataVersionCRUD
+from app.crud.deletion_log import DeletionLogCRUD
+from app.crud.document_layout import to_storage, from_storage, storage_projection, changed_since_filter
 from app.models.aporte import (
     AporteCreate,
     AporteUpdate,
@@ -10,6 +19,7 @@ from app.models.aporte import (
 )
 
 
+@traced
 class AporteCRUD:
     """
     CRUD operations para Aportes según LOGICA_SISTEMA.md
@@ -21,7 +31,16 @@ class AporteCRUD:
     """
 
     def __init__(self, db: AsyncIOMotorDatabase):
-        self.collection = db["aportes"]
+        self.collection = tagged_collection(db["aportes"])
+        self.versions = DataVersionCRUD(db)
+        self.deletions = DeletionLogCRUD(db)
+
+    @staticmethod
+    def _to_model(document: dict) -> AporteInDB:
+        """
+        Convertir un documento compacto de MongoDB al modelo completo
+        """
+        return AporteInDB(**from_storage(document))
 
     async def create(self, user_id: str, periodo_id: str, aporte: AporteCreate) -> AporteInDB:
         """
@@ -30,25 +49,31 @@ class AporteCRUD:
         aporte_dict = aporte.model_dump(exclude_none=True)
         aporte_dict["user_id"] = ObjectId(user_id)
         aporte_dict["periodo_id"] = ObjectId(periodo_id)
-        aporte_dict["fecha_registro"] = datetime.utcnow()
-        aporte_dict["created_at"] = datetime.utcnow()
-        aporte_dict["updated_at"] = datetime.utcnow()
+        # Invariante de almacenamiento: categoria_id siempre como ObjectId
+        aporte_dict["categoria_id"] = ObjectId(aporte.categoria_id)
+        aporte_dict = to_storage(aporte_dict)
 
         result = await self.collection.insert_one(aporte_dict)
         aporte_dict["_id"] = result.inserted_id
+        unit_of_work.remember(self.collection, aporte_dict)
+        await self.versions.bump(user_id, periodo_id)
 
-        return AporteInDB(**aporte_dict)
+        return self._to_model(aporte_dict)
 
+    @budgeted
     async def get_by_id(self, user_id: str, aporte_id: str) -> Optional[AporteInDB]:
         """
         Obtener aporte por ID
         """
-        aporte = await self.collection.find_one({
-            "_id": ObjectId(aporte_id),
-            "user_id": ObjectId(user_id)
-        })
+        aporte = unit_of_work.lookup(self.collection, aporte_id, user_id)
+        if aporte is None:
+            aporte = await self.collection.find_one({
+                "_id": ObjectId(aporte_id),
+                "user_id": ObjectId(user_id)
+            }, max_time_ms=max_time_ms(READ))
+            unit_of_work.remember(self.collection, aporte)
 
-        return AporteInDB(**aporte) if aporte else None
+        return self._to_model(aporte) if aporte else None
 
     async def get_by_periodo(
         self,
@@ -64,6 +89,30 @@ class AporteCRUD:
         - es_fijo: True para aportes fijos, False para variables
         - categoria_id: ID de la categoría
         """
+        aportes = await self.get_documents_by_periodo(
+            user_id,
+            periodo_id,
+            es_fijo=es_fijo,
+            categoria_id=categoria_id
+        )
+
+        return [AporteInDB(**ap) for ap in aportes]
+
+    @budgeted
+    async def get_documents_by_periodo(
+        self,
+        user_id: str,
+        periodo_id: str,
+        es_fijo: Optional[bool] = None,
+        categoria_id: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """
+        Igual que get_by_periodo, pero retorna los documentos de MongoDB
+        (con los campos derivados completos) sin construir modelos.
+        Lo usan los endpoints de listas para serializar directo a JSON.
+        Con `fields` solo se leen esos campos (proyección).
+        """
         query = {
             "user_id": ObjectId(user_id),
             "periodo_id": ObjectId(periodo_id)
@@ -73,12 +122,30 @@ class AporteCRUD:
             query["es_fijo"] = es_fijo
 
         if categoria_id:
-            query["categoria_id"] = categoria_id  # Comparar como string, no como ObjectId
+            query["categoria_id"] = ObjectId(categoria_id)
 
-        cursor = self.collection.find(query)
+        cursor = self.collection.find(
+            query,
+            storage_projection(fields),
+            max_time_ms=max_time_ms(READ)
+        )
         aportes = await cursor.to_list(length=None)
 
-        return [AporteInDB(**ap) for ap in aportes]
+        return [from_storage(ap) for ap in aportes]
+
+    @budgeted
+    async def get_documents_changed_since(self, user_id: str, since: Optional[datetime]) -> List[dict]:
+        """
+        Documentos creados o editados desde `since` (todos si es None), para GET /sync
+        """
+        query = {"user_id": ObjectId(user_id)}
+        if since is not None:
+            query.update(changed_since_filter(since))
+
+        cursor = self.collection.find(query, max_time_ms=max_time_ms(READ))
+        aportes = await cursor.to_list(length=None)
+
+        return [from_storage(document) for document in aportes]
 
     async def get_by_categoria(
         self,
@@ -106,6 +173,7 @@ class AporteCRUD:
             es_fijo=True
         )
 
+    @budgeted
     async def update(self, user_id: str, aporte_id: str, aporte_update: AporteUpdate) -> Optional[AporteInDB]:
         """
         Actualizar un aporte
@@ -121,28 +189,135 @@ class AporteCRUD:
         result = await self.collection.find_one_and_update(
             {"_id": ObjectId(aporte_id), "user_id": ObjectId(user_id)},
             {"$set": update_data},
-            return_document=True
+            return_document=True,
+            maxTimeMS=max_time_ms(WRITE)
         )
 
-        return AporteInDB(**result) if result else None
+        if not result:
+            return None
+
+        unit_of_work.remember(self.collection, result)
+        await self.versions.bump(user_id, str(result["periodo_id"]))
+        return self._to_model(result)
 
+    @budgeted
     async def delete(self, user_id: str, aporte_id: str) -> bool:
         """
         Eliminar un aporte
         """
-        result = await self.collection.delete_one({
-            "_id": ObjectId(aporte_id),
-            "user_id": ObjectId(user_id)
-        })
+        deleted = await self.collection.find_one_and_delete(
+            {"_id": ObjectId(aporte_id), "user_id": ObjectId(user_id)},
+            projection={"periodo_id": 1},
+            maxTimeMS=max_time_ms(WRITE)
+        )
+
+        if not deleted:
+            return False
+
+        unit_of_work.forget(self.collection, deleted["_id"])
+        await self.deletions.record(user_id, "aportes", [deleted["_id"]])
+        await self.versions.bump(user_id, str(deleted["periodo_id"]))
+        return True
+
+    @budgeted
+    async def get_periodo_ids(self, user_id: str, aporte_ids: List[str]) -> Dict[str, ObjectId]:
+        """
+        Período de cada aporte existente del usuario (aporte_id -> periodo_id), en una consulta
+        """
+        if not aporte_ids:
+            return {}
+
+        cursor = self.collection.find(
+            {"_id": {"$in": [ObjectId(doc_id) for doc_id in aporte_ids]}, "user_id": ObjectId(user_id)},
+            {"periodo_id": 1},
+            max_time_ms=max_time_ms(READ)
+        )
+        return {str(document["_id"]): document["periodo_id"] async for document in cursor}
+
+    @budgeted
+    async def bulk_write(
+        self,
+        user_id: str,
+        creates: List[Tuple[str, AporteCreate]],
+        updates: List[Tuple[str, AporteUpdate]],
+        deletes: List[str],
+        periodo_ids: Dict[str, ObjectId]
+    ) -> BulkOutcome:
+        """
+        Aplicar creaciones, ediciones y eliminaciones con un solo bulk_write ordenado
+
+        `periodo_ids` es el período de cada aporte editado o eliminado (get_periodo_ids),
+        ya validado por el llamador. Si una escritura falla, las anteriores
+        quedan aplicadas (y con su versión y tombstone) y las siguientes no se
+        ejecutan: BulkOutcome.failure indica cuál falló.
+        """
+        entries = []
+        created = []
+
+        for position, (periodo_id, aporte) in enumerate(creates):
+            aporte_dict = aporte.model_dump(exclude_none=True)
+            aporte_dict["_id"] = ObjectId()
+            aporte_dict["user_id"] = ObjectId(user_id)
+            aporte_dict["periodo_id"] = ObjectId(periodo_id)
+            aporte_dict["categoria_id"] = ObjectId(aporte.categoria_id)
+            aporte_dict = to_storage(aporte_dict)
+            entries.append(BulkEntry("create", position, InsertOne(aporte_dict)))
+            created.append(aporte_dict)
+
+        now = datetime.utcnow()
+        for position, (doc_id, aporte_update) in enumerate(updates):
+            update_data = aporte_update.model_dump(exclude_none=True)
+            request = None
+            if update_data:
+                update_data["updated_at"] = now
+                request = UpdateOne(
+                    {"_id": ObjectId(doc_id), "user_id": ObjectId(user_id)},
+                    {"$set": update_data}
+                )
+            entries.append(BulkEntry("update", position, request))
+
+        for position, doc_id in enumerate(deletes):
+            entries.append(BulkEntry("delete", position, DeleteOne({"_id": ObjectId(doc_id), "user_id": ObjectId(user_id)})))
+
+        applied, failure = await write_ordered(self.collection, entries)
+
+        outcome = BulkOutcome(
+            created=[created[entry.position] for entry in applied if entry.op == "create"],
+            deleted=[deletes[entry.position] for entry in applied if entry.op == "delete"],
+            applied={(entry.op, entry.position) for entry in applied},
+            failure=(failure[0].op, failure[0].position, failure[1]) if failure else None
+        )
+        updated_ids = [updates[entry.position][0] for entry in applied if entry.op == "update"]
+
+        if updated_ids:
+            cursor = self.collection.find(
+                {"_id": {"$in": [ObjectId(doc_id) for doc_id in updated_ids]}, "user_id": ObjectId(user_id)},
+                max_time_ms=max_time_ms(READ)
+            )
+            outcome.updated = await cursor.to_list(length=None)
+
+        for document in outcome.created + outcome.updated:
+            unit_of_work.remember(self.collection, document)
+        for doc_id in outcome.deleted:
+            unit_of_work.forget(self.collection, doc_id)
+
+        touched_periods = {document["periodo_id"] for document in outcome.created}
+        touched_periods.update(periodo_ids[doc_id] for doc_id in updated_ids + outcome.deleted)
+
+        await self.deletions.record(user_id, "aportes", [ObjectId(doc_id) for doc_id in outcome.deleted])
+        await self.versions.bump(user_id, periodo_ids=[str(periodo_id) for periodo_id in touched_periods])
 
-        return result.deleted_count > 0
+        outcome.created = [from_storage(dict(document)) for document in outcome.created]
+        outcome.updated = [from_storage(document) for document in outcome.updated]
+        return outcome
 
+    @budgeted
     async def calculate_total_by_categoria(
         self,
         user_id: str,
         periodo_id: str,
         categoria_id: str
-    ) -> float:
+    ) -> int:
         """
         Calcular el total de aportes de una categoría en un período
         Este valor se RESTA del total de gastos
@@ -152,7 +327,7 @@ class AporteCRUD:
                 "$match": {
                     "user_id": ObjectId(user_id),
                     "periodo_id": ObjectId(periodo_id),
-                    "categoria_id": categoria_id  # Comparar como string, no como ObjectId
+                    "categoria_id": ObjectId(categoria_id)
                 }
             },
             {
@@ -163,11 +338,12 @@ class AporteCRUD:
             }
         ]
 
-        result = await self.collection.aggregate(pipeline).to_list(length=1)
+        result = await self.collection.aggregate(pipeline, maxTimeMS=max_time_ms(AGGREGATE)).to_list(length=1)
 
-        return result[0]["total"] if result else 0.0
+        return result[0]["total"] if result else 0
 
-    async def calculate_total_periodo(self, user_id: str, periodo_id: str) -> float:
+    @budgeted
+    async def calculate_total_periodo(self, user_id: str, periodo_id: str) -> int:
         """
         Calcular el total de aportes de todo el período
         """
@@ -186,6 +362,6 @@ class AporteCRUD:
             }
         ]
 
-        result = await self.collection.aggregate(pipeline).to_list(length=1)
+        result = await self.collection.aggregate(pipeline, maxTimeMS=max_time_ms(AGGREGATE)).to_list(length=1)
 
-        return result[0]["total"] if result else 0.0
+        return result[0]["total"] if result else 0
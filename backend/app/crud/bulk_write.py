@@ -0,0 +1,58 @@
+"""
+bulk_write ordenado con resultado por operación (bulk de expenses y aportes).
+
+Con ordered=True MongoDB aplica las operaciones en orden y se detiene en la
+primera que falla: lo anterior queda escrito y lo posterior no se ejecuta.
+write_ordered traduce el BulkWriteError a esa frontera para que el CRUD
+registre versiones y tombstones justo de lo que sí se aplicó.
+"""
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Set, Tuple
+
+from pymongo.errors import BulkWriteError
+
+
+@dataclass
+class BulkEntry:
+    """
+    Una operación del request: tipo, posición entre las de su tipo y la
+    escritura (None si no hay nada que escribir, ej: una edición vacía)
+    """
+    op: str
+    position: int
+    request: Any = None
+
+
+@dataclass
+class BulkOutcome:
+    created: List[dict] = field(default_factory=list)
+    updated: List[dict] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    # (tipo, posición) de las operaciones aplicadas
+    applied: Set[Tuple[str, int]] = field(default_factory=set)
+    # Operación que falló, (tipo, posición, mensaje); las que no están en applied no se ejecutaron
+    failure: Optional[Tuple[str, int, str]] = None
+
+
+async def write_ordered(collection, entries: List[BulkEntry]) -> Tuple[List[BulkEntry], Optional[Tuple[BulkEntry, str]]]:
+    """
+    Aplicar las escrituras en orden; retorna las entradas aplicadas y, si
+    alguna falló, (entrada, mensaje de MongoDB)
+    """
+    requests = [entry.request for entry in entries if entry.request is not None]
+    remaining, message = len(requests), None
+    if requests:
+        try:
+            await collection.bulk_write(requests, ordered=True)
+        except BulkWriteError as e:
+            write_error = e.details["writeErrors"][0]
+            remaining, message = write_error["index"], write_error.get("errmsg", str(e))
+
+    applied = []
+    for entry in entries:
+        if entry.request is not None:
+            if message is not None and remaining == 0:
+                return applied, (entry, message)
+            remaining -= 1
+        applied.append(entry)
+    return applied, None
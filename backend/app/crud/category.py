@@ -3,6 +3,12 @@ from datetime import datetime
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.core import unit_of_work
+from app.core.query_budget import budgeted, max_time_ms, READ, WRITE
+from app.core.query_tags import tagged_collection
+from app.core.tracing import traced
+from app.crud.data_version import DataVersionCRUD
+from app.crud.deletion_log import DeletionLogCRUD
 from app.models.category import (
     CategoryCreate,
     CategoryUpdate,
@@ -12,6 +18,7 @@ from app.models.category import (
 )
 
 
+@traced
 class CategoryCRUD:
     """
     CRUD operations para Categories según LOGICA_SISTEMA.md
@@ -21,7 +28,9 @@ class CategoryCRUD:
     """
 
     def __init__(self, db: AsyncIOMotorDatabase):
-        self.collection = db["categories"]
+        self.collection = tagged_collection(db["categories"])
+        self.versions = DataVersionCRUD(db)
+        self.deletions = DeletionLogCRUD(db)
 
     async def create(self, user_id: str, category: CategoryCreate) -> CategoryInDB:
         """
@@ -34,20 +43,27 @@ class CategoryCRUD:
 
         result = await self.collection.insert_one(category_dict)
         category_dict["_id"] = result.inserted_id
+        unit_of_work.remember(self.collection, category_dict)
+        await self.versions.bump(user_id, categories=True)
 
         return CategoryInDB(**category_dict)
 
+    @budgeted
     async def get_by_id(self, user_id: str, category_id: str) -> Optional[CategoryInDB]:
         """
         Obtener categoría por ID
         """
-        category = await self.collection.find_one({
-            "_id": ObjectId(category_id),
-            "user_id": ObjectId(user_id)
-        })
+        category = unit_of_work.lookup(self.collection, category_id, user_id)
+        if category is None:
+            category = await self.collection.find_one({
+                "_id": ObjectId(category_id),
+                "user_id": ObjectId(user_id)
+            }, max_time_ms=max_time_ms(READ))
+            unit_of_work.remember(self.collection, category)
 
         return CategoryInDB(**category) if category else None
 
+    @budgeted
     async def get_by_slug(self, user_id: str, slug: TipoCategoria) -> Optional[CategoryInDB]:
         """
         Obtener categoría por slug (ahorro, arriendo, credito, liquidez)
@@ -55,20 +71,34 @@ class CategoryCRUD:
         category = await self.collection.find_one({
             "slug": slug,
             "user_id": ObjectId(user_id)
-        })
+        }, max_time_ms=max_time_ms(READ))
 
         return CategoryInDB(**category) if category else None
 
+    @budgeted
     async def get_all(self, user_id: str) -> List[CategoryInDB]:
         """
         Obtener todas las categorías del usuario
         Deberían ser siempre 4 (las fijas del sistema)
         """
-        cursor = self.collection.find({"user_id": ObjectId(user_id)})
+        cursor = self.collection.find({"user_id": ObjectId(user_id)}, max_time_ms=max_time_ms(READ))
         categories = await cursor.to_list(length=None)
 
         return [CategoryInDB(**cat) for cat in categories]
 
+    @budgeted
+    async def get_documents_changed_since(self, user_id: str, since: Optional[datetime]) -> List[dict]:
+        """
+        Documentos creados o editados desde `since` (todos si es None), para GET /sync
+        """
+        query = {"user_id": ObjectId(user_id)}
+        if since is not None:
+            query["updated_at"] = {"$gte": since}
+
+        cursor = self.collection.find(query, max_time_ms=max_time_ms(READ))
+        return await cursor.to_list(length=None)
+
+    @budgeted
     async def update(self, user_id: str, category_id: str, category_update: CategoryUpdate) -> Optional[CategoryInDB]:
         """
         Actualizar una categoría
@@ -84,10 +114,16 @@ class CategoryCRUD:
         result = await self.collection.find_one_and_update(
             {"_id": ObjectId(category_id), "user_id": ObjectId(user_id)},
             {"$set": update_data},
-            return_document=True
+            return_document=True,
+            maxTimeMS=max_time_ms(WRITE)
         )
 
-        return CategoryInDB(**result) if result else None
+        if not result:
+            return None
+
+        unit_of_work.remember(self.collection, result)
+        await self.versions.bump(user_id, categories=True)
+        return CategoryInDB(**result)
 
     async def delete(self, user_id: str, category_id: str) -> bool:
         """
@@ -99,7 +135,13 @@ class CategoryCRUD:
             "user_id": ObjectId(user_id)
         })
 
-        return result.deleted_count > 0
+        if result.deleted_count == 0:
+            return False
+
+        unit_of_work.forget(self.collection, category_id)
+        await self.deletions.record(user_id, "categories", [ObjectId(category_id)])
+        await self.versions.bump(user_id, categories=True)
+        return True
 
     async def init_default_categories(self, user_id: str) -> List[CategoryInDB]:
         """
@@ -135,6 +177,7 @@ class CategoryCRUD:
 
             created_categories.append(CategoryInDB(**category_dict))
 
+        await self.versions.bump(user_id, categories=True)
         return created_categories
 
     async def check_and_init_if_needed(self, user_id: str) -> List[CategoryInDB]:
@@ -147,6 +190,9 @@ class CategoryCRUD:
         if len(categories) < 4:
             # Falta alguna categoría, inicializar todas
             await self.collection.delete_many({"user_id": ObjectId(user_id)})
+            for category in categories:
+                unit_of_work.forget(self.collection, category.id)
+            await self.deletions.record(user_id, "categories", [ObjectId(category.id) for category in categories])
             categories = await self.init_default_categories(user_id)
 
         return categories
@@ -0,0 +1,102 @@
+from typing import Iterable, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core import live_updates
+from app.core.unit_of_work import current_unit_of_work
+from app.core.query_budget import budgeted, max_time_ms, READ
+from app.core.query_tags import tagged_collection
+from app.core.tracing import traced
+
+
+@traced
+class DataVersionCRUD:
+    """
+    Versiones de datos por usuario, base de los ETags de las lecturas
+
+    Un documento por usuario (_id = user_id):
+    - version: cualquier escritura del usuario (períodos, gastos, aportes, categorías)
+    - periods.<periodo_id>: escrituras al período o a sus gastos y aportes
+    - categories: escrituras a las categorías
+
+    Los contadores solo crecen; el valor exacto no importa, solo que cambie.
+    Dentro de un request los incrementos se acumulan en el UnitOfWork y se
+    aplican en una sola escritura antes de responder.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = tagged_collection(db["data_versions"])
+
+    @budgeted
+    async def bump(
+        self,
+        user_id: str,
+        periodo_id: Optional[str] = None,
+        categories: bool = False,
+        periodo_ids: Iterable[str] = ()
+    ) -> None:
+        """
+        Incrementar la versión del usuario (y la del período o categorías si aplica)
+        y despertar su canal de resumen en vivo en este worker.
+        `periodo_ids` incrementa varios períodos en la misma escritura (operaciones bulk).
+        """
+        increments = {"version": 1}
+        if periodo_id:
+            increments[f"periods.{periodo_id}"] = 1
+        for other_periodo_id in periodo_ids:
+            increments[f"periods.{other_periodo_id}"] = 1
+        if categories:
+            increments["categories"] = 1
+
+        unit_of_work = current_unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.increment(self.collection, ObjectId(user_id), increments)
+            unit_of_work.after_flush(lambda: live_updates.notify(user_id))
+            return
+
+        await self.collection.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$inc": increments},
+            upsert=True
+        )
+        live_updates.notify(user_id)
+
+    @budgeted
+    async def get(self, user_id: str) -> dict:
+        """
+        Obtener las versiones del usuario ({} si todavía no escribió nada),
+        incluidos los incrementos pendientes del request
+        """
+        document = await self.collection.find_one(
+            {"_id": ObjectId(user_id)},
+            max_time_ms=max_time_ms(READ)
+        ) or {}
+
+        unit_of_work = current_unit_of_work()
+        pending = unit_of_work.pending_increments(self.collection, ObjectId(user_id)) if unit_of_work else {}
+        for field, amount in pending.items():
+            if field.startswith("periods."):
+                periods = document.setdefault("periods", {})
+                periodo_id = field.split(".", 1)[1]
+                periods[periodo_id] = periods.get(periodo_id, 0) + amount
+            else:
+                document[field] = document.get(field, 0) + amount
+
+        return document
+
+    async def get_version(
+        self,
+        user_id: str,
+        periodo_id: Optional[str] = None,
+        categories: bool = False
+    ) -> int:
+        """
+        Versión de un alcance: período, categorías o (por defecto) todo el usuario
+        """
+        document = await self.get(user_id)
+
+        if periodo_id:
+            return document.get("periods", {}).get(periodo_id, 0)
+        if categories:
+            return document.get("categories", 0)
+        return document.get("version", 0)
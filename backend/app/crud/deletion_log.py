@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.query_budget import budgeted, max_time_ms, READ
+from app.core.query_tags import tagged_collection
+from app.core.tracing import traced
+from app.core.unit_of_work import current_unit_of_work
+
+
+@traced
+class DeletionLogCRUD:
+    """
+    Registro de eliminaciones (tombstones) para GET /sync
+
+    Un documento por documento eliminado:
+    {user_id, collection, doc_id, deleted_at}
+
+    Los registros expiran solos (índice TTL sobre deleted_at, ver
+    app.core.indexes); un cliente con un token más antiguo que la retención
+    recibe una sincronización completa.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = tagged_collection(db["deletions"])
+
+    @budgeted
+    async def record(self, user_id: str, collection: str, doc_ids: List[ObjectId]) -> None:
+        """
+        Registrar la eliminación de uno o más documentos de una colección
+        """
+        if not doc_ids:
+            return
+
+        deleted_at = datetime.utcnow()
+        documents = [
+            {
+                "user_id": ObjectId(user_id),
+                "collection": collection,
+                "doc_id": doc_id,
+                "deleted_at": deleted_at
+            }
+            for doc_id in doc_ids
+        ]
+
+        # Dentro de un request se insertan junto con las demás escrituras pendientes
+        unit_of_work = current_unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.insert(self.collection, documents)
+            return
+
+        await self.collection.insert_many(documents, ordered=False)
+
+    @budgeted
+    async def get_since(self, user_id: str, since: Optional[datetime]) -> Dict[str, List[ObjectId]]:
+        """
+        IDs eliminados desde `since` agrupados por colección ({} si since es None)
+        """
+        if since is None:
+            return {}
+
+        cursor = self.collection.find(
+            {"user_id": ObjectId(user_id), "deleted_at": {"$gte": since}},
+            {"_id": 0, "collection": 1, "doc_id": 1},
+            max_time_ms=max_time_ms(READ)
+        )
+
+        deleted: Dict[str, List[ObjectId]] = {}
+        async for document in cursor:
+            deleted.setdefault(document["collection"], []).append(document["doc_id"])
+        return deleted
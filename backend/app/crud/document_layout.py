@@ -0,0 +1,74 @@
+"""
+Formato compacto en disco para gastos y aportes.
+
+Al guardar:
+- No se almacenan fecha_registro ni created_at: se derivan del ObjectId (_id)
+- updated_at se omite hasta la primera edición
+- Los opcionales nulos (es_permanente, periodos_restantes, descripcion) no se guardan
+
+Al leer, from_storage reconstruye esos campos para que los modelos de la API
+(ExpenseInDB, AporteInDB y sus Response) no cambien.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+# Campos que se derivan al leer y nunca se escriben en la creación
+DERIVED_FIELDS = ("fecha_registro", "created_at", "updated_at")
+
+
+def to_storage(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Preparar un documento nuevo para insertar: sin nulos ni timestamps derivables
+    """
+    return {
+        key: value
+        for key, value in document.items()
+        if value is not None and key not in DERIVED_FIELDS
+    }
+
+
+def from_storage(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Completar los campos derivados de un documento leído de MongoDB.
+    Los documentos antiguos que aún traen los campos explícitos se respetan.
+    """
+    created_at = document["_id"].generation_time.replace(tzinfo=None)
+    document.setdefault("created_at", created_at)
+    document.setdefault("fecha_registro", document["created_at"])
+    document.setdefault("updated_at", document["created_at"])
+    return document
+
+
+def storage_projection(fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+    """
+    Proyección de MongoDB para un subconjunto de campos de salida.
+
+    _id siempre se lee (de él se derivan los timestamps) y los campos derivados
+    también piden created_at, que los documentos antiguos aún guardan explícito.
+    """
+    if not fields:
+        return None
+
+    projection = {field: 1 for field in fields}
+    if any(field in DERIVED_FIELDS for field in fields):
+        projection["created_at"] = 1
+    projection.pop("_id", None)
+    return projection
+
+
+def changed_since_filter(since: datetime) -> Dict[str, Any]:
+    """
+    Filtro de documentos creados o editados desde `since`.
+
+    Sin updated_at (nunca editado) la fecha de creación sale del _id: el
+    ObjectId mínimo de ese segundo cubre los creados desde `since`.
+    Lo sirve el índice (user_id, updated_at, _id).
+    """
+    return {
+        "$or": [
+            {"updated_at": {"$gte": since}},
+            {"updated_at": None, "_id": {"$gte": ObjectId.from_datetime(since)}}
+        ]
+    }
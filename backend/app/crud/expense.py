@@ -1,8 +1,18 @@
-from typing import List, Optional
+import logging
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-
+from pymongo import DeleteOne, InsertOne, UpdateOne
+
+from app.core import unit_of_work
+from app.core.query_budget import budgeted, max_time_ms, AGGREGATE, READ, WRITE
+from app.core.query_tags import tagged_collection
+from app.core.tracing import traced
+from app.crud.bulk_write import BulkEntry, BulkOutcome, write_ordered
+from app.crud.data_version import DataVersionCRUD
+from app.crud.deletion_log import DeletionLogCRUD
+from app.crud.document_layout import to_storage, from_storage, storage_projection, changed_since_filter
 from app.models.expense import (
     ExpenseCreate,
     ExpenseUpdate,
@@ -10,7 +20,10 @@ from app.models.expense import (
     TipoGasto
 )
 
+logger = logging.getLogger(__name__)
+
 
+@traced
 class ExpenseCRUD:
     """
     CRUD operations para Expenses según LOGICA_SISTEMA.md
@@ -19,7 +32,16 @@ class ExpenseCRUD:
     """
 
     def __init__(self, db: AsyncIOMotorDatabase):
-        self.collection = db["expenses"]
+        self.collection = tagged_collection(db["expenses"])
+        self.versions = DataVersionCRUD(db)
+        self.deletions = DeletionLogCRUD(db)
+
+    @staticmethod
+    def _to_model(document: dict) -> ExpenseInDB:
+        """
+        Convertir un documento compacto de MongoDB al modelo completo
+        """
+        return ExpenseInDB(**from_storage(document))
 
     async def create(self, user_id: str, periodo_id: str, expense: ExpenseCreate) -> ExpenseInDB:
         """
@@ -28,25 +50,31 @@ class ExpenseCRUD:
         expense_dict = expense.model_dump(exclude_none=True)
         expense_dict["user_id"] = ObjectId(user_id)
         expense_dict["periodo_id"] = ObjectId(periodo_id)
-        expense_dict["fecha_registro"] = datetime.utcnow()
-        expense_dict["created_at"] = datetime.utcnow()
-        expense_dict["updated_at"] = datetime.utcnow()
+        # Invariante de almacenamiento: categoria_id siempre como ObjectId
+        expense_dict["categoria_id"] = ObjectId(expense.categoria_id)
+        expense_dict = to_storage(expense_dict)
 
         result = await self.collection.insert_one(expense_dict)
         expense_dict["_id"] = result.inserted_id
+        unit_of_work.remember(self.collection, expense_dict)
+        await self.versions.bump(user_id, periodo_id)
 
-        return ExpenseInDB(**expense_dict)
+        return self._to_model(expense_dict)
 
+    @budgeted
     async def get_by_id(self, user_id: str, expense_id: str) -> Optional[ExpenseInDB]:
         """
         Obtener gasto por ID
         """
-        expense = await self.collection.find_one({
-            "_id": ObjectId(expense_id),
-            "user_id": ObjectId(user_id)
-        })
+        expense = unit_of_work.lookup(self.collection, expense_id, user_id)
+        if expense is None:
+            expense = await self.collection.find_one({
+                "_id": ObjectId(expense_id),
+                "user_id": ObjectId(user_id)
+            }, max_time_ms=max_time_ms(READ))
+            unit_of_work.remember(self.collection, expense)
 
-        return ExpenseInDB(**expense) if expense else None
+        return self._to_model(expense) if expense else None
 
     async def get_by_periodo(
         self,
@@ -62,6 +90,30 @@ class ExpenseCRUD:
         - tipo: TipoGasto.FIJO o TipoGasto.VARIABLE
         - categoria_id: ID de la categoría
         """
+        expenses = await self.get_documents_by_periodo(
+            user_id,
+            periodo_id,
+            tipo=tipo,
+            categoria_id=categoria_id
+        )
+
+        return [ExpenseInDB(**exp) for exp in expenses]
+
+    @budgeted
+    async def get_documents_by_periodo(
+        self,
+        user_id: str,
+        periodo_id: str,
+        tipo: Optional[TipoGasto] = None,
+        categoria_id: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """
+        Igual que get_by_periodo, pero retorna los documentos de MongoDB
+        (con los campos derivados completos) sin construir modelos.
+        Lo usan los endpoints de listas para serializar directo a JSON.
+        Con `fields` solo se leen esos campos (proyección).
+        """
         query = {
             "user_id": ObjectId(user_id),
             "periodo_id": ObjectId(periodo_id)
@@ -71,12 +123,30 @@ class ExpenseCRUD:
             query["tipo"] = tipo
 
         if categoria_id:
-            query["categoria_id"] = categoria_id  # Comparar como string, no como ObjectId
+            query["categoria_id"] = ObjectId(categoria_id)
 
-        cursor = self.collection.find(query)
+        cursor = self.collection.find(
+            query,
+            storage_projection(fields),
+            max_time_ms=max_time_ms(READ)
+        )
         expenses = await cursor.to_list(length=None)
 
-        return [ExpenseInDB(**exp) for exp in expenses]
+        return [from_storage(exp) for exp in expenses]
+
+    @budgeted
+    async def get_documents_changed_since(self, user_id: str, since: Optional[datetime]) -> List[dict]:
+        """
+        Documentos creados o editados desde `since` (todos si es None), para GET /sync
+        """
+        query = {"user_id": ObjectId(user_id)}
+        if since is not None:
+            query.update(changed_since_filter(since))
+
+        cursor = self.collection.find(query, max_time_ms=max_time_ms(READ))
+        expenses = await cursor.to_list(length=None)
+
+        return [from_storage(document) for document in expenses]
 
     async def get_by_categoria(
         self,
@@ -93,6 +163,7 @@ class ExpenseCRUD:
             categoria_id=categoria_id
         )
 
+    @budgeted
     async def get_fijos_permanentes(self, user_id: str, periodo_id: str) -> List[ExpenseInDB]:
         """
         Obtener todos los gastos fijos permanentes de un período
@@ -103,11 +174,12 @@ class ExpenseCRUD:
             "periodo_id": ObjectId(periodo_id),
             "tipo": TipoGasto.FIJO,
             "es_permanente": True
-        })
+        }, max_time_ms=max_time_ms(READ))
         expenses = await cursor.to_list(length=None)
 
-        return [ExpenseInDB(**exp) for exp in expenses]
+        return [self._to_model(exp) for exp in expenses]
 
+    @budgeted
     async def get_fijos_temporales_activos(self, user_id: str, periodo_id: str) -> List[ExpenseInDB]:
         """
         Obtener todos los gastos fijos temporales con períodos restantes > 0
@@ -119,11 +191,12 @@ class ExpenseCRUD:
             "tipo": TipoGasto.FIJO,
             "es_permanente": False,
             "periodos_restantes": {"$gt": 0}
-        })
+        }, max_time_ms=max_time_ms(READ))
         expenses = await cursor.to_list(length=None)
 
-        return [ExpenseInDB(**exp) for exp in expenses]
+        return [self._to_model(exp) for exp in expenses]
 
+    @budgeted
     async def update(self, user_id: str, expense_id: str, expense_update: ExpenseUpdate) -> Optional[ExpenseInDB]:
         """
         Actualizar un gasto
@@ -139,50 +212,145 @@ class ExpenseCRUD:
         result = await self.collection.find_one_and_update(
             {"_id": ObjectId(expense_id), "user_id": ObjectId(user_id)},
             {"$set": update_data},
-            return_document=True
+            return_document=True,
+            maxTimeMS=max_time_ms(WRITE)
         )
 
-        return ExpenseInDB(**result) if result else None
+        if not result:
+            return None
 
+        unit_of_work.remember(self.collection, result)
+        await self.versions.bump(user_id, str(result["periodo_id"]))
+        return self._to_model(result)
+
+    @budgeted
     async def delete(self, user_id: str, expense_id: str) -> bool:
         """
         Eliminar un gasto
         """
-        result = await self.collection.delete_one({
-            "_id": ObjectId(expense_id),
-            "user_id": ObjectId(user_id)
-        })
+        deleted = await self.collection.find_one_and_delete(
+            {"_id": ObjectId(expense_id), "user_id": ObjectId(user_id)},
+            projection={"periodo_id": 1},
+            maxTimeMS=max_time_ms(WRITE)
+        )
+
+        if not deleted:
+            return False
+
+        unit_of_work.forget(self.collection, deleted["_id"])
+        await self.deletions.record(user_id, "expenses", [deleted["_id"]])
+        await self.versions.bump(user_id, str(deleted["periodo_id"]))
+        return True
+
+    @budgeted
+    async def get_periodo_ids(self, user_id: str, expense_ids: List[str]) -> Dict[str, ObjectId]:
+        """
+        Período de cada gasto existente del usuario (expense_id -> periodo_id), en una consulta
+        """
+        if not expense_ids:
+            return {}
+
+        cursor = self.collection.find(
+            {"_id": {"$in": [ObjectId(doc_id) for doc_id in expense_ids]}, "user_id": ObjectId(user_id)},
+            {"periodo_id": 1},
+            max_time_ms=max_time_ms(READ)
+        )
+        return {str(document["_id"]): document["periodo_id"] async for document in cursor}
+
+    @budgeted
+    async def bulk_write(
+        self,
+        user_id: str,
+        creates: List[Tuple[str, ExpenseCreate]],
+        updates: List[Tuple[str, ExpenseUpdate]],
+        deletes: List[str],
+        periodo_ids: Dict[str, ObjectId]
+    ) -> BulkOutcome:
+        """
+        Aplicar creaciones, ediciones y eliminaciones con un solo bulk_write ordenado
+
+        `periodo_ids` es el período de cada expense editado o eliminado (get_periodo_ids),
+        ya validado por el llamador. Si una escritura falla, las anteriores
+        quedan aplicadas (y con su versión y tombstone) y las siguientes no se
+        ejecutan: BulkOutcome.failure indica cuál falló.
+        """
+        entries = []
+        created = []
+
+        for position, (periodo_id, expense) in enumerate(creates):
+            expense_dict = expense.model_dump(exclude_none=True)
+            expense_dict["_id"] = ObjectId()
+            expense_dict["user_id"] = ObjectId(user_id)
+            expense_dict["periodo_id"] = ObjectId(periodo_id)
+            expense_dict["categoria_id"] = ObjectId(expense.categoria_id)
+            expense_dict = to_storage(expense_dict)
+            entries.append(BulkEntry("create", position, InsertOne(expense_dict)))
+            created.append(expense_dict)
+
+        now = datetime.utcnow()
+        for position, (doc_id, expense_update) in enumerate(updates):
+            update_data = expense_update.model_dump(exclude_none=True)
+            request = None
+            if update_data:
+                update_data["updated_at"] = now
+                request = UpdateOne(
+                    {"_id": ObjectId(doc_id), "user_id": ObjectId(user_id)},
+                    {"$set": update_data}
+                )
+            entries.append(BulkEntry("update", position, request))
+
+        for position, doc_id in enumerate(deletes):
+            entries.append(BulkEntry("delete", position, DeleteOne({"_id": ObjectId(doc_id), "user_id": ObjectId(user_id)})))
+
+        applied, failure = await write_ordered(self.collection, entries)
+
+        outcome = BulkOutcome(
+            created=[created[entry.position] for entry in applied if entry.op == "create"],
+            deleted=[deletes[entry.position] for entry in applied if entry.op == "delete"],
+            applied={(entry.op, entry.position) for entry in applied},
+            failure=(failure[0].op, failure[0].position, failure[1]) if failure else None
+        )
+        updated_ids = [updates[entry.position][0] for entry in applied if entry.op == "update"]
+
+        if updated_ids:
+            cursor = self.collection.find(
+                {"_id": {"$in": [ObjectId(doc_id) for doc_id in updated_ids]}, "user_id": ObjectId(user_id)},
+                max_time_ms=max_time_ms(READ)
+            )
+            outcome.updated = await cursor.to_list(length=None)
+
+        for document in outcome.created + outcome.updated:
+            unit_of_work.remember(self.collection, document)
+        for doc_id in outcome.deleted:
+            unit_of_work.forget(self.collection, doc_id)
+
+        touched_periods = {document["periodo_id"] for document in outcome.created}
+        touched_periods.update(periodo_ids[doc_id] for doc_id in updated_ids + outcome.deleted)
 
-        return result.deleted_count > 0
+        await self.deletions.record(user_id, "expenses", [ObjectId(doc_id) for doc_id in outcome.deleted])
+        await self.versions.bump(user_id, periodo_ids=[str(periodo_id) for periodo_id in touched_periods])
 
+        outcome.created = [from_storage(dict(document)) for document in outcome.created]
+        outcome.updated = [from_storage(document) for document in outcome.updated]
+        return outcome
+
+    @budgeted
     async def calculate_total_by_categoria(
         self,
         user_id: str,
         periodo_id: str,
         categoria_id: str
-    ) -> float:
+    ) -> int:
         """
         Calcular el total de gastos de una categoría en un período
         Suma de todos los gastos (fijos + variables)
         """
-        # DEBUG: Log de búsqueda
-        print(f"DEBUG EXPENSE: Buscando gastos con user_id={user_id}, periodo_id={periodo_id}, categoria_id={categoria_id}")
-
-        # Primero verificar cuántos gastos hay en total para este período
-        total_count = await self.collection.count_documents({"periodo_id": ObjectId(periodo_id)})
-        print(f"DEBUG EXPENSE: Total gastos en periodo {periodo_id}: {total_count}")
-
-        # Ver un ejemplo de gasto para comparar
-        sample = await self.collection.find_one({"periodo_id": ObjectId(periodo_id)})
-        if sample:
-            print(f"DEBUG EXPENSE: Ejemplo de gasto: user_id={sample.get('user_id')} (tipo: {type(sample.get('user_id'))}), categoria_id={sample.get('categoria_id')} (tipo: {type(sample.get('categoria_id'))}), monto={sample.get('monto')}")
-
         pipeline = [
             {
                 "$match": {
                     "user_id": ObjectId(user_id),
                     "periodo_id": ObjectId(periodo_id),
-                    "categoria_id": categoria_id  # Comparar como string, no como ObjectId
+                    "categoria_id": ObjectId(categoria_id)
                 }
             },
             {
@@ -193,13 +361,15 @@ class ExpenseCRUD:
             }
         ]
 
-        result = await self.collection.aggregate(pipeline).to_list(length=1)
-
-        print(f"DEBUG EXPENSE: Resultado agregación: {result}")
+        result = await self.collection.aggregate(pipeline, maxTimeMS=max_time_ms(AGGREGATE)).to_list(length=1)
+        logger.debug(
+            "Total de gastos: periodo_id=%s categoria_id=%s resultado=%s", periodo_id, categoria_id, result
+        )
 
-        return result[0]["total"] if result else 0.0
+        return result[0]["total"] if result else 0
 
-    async def calculate_total_periodo(self, user_id: str, periodo_id: str) -> float:
+    @budgeted
+    async def calculate_total_periodo(self, user_id: str, periodo_id: str) -> int:
         """
         Calcular el total de gastos de todo el período
         (Útil para períodos de crédito -> total_gastado)
@@ -219,6 +389,6 @@ class ExpenseCRUD:
             }
         ]
 
-        result = await self.collection.aggregate(pipeline).to_list(length=1)
+        result = await self.collection.aggregate(pipeline, maxTimeMS=max_time_ms(AGGREGATE)).to_list(length=1)
 
-        return result[0]["total"] if result else 0.0
+        return result[0]["total"] if result else 0
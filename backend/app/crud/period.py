@@ -1,9 +1,17 @@
+import logging
 from typing import List, Optional
 from datetime import datetime, timedelta
 from calendar import monthrange
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.core import unit_of_work
+from app.core.metrics import PERIOD_ROLLOVERS
+from app.core.query_budget import budgeted, max_time_ms, READ, WRITE
+from app.core.query_tags import tagged_collection
+from app.core.tracing import traced
+from app.crud.data_version import DataVersionCRUD
+from app.crud.deletion_log import DeletionLogCRUD
 from app.models.period import (
     PeriodCreate,
     PeriodUpdate,
@@ -15,7 +23,10 @@ from app.models.period import (
 from app.models.expense import ExpenseCreate, TipoGasto
 from app.models.aporte import AporteCreate
 
+logger = logging.getLogger(__name__)
 
+
+@traced
 class PeriodCRUD:
     """
     CRUD operations para Periods según LOGICA_SISTEMA.md
@@ -34,10 +45,12 @@ class PeriodCRUD:
         expense_crud=None,
         aporte_crud=None
     ):
-        self.collection = db["periods"]
+        self.collection = tagged_collection(db["periods"])
         self.db = db  # Guardar referencia a la base de datos para acceder a otras colecciones
         self.expense_crud = expense_crud
         self.aporte_crud = aporte_crud
+        self.versions = DataVersionCRUD(db)
+        self.deletions = DeletionLogCRUD(db)
 
     async def create(self, user_id: str, period: PeriodCreate) -> PeriodInDB:
         """
@@ -50,20 +63,27 @@ class PeriodCRUD:
 
         result = await self.collection.insert_one(period_dict)
         period_dict["_id"] = result.inserted_id
+        unit_of_work.remember(self.collection, period_dict)
+        await self.versions.bump(user_id, str(result.inserted_id))
 
         return PeriodInDB(**period_dict)
 
+    @budgeted
     async def get_by_id(self, user_id: str, period_id: str) -> Optional[PeriodInDB]:
         """
         Obtener período por ID
         """
-        period = await self.collection.find_one({
-            "_id": ObjectId(period_id),
-            "user_id": ObjectId(user_id)
-        })
+        period = unit_of_work.lookup(self.collection, period_id, user_id)
+        if period is None:
+            period = await self.collection.find_one({
+                "_id": ObjectId(period_id),
+                "user_id": ObjectId(user_id)
+            }, max_time_ms=max_time_ms(READ))
+            unit_of_work.remember(self.collection, period)
 
         return PeriodInDB(**period) if period else None
 
+    @budgeted
     async def get_active(
         self,
         user_id: str,
@@ -80,7 +100,7 @@ class PeriodCRUD:
             "user_id": ObjectId(user_id),
             "tipo_periodo": tipo_periodo,
             "estado": EstadoPeriodo.ACTIVO
-        })
+        }, max_time_ms=max_time_ms(READ))
 
         if period:
             period_obj = PeriodInDB(**period)
@@ -88,24 +108,26 @@ class PeriodCRUD:
 
             # Auto-cerrar si el período está vencido
             if current_time > period_obj.fecha_fin:
-                print(f"🔄 AUTO-CLOSE: Período {tipo_periodo.value} expirado, cerrando...")
+                logger.info("Período %s expirado, cerrando", tipo_periodo.value)
 
                 # Recalcular total_gastado antes de cerrar (para períodos de crédito)
                 if tipo_periodo == TipoPeriodo.CICLO_CREDITO and self.expense_crud:
                     await self.update_total_gastado(user_id, str(period_obj.id))
-                    print(f"   💰 total_gastado recalculado antes de cerrar")
+                    logger.debug("total_gastado recalculado antes de cerrar el período %s", period_obj.id)
 
                 await self.close_period(user_id, str(period_obj.id))
 
                 # Crear períodos intermedios saltados si es necesario
                 await self._create_skipped_periods(user_id, tipo_periodo, period_obj.fecha_fin, current_time)
 
-                print(f"✨ AUTO-CREATE: Creando nuevo período {tipo_periodo.value}...")
+                logger.info("Creando nuevo período %s", tipo_periodo.value)
+                PERIOD_ROLLOVERS.labels(tipo_periodo=tipo_periodo.value, reason="rollover").inc()
                 return await self._create_current_period(user_id, tipo_periodo)
 
             return period_obj
 
         # No existe período activo, crear uno nuevo
+        PERIOD_ROLLOVERS.labels(tipo_periodo=tipo_periodo.value, reason="initial").inc()
         return await self._create_current_period(user_id, tipo_periodo)
 
     async def get_all(
@@ -117,6 +139,22 @@ class PeriodCRUD:
         """
         Obtener todos los períodos con filtros opcionales
         """
+        periods = await self.get_all_documents(user_id, tipo_periodo=tipo_periodo, estado=estado)
+
+        return [PeriodInDB(**per) for per in periods]
+
+    @budgeted
+    async def get_all_documents(
+        self,
+        user_id: str,
+        tipo_periodo: Optional[TipoPeriodo] = None,
+        estado: Optional[EstadoPeriodo] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """
+        Igual que get_all, pero retorna los documentos de MongoDB sin construir modelos.
+        Con `fields` solo se leen esos campos (proyección).
+        """
         query = {"user_id": ObjectId(user_id)}
 
         if tipo_periodo:
@@ -125,11 +163,49 @@ class PeriodCRUD:
         if estado:
             query["estado"] = estado
 
-        cursor = self.collection.find(query).sort("fecha_inicio", -1)
-        periods = await cursor.to_list(length=None)
+        projection = {field: 1 for field in fields if field != "_id"} if fields else None
+        cursor = self.collection.find(
+            query,
+            projection,
+            max_time_ms=max_time_ms(READ)
+        ).sort("fecha_inicio", -1)
 
-        return [PeriodInDB(**per) for per in periods]
+        return await cursor.to_list(length=None)
 
+    @budgeted
+    async def get_documents_by_ids(
+        self,
+        user_id: str,
+        period_ids: List[str],
+        fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """
+        Documentos de varios períodos del usuario en una consulta (los que no existen se omiten)
+        """
+        if not period_ids:
+            return []
+
+        projection = {field: 1 for field in fields if field != "_id"} if fields else None
+        cursor = self.collection.find(
+            {"_id": {"$in": [ObjectId(period_id) for period_id in period_ids]}, "user_id": ObjectId(user_id)},
+            projection,
+            max_time_ms=max_time_ms(READ)
+        )
+        return await cursor.to_list(length=None)
+
+    @budgeted
+    async def get_documents_changed_since(self, user_id: str, since: Optional[datetime]) -> List[dict]:
+        """
+        Documentos creados o editados desde `since` (todos si es None), para GET /sync
+        """
+        query = {"user_id": ObjectId(user_id)}
+        if since is not None:
+            query["updated_at"] = {"$gte": since}
+
+        cursor = self.collection.find(query, max_time_ms=max_time_ms(READ))
+        return await cursor.to_list(length=None)
+
+    @budgeted
     async def update(self, user_id: str, period_id: str, period_update: PeriodUpdate) -> Optional[PeriodInDB]:
         """
         Actualizar un período
@@ -160,7 +236,7 @@ class PeriodCRUD:
             # Si no existe período cerrado anterior, crear uno con el valor inicial
             if not previous_closed:
                 credito_inicial = update_data['total_gastado']
-                print(f"DEBUG: Creando período de crédito cerrado anterior con total_gastado={credito_inicial}")
+                logger.debug("Creando período de crédito cerrado anterior con total_gastado=%s", credito_inicial)
 
                 # Calcular fechas del período anterior
                 # Si el período actual es del 25 dic - 24 ene,
@@ -183,8 +259,9 @@ class PeriodCRUD:
                     "updated_at": datetime.utcnow()
                 }
 
-                await self.collection.insert_one(previous_period_data)
-                print(f"DEBUG: Período cerrado anterior creado: {fecha_inicio_anterior} - {fecha_fin_anterior}")
+                result = await self.collection.insert_one(previous_period_data)
+                await self.versions.bump(user_id, str(result.inserted_id))
+                logger.debug("Período cerrado anterior creado: %s - %s", fecha_inicio_anterior, fecha_fin_anterior)
 
                 # Ahora resetear el total_gastado del período actual a 0
                 # porque el crédito anterior ya está en el período cerrado
@@ -195,10 +272,16 @@ class PeriodCRUD:
         result = await self.collection.find_one_and_update(
             {"_id": ObjectId(period_id), "user_id": ObjectId(user_id)},
             {"$set": update_data},
-            return_document=True
+            return_document=True,
+            maxTimeMS=max_time_ms(WRITE)
         )
 
-        return PeriodInDB(**result) if result else None
+        if not result:
+            return None
+
+        unit_of_work.remember(self.collection, result)
+        await self.versions.bump(user_id, period_id)
+        return PeriodInDB(**result)
 
     async def close_period(self, user_id: str, period_id: str, fecha_fin: Optional[datetime] = None) -> Optional[PeriodInDB]:
         """
@@ -230,6 +313,7 @@ class PeriodCRUD:
                     }
                 }
             )
+            unit_of_work.forget(self.collection, period_id)
 
         # Cerrar el período
         return await self.update(
@@ -248,7 +332,13 @@ class PeriodCRUD:
             "user_id": ObjectId(user_id)
         })
 
-        return result.deleted_count > 0
+        if result.deleted_count == 0:
+            return False
+
+        unit_of_work.forget(self.collection, period_id)
+        await self.deletions.record(user_id, "periods", [ObjectId(period_id)])
+        await self.versions.bump(user_id, period_id)
+        return True
 
     # ====================
     # LÓGICA DE CREACIÓN AUTOMÁTICA
@@ -283,7 +373,7 @@ class PeriodCRUD:
                 if skip_start >= current_period_start:
                     break
 
-                print(f"   📅 Creando período mensual saltado: {skip_start} - {skip_end}")
+                logger.info("Creando período mensual saltado: %s - %s", skip_start, skip_end)
 
                 # Obtener el período cerrado más reciente para copiar datos
                 previous = await self._get_previous_period(user_id, tipo_periodo)
@@ -304,6 +394,8 @@ class PeriodCRUD:
 
                 result = await self.collection.insert_one(period_dict)
                 period_dict["_id"] = result.inserted_id
+                await self.versions.bump(user_id, str(result.inserted_id))
+                PERIOD_ROLLOVERS.labels(tipo_periodo=tipo_periodo.value, reason="skipped").inc()
                 skipped_period = PeriodInDB(**period_dict)
 
                 # Copiar gastos fijos al período saltado
@@ -330,7 +422,7 @@ class PeriodCRUD:
                 if skip_start > current_time:
                     break
 
-                print(f"   📅 Creando período de crédito saltado: {skip_start} - {skip_end}")
+                logger.info("Creando período de crédito saltado: %s - %s", skip_start, skip_end)
 
                 previous = await self._get_previous_period(user_id, tipo_periodo)
 
@@ -350,6 +442,8 @@ class PeriodCRUD:
 
                 result = await self.collection.insert_one(period_dict)
                 period_dict["_id"] = result.inserted_id
+                await self.versions.bump(user_id, str(result.inserted_id))
+                PERIOD_ROLLOVERS.labels(tipo_periodo=tipo_periodo.value, reason="skipped").inc()
                 skipped_period = PeriodInDB(**period_dict)
 
                 # Copiar gastos fijos y actualizar total_gastado
@@ -360,12 +454,14 @@ class PeriodCRUD:
                 # Avanzar al siguiente ciclo de crédito (~30 días)
                 next_date = skip_end + timedelta(days=1)
 
+    @budgeted
     async def _get_user_categories(self, user_id: str) -> List[ObjectId]:
         """
         Obtener los IDs de las 4 categorías del usuario
         """
         categories = await self.db["categories"].find(
-            {"user_id": ObjectId(user_id)}
+            {"user_id": ObjectId(user_id)},
+            max_time_ms=max_time_ms(READ)
         ).to_list(length=None)
 
         return [cat["_id"] for cat in categories]
@@ -423,6 +519,7 @@ class PeriodCRUD:
 
         result = await self.collection.insert_one(period_dict)
         period_dict["_id"] = result.inserted_id
+        await self.versions.bump(user_id, str(result.inserted_id))
 
         new_period = PeriodInDB(**period_dict)
 
@@ -433,10 +530,11 @@ class PeriodCRUD:
             # Actualizar total_gastado del nuevo período de crédito después de copiar gastos
             if tipo_periodo == TipoPeriodo.CICLO_CREDITO:
                 await self.update_total_gastado(user_id, str(new_period.id))
-                print(f"   💰 total_gastado actualizado después de copiar gastos fijos al nuevo período de crédito")
+                logger.debug("total_gastado actualizado después de copiar gastos fijos al período %s", new_period.id)
 
         return new_period
 
+    @budgeted
     async def _get_previous_period(
         self,
         user_id: str,
@@ -451,11 +549,13 @@ class PeriodCRUD:
                 "tipo_periodo": tipo_periodo,
                 "estado": EstadoPeriodo.CERRADO
             },
-            sort=[("fecha_fin", -1)]
+            sort=[("fecha_fin", -1)],
+            max_time_ms=max_time_ms(READ)
         )
 
         return PeriodInDB(**period) if period else None
 
+    @budgeted
     async def _get_credit_period_for_liquidez(
         self,
         user_id: str,
@@ -485,7 +585,8 @@ class PeriodCRUD:
                 "estado": EstadoPeriodo.CERRADO,
                 "fecha_fin": {"$lt": periodo_mensual.fecha_inicio}
             },
-            sort=[("fecha_fin", -1)]
+            sort=[("fecha_fin", -1)],
+            max_time_ms=max_time_ms(READ)
         )
 
         return PeriodInDB(**period) if period else None
@@ -631,14 +732,14 @@ class PeriodCRUD:
         user_id: str,
         periodo_id: str,
         categoria_id: str
-    ) -> float:
+    ) -> int:
         """
         Calcular el total REAL de una categoría según LOGICA_SISTEMA.md
 
         Fórmula: total_categoria = suma(gastos_fijos) + suma(gastos_variables) - suma(aportes)
         """
         if not self.expense_crud or not self.aporte_crud:
-            return 0.0
+            return 0
 
         total_gastos = await self.expense_crud.calculate_total_by_categoria(
             user_id, periodo_id, categoria_id
@@ -657,7 +758,7 @@ class PeriodCRUD:
         categoria_ahorro_id: str,
         categoria_arriendo_id: str,
         categoria_liquidez_id: Optional[str] = None
-    ) -> float:
+    ) -> int:
         """
         Calcular liquidez según LOGICA_SISTEMA.md
 
@@ -692,13 +793,15 @@ class PeriodCRUD:
         # Obtener crédito del período que se PAGA este mes
         # Buscar el período de crédito cerrado cuya fecha_fin sea ANTERIOR al inicio del período mensual
         credit_period_for_payment = await self._get_credit_period_for_liquidez(user_id, period)
-        credito_anterior = credit_period_for_payment.total_gastado if credit_period_for_payment else 0.0
+        credito_anterior = credit_period_for_payment.total_gastado if credit_period_for_payment else 0
 
-        # DEBUG: Log del período de crédito usado
         if credit_period_for_payment:
-            print(f"DEBUG LIQUIDEZ: Usando período de crédito {credit_period_for_payment.fecha_inicio} - {credit_period_for_payment.fecha_fin} con total_gastado=${credito_anterior}")
+            logger.debug(
+                "Liquidez: usando período de crédito %s - %s con total_gastado=%s",
+                credit_period_for_payment.fecha_inicio, credit_period_for_payment.fecha_fin, credito_anterior
+            )
         else:
-            print(f"DEBUG LIQUIDEZ: No se encontró período de crédito cerrado anterior a {period.fecha_inicio}")
+            logger.debug("Liquidez: no se encontró período de crédito cerrado anterior a %s", period.fecha_inicio)
 
         # Calcular liquidez inicial
         liquidez_inicial = (
@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.core.query_budget import budgeted, max_time_ms, AGGREGATE
+from app.core.query_tags import tagged_collection
+from app.core.tracing import traced
+
+# Contadores acumulados por (usuario, hora, endpoint)
+USAGE_FIELDS = ("requests", "commands", "docs_returned", "docs_written", "db_ms", "cpu_ms")
+
+
+@traced
+class UsageStatsCRUD:
+    """
+    Consumo de recursos por usuario (ver app.core.usage)
+
+    Un documento por usuario, hora y endpoint:
+    {user_id, bucket, route, method, requests, commands, docs_returned,
+     docs_written, db_ms, cpu_ms}
+
+    Los documentos expiran solos (índice TTL sobre bucket, ver app.core.indexes).
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = tagged_collection(db["usage_stats"])
+
+    async def increment_many(self, totals: Dict[Tuple[str, datetime, str, str], Dict[str, float]]) -> None:
+        """
+        Sumar los totales acumulados en memoria: un upsert por (usuario, hora, ruta, método)
+        """
+        if not totals:
+            return
+
+        operations = [
+            UpdateOne(
+                {"user_id": ObjectId(user_id), "bucket": bucket, "route": route, "method": method},
+                {"$inc": counters},
+                upsert=True
+            )
+            for (user_id, bucket, route, method), counters in totals.items()
+        ]
+        await self.collection.bulk_write(operations, ordered=False)
+
+    @budgeted
+    async def get_top_consumers(self, since: datetime, sort_by: str, limit: int) -> List[dict]:
+        """
+        Usuarios con mayor consumo desde `since`, ordenados por `sort_by`,
+        con el desglose por endpoint (de mayor a menor)
+        """
+        totals = {field: {"$sum": f"${field}"} for field in USAGE_FIELDS}
+
+        pipeline = [
+            {"$match": {"bucket": {"$gte": since}}},
+            {"$group": {"_id": {"user_id": "$user_id", "route": "$route", "method": "$method"}, **totals}},
+            {"$sort": {sort_by: -1}},
+            {
+                "$group": {
+                    "_id": "$_id.user_id",
+                    **{field: {"$sum": f"${field}"} for field in USAGE_FIELDS},
+                    "endpoints": {
+                        "$push": {
+                            "route": "$_id.route",
+                            "method": "$_id.method",
+                            **{field: f"${field}" for field in USAGE_FIELDS}
+                        }
+                    }
+                }
+            },
+            {"$sort": {sort_by: -1}},
+            {"$limit": limit},
+            {
+                "$lookup": {
+                    "from": "users",
+                    "localField": "_id",
+                    "foreignField": "_id",
+                    "pipeline": [{"$project": {"_id": 0, "username": 1, "email": 1}}],
+                    "as": "user"
+                }
+            },
+            {"$set": {"user": {"$first": "$user"}}},
+        ]
+
+        return await self.collection.aggregate(pipeline, maxTimeMS=max_time_ms(AGGREGATE)).to_list(length=limit)
@@ -2,13 +2,20 @@ from typing import Optional, List
 from datetime import datetime
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.models.user import UserCreate, UserUpdate, UserInDB
+from app.core.query_budget import budgeted, max_time_ms, READ
+from app.core.query_tags import tagged_collection
+from app.core.tracing import traced
+from app.models.user import UserCreate, UserUpdate, UserInDB, UserResponse
 from app.core.security import get_password_hash
 
+# Campos que se leen por defecto para listar usuarios (los de UserResponse)
+USER_RESPONSE_FIELDS = [field.alias or name for name, field in UserResponse.model_fields.items()]
 
+
+@traced
 class UserCRUD:
     def __init__(self, db: AsyncIOMotorDatabase):
-        self.collection = db.users
+        self.collection = tagged_collection(db.users)
 
     async def create(self, user: UserCreate) -> UserInDB:
         """
@@ -25,6 +32,7 @@ class UserCRUD:
 
         return UserInDB(**user_dict)
 
+    @budgeted
     async def get_by_id(self, user_id: str) -> Optional[UserInDB]:
         """
         Get a user by ID.
@@ -32,37 +40,55 @@ class UserCRUD:
         if not ObjectId.is_valid(user_id):
             return None
 
-        user = await self.collection.find_one({"_id": ObjectId(user_id)})
+        user = await self.collection.find_one({"_id": ObjectId(user_id)}, max_time_ms=max_time_ms(READ))
         if user:
             return UserInDB(**user)
         return None
 
+    @budgeted
     async def get_by_email(self, email: str) -> Optional[UserInDB]:
         """
         Get a user by email.
         """
-        user = await self.collection.find_one({"email": email})
+        user = await self.collection.find_one({"email": email}, max_time_ms=max_time_ms(READ))
         if user:
             return UserInDB(**user)
         return None
 
+    @budgeted
     async def get_by_username(self, username: str) -> Optional[UserInDB]:
         """
         Get a user by username.
         """
-        user = await self.collection.find_one({"username": username})
+        user = await self.collection.find_one({"username": username}, max_time_ms=max_time_ms(READ))
         if user:
             return UserInDB(**user)
         return None
 
+    @budgeted
     async def get_all(self, skip: int = 0, limit: int = 100) -> List[UserInDB]:
         """
         Get all users with pagination.
         """
-        cursor = self.collection.find().skip(skip).limit(limit)
+        cursor = self.collection.find({}, max_time_ms=max_time_ms(READ)).skip(skip).limit(limit)
         users = await cursor.to_list(length=limit)
         return [UserInDB(**user) for user in users]
 
+    @budgeted
+    async def get_all_documents(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """
+        Get users as raw MongoDB documents, reading only `fields`
+        (by default, every field of UserResponse: never the password hash).
+        """
+        projection = {field: 1 for field in (fields or USER_RESPONSE_FIELDS) if field != "_id"}
+        cursor = self.collection.find({}, projection, max_time_ms=max_time_ms(READ)).skip(skip).limit(limit)
+        return await cursor.to_list(length=limit)
+
     async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[UserInDB]:
         """
         Alias for get_all. Get all users with pagination.
@@ -107,16 +133,18 @@ class UserCRUD:
         result = await self.collection.delete_one({"_id": ObjectId(user_id)})
         return result.deleted_count > 0
 
+    @budgeted
     async def exists_by_email(self, email: str) -> bool:
         """
         Check if a user with the given email exists.
         """
-        count = await self.collection.count_documents({"email": email})
+        count = await self.collection.count_documents({"email": email}, maxTimeMS=max_time_ms(READ))
         return count > 0
 
+    @budgeted
     async def exists_by_username(self, username: str) -> bool:
         """
         Check if a user with the given username exists.
         """
-        count = await self.collection.count_documents({"username": username})
+        count = await self.collection.count_documents({"username": username}, maxTimeMS=max_time_ms(READ))
         return count > 0
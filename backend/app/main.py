@@ -1,25 +1,65 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
+from pymongo.errors import ExecutionTimeout
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from app.core.config import settings
 from app.core.database import connect_to_mongo, close_mongo_connection, get_database
 from app.core.init_db import init_db
+from app.core.serialization import MongoJSONResponse
+from app.core.compression import CompressionMiddleware
+from app.core.negotiation import ContentNegotiationMiddleware
+from app.core.unit_of_work import UnitOfWorkMiddleware
+from app.core.command_accounting import CommandAccountingMiddleware
+from app.core.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+from app.core.profiling import start_sampler, stop_sampler
+from app.api.profiling import ProfilingMiddleware
+from app.core.structured_logging import RequestContextMiddleware, setup_logging
+from app.core.metrics import METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.core.indexes import ensure_indexes
+from app.core.health import readiness
+from app.core.loop_monitor import start_loop_monitor, stop_loop_monitor
+from app.core.usage import start_usage_flush, stop_usage_flush
+from app.migrations import run_pending_migrations
 from app.api.v1.api import api_router
 
+# Logs JSON con request_id/user_id, antes de cualquier otro log del proceso
+setup_logging()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    setup_tracing()
+    start_sampler()
+    start_loop_monitor()
     await connect_to_mongo()
 
     # Inicializar base de datos (crear admin si no hay usuarios)
     db = get_database()
     await init_db(db)
 
+    # Aplicar migraciones de esquema pendientes (un solo worker a la vez)
+    if settings.MIGRATIONS_RUN_ON_STARTUP:
+        await run_pending_migrations(db)
+
+    # Crear índices después de migrar (los datos ya tienen los tipos esperados)
+    await ensure_indexes(db)
+
+    # Guardar periódicamente el consumo por usuario acumulado en memoria
+    start_usage_flush(db)
+
     yield
     # Shutdown
+    await stop_usage_flush(db)
     await close_mongo_connection()
+    await stop_loop_monitor()
+    stop_sampler()
+    shutdown_tracing()
 
 
 app = FastAPI(
@@ -29,6 +69,7 @@ app = FastAPI(
     docs_url="/docs" if settings.DOCS_ENABLED else None,
     redoc_url="/redoc" if settings.DOCS_ENABLED else None,
     lifespan=lifespan,
+    default_response_class=MongoJSONResponse,
     redirect_slashes=False  # Disable automatic trailing slash redirects
 )
 
@@ -41,6 +82,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# JSON o MessagePack según Accept / Content-Type
+app.add_middleware(ContentNegotiationMiddleware)
+
+# Compresión negociada (br / zstd / gzip) para respuestas grandes
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Identity map y escrituras pendientes por request (ver app.core.unit_of_work)
+app.add_middleware(UnitOfWorkMiddleware)
+
+# Comandos de MongoDB por request: Server-Timing y advertencias de N+1
+# (por fuera del unit of work para contar también sus escrituras pendientes)
+app.add_middleware(CommandAccountingMiddleware)
+
+# Latencia y requests en curso por ruta (mide el request completo)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Perfil a pedido (header X-Profile, solo admins): cubre todos los middlewares internos
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Span raíz de cada request (los spans de los demás middlewares y del CRUD cuelgan de él)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# request_id de los logs (X-Request-ID): el más externo, cubre todo lo anterior
+app.add_middleware(RequestContextMiddleware)
+
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    """
+    Igual que el handler de FastAPI, pero con MongoJSONResponse para que los
+    errores también respeten el formato negociado (JSON o MessagePack)
+    """
+    headers = getattr(exc, "headers", None)
+    if exc.status_code in (status.HTTP_204_NO_CONTENT, status.HTTP_304_NOT_MODIFIED) or exc.status_code < 200:
+        return Response(status_code=exc.status_code, headers=headers)
+    return MongoJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=headers)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    return MongoJSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={"detail": jsonable_encoder(exc.errors())}
+    )
+
+
+@app.exception_handler(ExecutionTimeout)
+async def query_budget_exceeded_handler(request: Request, exc: ExecutionTimeout):
+    """
+    Una consulta excedió su presupuesto de tiempo (maxTimeMS): responder 503
+    con Retry-After en vez de mantener la conexión ocupada
+    """
+    return MongoJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "La consulta tardó demasiado, intente nuevamente en unos segundos"},
+        headers={"Retry-After": str(settings.QUERY_BUDGET_RETRY_AFTER_SECONDS)}
+    )
+
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -58,5 +161,29 @@ async def root():
 
 
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
+    """
+    Liveness: el proceso responde (no depende de MongoDB)
+    """
     return {"status": "healthy"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness: MongoDB, pool de conexiones, índices y event loop dentro de
+    sus umbrales (ver app.core.health). 503 si el worker no debe recibir tráfico.
+    """
+    result = await readiness(get_database())
+    status_code = status.HTTP_200_OK if result["status"] == "ready" else status.HTTP_503_SERVICE_UNAVAILABLE
+    return MongoJSONResponse(result, status_code=status_code, headers={"Cache-Control": "no-store"})
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """
+        Métricas en formato Prometheus (ver app.core.metrics)
+        """
+        return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,8 @@
+from app.migrations.base import BatchedMigration
+from app.migrations.runner import MigrationRunner, run_pending_migrations
+
+__all__ = [
+    "BatchedMigration",
+    "MigrationRunner",
+    "run_pending_migrations",
+]
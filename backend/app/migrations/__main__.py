@@ -0,0 +1,60 @@
+"""
+CLI de migraciones.
+
+Uso (desde backend/):
+    python -m app.migrations status
+    python -m app.migrations up [--dry-run] [--batch-size N] [--delay-ms MS] [--target VERSION]
+"""
+import argparse
+import asyncio
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.migrations.runner import MigrationRunner
+
+
+async def main(args: argparse.Namespace) -> int:
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB_NAME]
+
+    try:
+        runner = MigrationRunner(
+            db,
+            batch_size=args.batch_size,
+            batch_delay_ms=args.delay_ms
+        )
+
+        if args.command == "status":
+            for item in await runner.status():
+                print(f"{item['id']:<45} {item['status']:<10} {item['description']}")
+                for collection, progress in item["progress"].items():
+                    print(f"    {collection}: {progress.get('processed', 0)} procesados, {progress.get('modified', 0)} modificados")
+            return 0
+
+        results = await runner.run_pending(dry_run=args.dry_run, target=args.target)
+        if not results:
+            print("Nada que ejecutar (sin migraciones pendientes o lock tomado por otro proceso)")
+        for result in results:
+            print(f"{result.migration_id}: {result.status}{' (dry-run)' if result.dry_run else ''}")
+            for progress in result.progress:
+                print(f"    {progress.collection}: {progress.processed}/{progress.total} procesados, {progress.modified} cambios")
+            if result.error:
+                print(f"    error: {result.error}")
+                return 1
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Migraciones de esquema por lotes")
+    parser.add_argument("command", choices=["status", "up"])
+    parser.add_argument("--dry-run", action="store_true", help="Recorrer y contar cambios sin escribir")
+    parser.add_argument("--batch-size", type=int, default=None, help="Documentos por lote")
+    parser.add_argument("--delay-ms", type=int, default=None, help="Pausa entre lotes en milisegundos")
+    parser.add_argument("--target", default=None, help="Versión máxima a aplicar (ej: 0002)")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,46 @@
+"""
+Clase base para migraciones de esquema por lotes.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class BatchedMigration:
+    """
+    Migración versionada que recorre una o más colecciones por lotes.
+
+    Cada subclase define:
+    - version: Número correlativo ("0001", "0002", ...) que fija el orden
+    - name: Identificador corto en snake_case
+    - description: Qué cambia en los datos y por qué
+    - collections: Colecciones que recorre, en orden
+    - query(): Filtro de los documentos que aún necesitan el cambio
+    - build_operations(): Operaciones de escritura (UpdateOne, DeleteOne...) para un documento
+
+    El filtro debe excluir los documentos ya migrados, de modo que volver a
+    ejecutar la migración (o retomarla después de una caída) no repita trabajo.
+    """
+    version: str = ""
+    name: str = ""
+    description: str = ""
+    collections: Sequence[str] = ()
+
+    # Proyección opcional para leer solo los campos necesarios
+    projection: Optional[Dict[str, Any]] = None
+
+    @property
+    def id(self) -> str:
+        """Identificador único usado en la colección `migrations`"""
+        return f"{self.version}_{self.name}"
+
+    def query(self, collection: str) -> Dict[str, Any]:
+        """
+        Filtro de documentos pendientes de migrar en la colección dada
+        """
+        return {}
+
+    def build_operations(self, collection: str, document: Dict[str, Any]) -> List[Any]:
+        """
+        Construir las operaciones de escritura para un documento.
+        Retornar una lista vacía si el documento no necesita cambios.
+        """
+        raise NotImplementedError
@@ -0,0 +1,318 @@
+"""
+Ejecutor de migraciones por lotes.
+
+Estado en la colección `migrations`:
+- Un documento por migración (_id = "<version>_<name>") con estado y progreso
+  por colección (último _id procesado, documentos procesados y modificados)
+- Un documento "__lock__" que garantiza que un solo proceso migre a la vez
+
+Los documentos se recorren ordenados por _id, en lotes de N documentos que se
+escriben con un único bulk_write. Después de cada lote se guarda el último _id
+procesado, así una migración interrumpida se retoma donde quedó.
+"""
+import asyncio
+import logging
+import os
+import socket
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.migrations.base import BatchedMigration
+from app.migrations.versions import load_migrations
+
+logger = logging.getLogger(__name__)
+
+LOCK_ID = "__lock__"
+
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class MigrationProgress:
+    """Progreso de una migración sobre una colección"""
+    migration_id: str
+    collection: str
+    total: int = 0
+    processed: int = 0
+    modified: int = 0
+    batches: int = 0
+    last_id: Any = None
+    dry_run: bool = False
+
+
+@dataclass
+class MigrationResult:
+    """Resultado de ejecutar una migración"""
+    migration_id: str
+    status: str
+    dry_run: bool = False
+    progress: List[MigrationProgress] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class MigrationRunner:
+    """
+    Ejecuta migraciones pendientes por lotes con lock, reanudación y dry-run
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        batch_size: Optional[int] = None,
+        batch_delay_ms: Optional[int] = None,
+        lock_ttl_seconds: Optional[int] = None,
+        on_progress: Optional[Callable[[MigrationProgress], None]] = None
+    ):
+        self.db = db
+        self.collection = db["migrations"]
+        self.batch_size = batch_size or settings.MIGRATIONS_BATCH_SIZE
+        self.batch_delay_ms = settings.MIGRATIONS_BATCH_DELAY_MS if batch_delay_ms is None else batch_delay_ms
+        self.lock_ttl = timedelta(seconds=lock_ttl_seconds or settings.MIGRATIONS_LOCK_TTL_SECONDS)
+        self.on_progress = on_progress or self._log_progress
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    # ====================
+    # LOCK
+    # ====================
+
+    async def acquire_lock(self) -> bool:
+        """
+        Tomar el lock de migraciones.
+        Falla si otro proceso lo tiene y no ha expirado.
+        """
+        now = datetime.utcnow()
+        try:
+            await self.collection.find_one_and_update(
+                {
+                    "_id": LOCK_ID,
+                    "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]
+                },
+                {"$set": {"owner": self.owner, "acquired_at": now, "expires_at": now + self.lock_ttl}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # El documento existe con otro dueño y sin expirar
+            return False
+
+    async def refresh_lock(self) -> None:
+        """Extender la expiración del lock (se llama después de cada lote)"""
+        await self.collection.update_one(
+            {"_id": LOCK_ID, "owner": self.owner},
+            {"$set": {"expires_at": datetime.utcnow() + self.lock_ttl}}
+        )
+
+    async def release_lock(self) -> None:
+        await self.collection.delete_one({"_id": LOCK_ID, "owner": self.owner})
+
+    # ====================
+    # ESTADO
+    # ====================
+
+    async def get_state(self, migration: BatchedMigration) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": migration.id})
+
+    async def status(self) -> List[Dict[str, Any]]:
+        """
+        Estado de todas las migraciones conocidas (aplicadas o pendientes)
+        """
+        states = {
+            doc["_id"]: doc
+            async for doc in self.collection.find({"_id": {"$ne": LOCK_ID}})
+        }
+
+        report = []
+        for migration in load_migrations():
+            state = states.get(migration.id, {})
+            report.append({
+                "id": migration.id,
+                "description": migration.description,
+                "status": state.get("status", "pending"),
+                "started_at": state.get("started_at"),
+                "finished_at": state.get("finished_at"),
+                "progress": state.get("progress", {}),
+                "error": state.get("error")
+            })
+        return report
+
+    async def pending(self) -> List[BatchedMigration]:
+        completed = {
+            doc["_id"]
+            async for doc in self.collection.find({"status": STATUS_COMPLETED}, {"_id": 1})
+        }
+        return [m for m in load_migrations() if m.id not in completed]
+
+    # ====================
+    # EJECUCIÓN
+    # ====================
+
+    async def run_pending(self, dry_run: bool = False, target: Optional[str] = None) -> List[MigrationResult]:
+        """
+        Ejecutar todas las migraciones pendientes en orden de versión.
+
+        Args:
+            dry_run: Recorre y cuenta los cambios sin escribir nada
+            target: Versión máxima a aplicar (inclusive), ej: "0002"
+
+        Returns:
+            Resultados por migración. Lista vacía si otro proceso tiene el lock.
+        """
+        if not await self.acquire_lock():
+            logger.info("Migraciones en curso en otro proceso, se omite la ejecución")
+            return []
+
+        results = []
+        try:
+            for migration in await self.pending():
+                if target and migration.version > target:
+                    break
+                result = await self.run(migration, dry_run=dry_run)
+                results.append(result)
+                if result.status == STATUS_FAILED:
+                    break
+        finally:
+            await self.release_lock()
+
+        return results
+
+    async def run(self, migration: BatchedMigration, dry_run: bool = False) -> MigrationResult:
+        """
+        Ejecutar (o retomar) una migración.
+        Se asume que el lock ya fue tomado.
+        """
+        result = MigrationResult(migration_id=migration.id, status=STATUS_RUNNING, dry_run=dry_run)
+        state = await self.get_state(migration) or {}
+        saved_progress = state.get("progress", {})
+
+        if not dry_run:
+            await self.collection.update_one(
+                {"_id": migration.id},
+                {
+                    "$set": {"status": STATUS_RUNNING, "description": migration.description, "error": None},
+                    "$setOnInsert": {"started_at": datetime.utcnow(), "progress": {}}
+                },
+                upsert=True
+            )
+
+        logger.info(f"Migración {migration.id}{' (dry-run)' if dry_run else ''}: {migration.description}")
+
+        try:
+            for collection_name in migration.collections:
+                progress = MigrationProgress(
+                    migration_id=migration.id,
+                    collection=collection_name,
+                    dry_run=dry_run,
+                    **{
+                        key: saved_progress.get(collection_name, {}).get(key, default)
+                        for key, default in (("processed", 0), ("modified", 0), ("last_id", None))
+                    }
+                )
+                await self._run_collection(migration, progress)
+                result.progress.append(progress)
+        except Exception as e:
+            logger.error(f"Migración {migration.id} falló: {e}")
+            result.status = STATUS_FAILED
+            result.error = str(e)
+            if not dry_run:
+                await self.collection.update_one(
+                    {"_id": migration.id},
+                    {"$set": {"status": STATUS_FAILED, "error": str(e)}}
+                )
+            return result
+
+        result.status = STATUS_COMPLETED
+        if not dry_run:
+            await self.collection.update_one(
+                {"_id": migration.id},
+                {"$set": {"status": STATUS_COMPLETED, "finished_at": datetime.utcnow()}}
+            )
+        return result
+
+    async def _run_collection(self, migration: BatchedMigration, progress: MigrationProgress) -> None:
+        """
+        Recorrer una colección por lotes ordenados por _id
+        """
+        collection = self.db[progress.collection]
+        base_query = migration.query(progress.collection)
+        progress.total = progress.processed + await collection.count_documents(
+            self._resume_query(base_query, progress.last_id)
+        )
+
+        while True:
+            cursor = collection.find(
+                self._resume_query(base_query, progress.last_id),
+                migration.projection
+            ).sort("_id", 1).limit(self.batch_size)
+            batch = await cursor.to_list(length=self.batch_size)
+
+            if not batch:
+                break
+
+            operations = []
+            for document in batch:
+                operations.extend(migration.build_operations(progress.collection, document))
+
+            if operations and not progress.dry_run:
+                bulk_result = await collection.bulk_write(operations, ordered=False)
+                progress.modified += bulk_result.modified_count + bulk_result.deleted_count
+            elif operations:
+                progress.modified += len(operations)
+
+            progress.processed += len(batch)
+            progress.batches += 1
+            progress.last_id = batch[-1]["_id"]
+
+            if not progress.dry_run:
+                await self._save_progress(progress)
+                await self.refresh_lock()
+
+            self.on_progress(progress)
+
+            if len(batch) < self.batch_size:
+                break
+
+            # Limitar la tasa para no competir con el tráfico de la API
+            if self.batch_delay_ms:
+                await asyncio.sleep(self.batch_delay_ms / 1000)
+
+    async def _save_progress(self, progress: MigrationProgress) -> None:
+        await self.collection.update_one(
+            {"_id": progress.migration_id},
+            {"$set": {
+                f"progress.{progress.collection}": {
+                    "last_id": progress.last_id,
+                    "processed": progress.processed,
+                    "modified": progress.modified,
+                    "updated_at": datetime.utcnow()
+                }
+            }}
+        )
+
+    @staticmethod
+    def _resume_query(base_query: Dict[str, Any], last_id: Any) -> Dict[str, Any]:
+        if last_id is None:
+            return base_query
+        return {"$and": [base_query, {"_id": {"$gt": last_id}}]}
+
+    @staticmethod
+    def _log_progress(progress: MigrationProgress) -> None:
+        logger.info(
+            f"  {progress.migration_id} [{progress.collection}] "
+            f"lote {progress.batches}: {progress.processed}/{progress.total} procesados, "
+            f"{progress.modified} {'cambios previstos' if progress.dry_run else 'modificados'}"
+        )
+
+
+async def run_pending_migrations(db: AsyncIOMotorDatabase) -> List[MigrationResult]:
+    """
+    Ejecutar las migraciones pendientes al iniciar la aplicación.
+    Si otro worker ya tiene el lock, no hace nada.
+    """
+    return await MigrationRunner(db).run_pending()
@@ -0,0 +1,25 @@
+"""
+Módulos de migración versionados.
+
+Cada módulo se llama `v<version>_<nombre>.py` y expone una instancia
+`migration` de una subclase de BatchedMigration. Se aplican en orden de versión.
+"""
+import importlib
+import pkgutil
+from typing import List
+
+from app.migrations.base import BatchedMigration
+
+
+def load_migrations() -> List[BatchedMigration]:
+    """
+    Descubrir e instanciar todas las migraciones, ordenadas por versión
+    """
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        if not module_info.name.startswith("v"):
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        migrations.append(module.migration)
+
+    return sorted(migrations, key=lambda m: m.version)
@@ -0,0 +1,38 @@
+"""
+Convertir categoria_id almacenado como string a ObjectId en gastos y aportes.
+
+Los documentos antiguos guardaban categoria_id como string (model_dump de
+PyObjectId serializa a str), mientras que otros lo tenían como ObjectId.
+Con tipos mezclados el índice (user_id, periodo_id, categoria_id) no sirve
+para los filtros por categoría.
+"""
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.migrations.base import BatchedMigration
+
+
+class CategoriaIdObjectIdMigration(BatchedMigration):
+    version = "0001"
+    name = "categoria_id_object_id"
+    description = "categoria_id de gastos y aportes como ObjectId"
+    collections = ("expenses", "aportes")
+    projection = {"categoria_id": 1}
+
+    def query(self, collection):
+        return {"categoria_id": {"$type": "string"}}
+
+    def build_operations(self, collection, document):
+        categoria_id = document["categoria_id"]
+        if not ObjectId.is_valid(categoria_id):
+            return []
+
+        return [
+            UpdateOne(
+                {"_id": document["_id"], "categoria_id": categoria_id},
+                {"$set": {"categoria_id": ObjectId(categoria_id)}}
+            )
+        ]
+
+
+migration = CategoriaIdObjectIdMigration()
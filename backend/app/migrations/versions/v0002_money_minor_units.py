@@ -0,0 +1,52 @@
+"""
+Convertir montos almacenados como double a enteros (unidades mínimas de CLP).
+
+Afecta:
+- expenses.monto
+- aportes.monto
+- periods.sueldo, periods.total_gastado y periods.metas_categorias.credito_usable
+"""
+from pymongo import UpdateOne
+
+from app.migrations.base import BatchedMigration
+from app.models.common import to_minor_units
+
+MONEY_FIELDS = {
+    "expenses": ("monto",),
+    "aportes": ("monto",),
+    "periods": ("sueldo", "total_gastado", "metas_categorias.credito_usable"),
+}
+
+
+def _get_path(document, path):
+    value = document
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+class MoneyMinorUnitsMigration(BatchedMigration):
+    version = "0002"
+    name = "money_minor_units"
+    description = "Montos (monto, sueldo, total_gastado, credito_usable) como enteros"
+    collections = tuple(MONEY_FIELDS)
+
+    def query(self, collection):
+        return {"$or": [{field: {"$type": "double"}} for field in MONEY_FIELDS[collection]]}
+
+    def build_operations(self, collection, document):
+        updates = {}
+        for field in MONEY_FIELDS[collection]:
+            value = _get_path(document, field)
+            if isinstance(value, float):
+                updates[field] = to_minor_units(value)
+
+        if not updates:
+            return []
+
+        return [UpdateOne({"_id": document["_id"]}, {"$set": updates})]
+
+
+migration = MoneyMinorUnitsMigration()
@@ -0,0 +1,67 @@
+"""
+Compactar documentos de gastos y aportes (ver app/crud/document_layout.py).
+
+- Elimina fecha_registro y created_at cuando coinciden con el tiempo del ObjectId
+- Elimina updated_at cuando nunca hubo una edición (igual a created_at)
+- Elimina opcionales guardados como null
+"""
+from datetime import timedelta
+from pymongo import UpdateOne
+
+from app.migrations.base import BatchedMigration
+
+NULLABLE_FIELDS = {
+    "expenses": ("es_permanente", "periodos_restantes", "descripcion"),
+    "aportes": ("descripcion",),
+}
+
+# ObjectId tiene resolución de segundos; los timestamps antiguos se tomaban
+# con datetime.utcnow() justo antes de insertar
+TOLERANCE = timedelta(seconds=2)
+
+
+def _same_instant(a, b) -> bool:
+    return a is not None and b is not None and abs(a - b) <= TOLERANCE
+
+
+class CompactExpenseAporteLayoutMigration(BatchedMigration):
+    version = "0003"
+    name = "compact_expense_aporte_layout"
+    description = "Quitar timestamps derivables del _id y opcionales nulos en gastos y aportes"
+    collections = ("expenses", "aportes")
+
+    def query(self, collection):
+        conditions = [
+            {"created_at": {"$exists": True}},
+            {"fecha_registro": {"$exists": True}},
+        ]
+        # Guardado como null (un campo ausente también es igual a None, de ahí el $exists)
+        conditions.extend({field: {"$exists": True, "$eq": None}} for field in NULLABLE_FIELDS[collection])
+        return {"$or": conditions}
+
+    def build_operations(self, collection, document):
+        oid_time = document["_id"].generation_time.replace(tzinfo=None)
+        created_at = document.get("created_at")
+        unset = {}
+
+        if _same_instant(created_at, oid_time):
+            unset["created_at"] = ""
+        effective_created_at = created_at or oid_time
+
+        if "fecha_registro" in document and _same_instant(document["fecha_registro"], effective_created_at):
+            unset["fecha_registro"] = ""
+
+        if "updated_at" in document and _same_instant(document["updated_at"], effective_created_at):
+            unset["updated_at"] = ""
+
+        for field in NULLABLE_FIELDS[collection]:
+            if field in document and document[field] is None:
+                unset[field] = ""
+
+        if not unset:
+            return []
+
+        return [UpdateOne({"_id": document["_id"]}, {"$unset": unset})]
+
+
+migration = CompactExpenseAporteLayoutMigration()
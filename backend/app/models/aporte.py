@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 from bson import ObjectId
-from app.models.common import PyObjectId
+from app.models.common import PyObjectId, Money
 
 
 class AporteBase(BaseModel):
@@ -25,7 +25,7 @@ class AporteBase(BaseModel):
     - Variable: Se registra una sola vez en el período actual (ej: venta de celular)
     """
     nombre: str = Field(..., min_length=1, max_length=200, description="Descripción del aporte")
-    monto: float = Field(..., gt=0, description="Monto del aporte (siempre positivo)")
+    monto: Money = Field(..., gt=0, description="Monto del aporte (siempre positivo)")
     categoria_id: PyObjectId = Field(..., description="ID de la categoría a la que se aporta")
     es_fijo: bool = Field(
         ...,
@@ -51,7 +51,7 @@ class AporteUpdate(BaseModel):
     Permite editar nombre, monto, descripción
     """
     nombre: Optional[str] = Field(default=None, min_length=1, max_length=200)
-    monto: Optional[float] = Field(default=None, gt=0)
+    monto: Optional[Money] = Field(default=None, gt=0)
     descripcion: Optional[str] = Field(default=None, max_length=500)
 
     # No se permite cambiar es_fijo después de crear
@@ -1,8 +1,11 @@
 """
 Common models and utilities shared across all models
 """
+from decimal import Decimal, ROUND_HALF_UP
+from pydantic import BeforeValidator
 from pydantic_core import core_schema
 from typing import Any
+from typing_extensions import Annotated
 from bson import ObjectId
 
 
@@ -29,3 +32,18 @@ class PyObjectId(str):
         if isinstance(v, str) and ObjectId.is_valid(v):
             return ObjectId(v)
         raise ValueError("Invalid ObjectId")
+
+
+def to_minor_units(v: Any) -> Any:
+    """
+    Convertir montos recibidos como float a unidades mínimas enteras.
+    Los pesos chilenos no tienen decimales, así que la unidad mínima es el peso.
+    """
+    if isinstance(v, float):
+        return int(Decimal(str(v)).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    return v
+
+
+# Montos de dinero almacenados como enteros (unidades mínimas de CLP).
+# Acepta floats en la entrada (redondeados) para mantener compatibilidad con la API.
+Money = Annotated[int, BeforeValidator(to_minor_units)]
@@ -3,7 +3,7 @@ from typing import Optional
 from pydantic import BaseModel, Field, field_validator
 from bson import ObjectId
 from enum import Enum
-from app.models.common import PyObjectId
+from app.models.common import PyObjectId, Money
 
 
 class TipoGasto(str, Enum):
@@ -34,7 +34,7 @@ class ExpenseBase(BaseModel):
     - descripcion: Notas adicionales opcionales
     """
     nombre: str = Field(..., min_length=1, max_length=200, description="Nombre/descripción del gasto")
-    monto: float = Field(..., gt=0, description="Monto del gasto (siempre positivo)")
+    monto: Money = Field(..., gt=0, description="Monto del gasto (siempre positivo)")
     categoria_id: PyObjectId = Field(..., description="ID de la categoría a la que pertenece")
     tipo: TipoGasto = Field(..., description="Tipo de gasto: fijo o variable")
 
@@ -95,7 +95,7 @@ class ExpenseUpdate(BaseModel):
     Permite editar nombre, monto, descripción
     """
     nombre: Optional[str] = Field(default=None, min_length=1, max_length=200)
-    monto: Optional[float] = Field(default=None, gt=0)
+    monto: Optional[Money] = Field(default=None, gt=0)
     descripcion: Optional[str] = Field(default=None, max_length=500)
 
     # No se permite cambiar tipo, es_permanente, periodos_restantes después de crear
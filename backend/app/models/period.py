@@ -3,7 +3,7 @@ from typing import Optional, List
 from pydantic import BaseModel, Field
 from bson import ObjectId
 from enum import Enum
-from app.models.common import PyObjectId
+from app.models.common import PyObjectId, Money
 
 
 class TipoPeriodo(str, Enum):
@@ -36,7 +36,7 @@ class MetasCategorias(BaseModel):
 
     NOTA: Ahorro y Arriendo NO tienen meta, se calculan como suma de gastos - aportes
     """
-    credito_usable: float = Field(default=0, ge=0, description="Meta/límite de crédito del período")
+    credito_usable: Money = Field(default=0, ge=0, description="Meta/límite de crédito del período")
 
 
 class PeriodBase(BaseModel):
@@ -46,7 +46,7 @@ class PeriodBase(BaseModel):
     tipo_periodo: TipoPeriodo
     fecha_inicio: datetime
     fecha_fin: datetime
-    sueldo: Optional[float] = Field(default=0, ge=0, description="Ingreso mensual (solo para períodos mensuales)")
+    sueldo: Optional[Money] = Field(default=0, ge=0, description="Ingreso mensual (solo para períodos mensuales)")
     metas_categorias: MetasCategorias = Field(default_factory=MetasCategorias)
     estado: EstadoPeriodo = EstadoPeriodo.ACTIVO
 
@@ -57,7 +57,7 @@ class PeriodBase(BaseModel):
     )
 
     # Solo para períodos de crédito
-    total_gastado: Optional[float] = Field(
+    total_gastado: Optional[Money] = Field(
         default=0,
         ge=0,
         description="Suma total de gastos del período de crédito (se usa como deuda en siguiente período mensual)"
@@ -74,10 +74,10 @@ class PeriodUpdate(BaseModel):
     Esquema para actualizar un período
     Permite editar sueldo, metas, estado y fecha_fin
     """
-    sueldo: Optional[float] = Field(default=None, ge=0)
+    sueldo: Optional[Money] = Field(default=None, ge=0)
     metas_categorias: Optional[MetasCategorias] = None
     estado: Optional[EstadoPeriodo] = None
-    total_gastado: Optional[float] = Field(default=None, ge=0)
+    total_gastado: Optional[Money] = Field(default=None, ge=0)
     fecha_fin: Optional[datetime] = Field(
         default=None,
         description="Fecha de fin del período (útil para ajustar fecha de cierre de tarjeta de crédito)"
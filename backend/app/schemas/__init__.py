@@ -1,3 +1,34 @@
-from app.schemas.auth import Token, TokenData, LoginRequest
+from app.schemas.auth import Token, StreamTicket, TokenData, LoginRequest
+from app.schemas.batch import BatchRequest, BatchRequestItem, BatchResponse, BatchResponseItem
+from app.schemas.bulk import (
+    AporteBulkRequest,
+    AporteBulkResponse,
+    AporteBulkResult,
+    BulkDelete,
+    ExpenseBulkRequest,
+    ExpenseBulkResponse,
+    ExpenseBulkResult,
+)
+from app.schemas.slow_queries import ProfilerSettings
+from app.schemas.sync import SyncDeletions, SyncResponse
 
-__all__ = ["Token", "TokenData", "LoginRequest"]
+__all__ = [
+    "Token",
+    "StreamTicket",
+    "TokenData",
+    "LoginRequest",
+    "BatchRequest",
+    "BatchRequestItem",
+    "BatchResponse",
+    "BatchResponseItem",
+    "AporteBulkRequest",
+    "AporteBulkResponse",
+    "AporteBulkResult",
+    "BulkDelete",
+    "ExpenseBulkRequest",
+    "ExpenseBulkResponse",
+    "ExpenseBulkResult",
+    "ProfilerSettings",
+    "SyncDeletions",
+    "SyncResponse",
+]
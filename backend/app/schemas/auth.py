@@ -6,6 +6,11 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class StreamTicket(BaseModel):
+    ticket: str
+    expires_in: int
+
+
 class TokenData(BaseModel):
     user_id: str | None = None
     email: str | None = None
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field, model_validator
+
+from app.core.config import settings
+
+
+class BatchRequestItem(BaseModel):
+    """
+    Una sub-request del lote, contra cualquier ruta de /api/v1
+    """
+    id: str = Field(..., min_length=1, max_length=50, description="Identificador de la sub-request dentro del lote")
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str = Field(..., description="Ruta relativa a /api/v1, con query string (ej: /expenses/?periodo_id=...)")
+    body: Optional[Any] = None
+    headers: Dict[str, str] = Field(default_factory=dict, description="Headers adicionales (ej: If-None-Match)")
+    depends_on: List[str] = Field(
+        default_factory=list,
+        description="IDs de sub-requests anteriores que deben terminar (con éxito) antes de ejecutar esta"
+    )
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1, max_length=settings.BATCH_MAX_REQUESTS)
+
+    @model_validator(mode="after")
+    def validate_dependencies(self):
+        """
+        IDs únicos y dependencias solo hacia sub-requests anteriores (sin ciclos)
+        """
+        seen = set()
+        for item in self.requests:
+            if item.id in seen:
+                raise ValueError(f"ID de sub-request repetido: {item.id}")
+            missing = [dep for dep in item.depends_on if dep not in seen]
+            if missing:
+                raise ValueError(
+                    f"La sub-request {item.id} depende de IDs que no la preceden: {', '.join(missing)}"
+                )
+            seen.add(item.id)
+        return self
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "requests": [
+                    {"id": "periodo", "method": "GET", "path": "/periods/active?tipo_periodo=mensual_estandar"},
+                    {"id": "categorias", "method": "GET", "path": "/categories/"},
+                    {
+                        "id": "gasto",
+                        "method": "POST",
+                        "path": "/expenses/?periodo_id=507f1f77bcf86cd799439012",
+                        "body": {"nombre": "Pizza", "monto": 15000, "categoria_id": "507f1f77bcf86cd799439013", "tipo": "variable"}
+                    },
+                    {
+                        "id": "resumen",
+                        "method": "GET",
+                        "path": "/periods/507f1f77bcf86cd799439012/summary",
+                        "depends_on": ["gasto"]
+                    }
+                ]
+            }
+        }
+    }
+
+
+class BatchResponseItem(BaseModel):
+    id: str
+    status: int
+    headers: Dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
@@ -0,0 +1,120 @@
+from typing import List, Literal, Optional, Union
+from bson import ObjectId
+from pydantic import BaseModel, Field, model_validator
+from typing_extensions import Annotated
+
+from app.core.config import settings
+
+from app.models.aporte import AporteCreate, AporteUpdate, AporteResponse
+from app.models.expense import ExpenseCreate, ExpenseUpdate, ExpenseResponse
+
+
+class BulkDelete(BaseModel):
+    op: Literal["delete"]
+    id: str = Field(..., description="ID del documento a eliminar")
+
+
+class ExpenseBulkCreate(BaseModel):
+    op: Literal["create"]
+    periodo_id: str = Field(..., description="ID del período al que pertenece")
+    data: ExpenseCreate
+
+
+class ExpenseBulkUpdate(BaseModel):
+    op: Literal["update"]
+    id: str = Field(..., description="ID del gasto a editar")
+    data: ExpenseUpdate
+
+
+class AporteBulkCreate(BaseModel):
+    op: Literal["create"]
+    periodo_id: str = Field(..., description="ID del período al que pertenece")
+    data: AporteCreate
+
+
+class AporteBulkUpdate(BaseModel):
+    op: Literal["update"]
+    id: str = Field(..., description="ID del aporte a editar")
+    data: AporteUpdate
+
+
+ExpenseBulkOperation = Annotated[
+    Union[ExpenseBulkCreate, ExpenseBulkUpdate, BulkDelete],
+    Field(discriminator="op")
+]
+
+AporteBulkOperation = Annotated[
+    Union[AporteBulkCreate, AporteBulkUpdate, BulkDelete],
+    Field(discriminator="op")
+]
+
+
+class _BulkRequest(BaseModel):
+    @model_validator(mode="after")
+    def validate_ids(self):
+        """
+        IDs con formato de ObjectId y cada documento a lo más en una operación
+        """
+        seen = set()
+        for operation in self.operations:
+            target = operation.periodo_id if operation.op == "create" else operation.id
+            if not ObjectId.is_valid(target):
+                raise ValueError(f"ID inválido: {target}")
+            if operation.op == "create":
+                continue
+            if operation.id in seen:
+                raise ValueError(f"El documento {operation.id} aparece en más de una operación")
+            seen.add(operation.id)
+        return self
+
+
+class ExpenseBulkRequest(_BulkRequest):
+    operations: List[ExpenseBulkOperation] = Field(..., min_length=1, max_length=settings.BULK_MAX_OPERATIONS)
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "operations": [
+                    {
+                        "op": "create",
+                        "periodo_id": "507f1f77bcf86cd799439012",
+                        "data": {"nombre": "Pizza", "monto": 15000, "categoria_id": "507f1f77bcf86cd799439013", "tipo": "variable"}
+                    },
+                    {"op": "update", "id": "507f1f77bcf86cd799439014", "data": {"monto": 9990}},
+                    {"op": "delete", "id": "507f1f77bcf86cd799439015"}
+                ]
+            }
+        }
+    }
+
+
+class AporteBulkRequest(_BulkRequest):
+    operations: List[AporteBulkOperation] = Field(..., min_length=1, max_length=settings.BULK_MAX_OPERATIONS)
+
+
+class ExpenseBulkResult(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None  # None en una creación que no se aplicó
+    item: Optional[ExpenseResponse] = None  # None en las eliminaciones y en las que fallaron
+    error: Optional[str] = None  # Motivo si la operación no se aplicó
+
+
+class AporteBulkResult(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None  # None en una creación que no se aplicó
+    item: Optional[AporteResponse] = None  # None en las eliminaciones y en las que fallaron
+    error: Optional[str] = None  # Motivo si la operación no se aplicó
+
+
+class ExpenseBulkResponse(BaseModel):
+    """
+    Resultado de cada operación, en el mismo orden del request
+    """
+    results: List[ExpenseBulkResult]
+
+
+class AporteBulkResponse(BaseModel):
+    """
+    Resultado de cada operación, en el mismo orden del request
+    """
+    results: List[AporteBulkResult]
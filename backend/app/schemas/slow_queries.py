@@ -0,0 +1,14 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class ProfilerSettings(BaseModel):
+    """
+    Activar o desactivar el profiler de MongoDB (nivel 1: solo operaciones lentas)
+    """
+    enabled: bool
+    slowms: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Umbral en milisegundos; al activar sin indicarlo, SLOW_QUERY_DEFAULT_SLOWMS (al desactivar no se cambia)"
+    )
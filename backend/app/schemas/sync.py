@@ -0,0 +1,33 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+from app.models.aporte import AporteResponse
+from app.models.category import CategoryResponse
+from app.models.expense import ExpenseResponse
+from app.models.period import PeriodResponse
+
+
+class SyncDeletions(BaseModel):
+    """
+    IDs eliminados desde el token, por colección
+    """
+    periods: List[str] = Field(default_factory=list)
+    expenses: List[str] = Field(default_factory=list)
+    aportes: List[str] = Field(default_factory=list)
+    categories: List[str] = Field(default_factory=list)
+
+
+class SyncResponse(BaseModel):
+    """
+    Cambios desde el token recibido y el token para la próxima sincronización
+    """
+    token: str = Field(..., description="Token opaco para el próximo GET /sync?since=")
+    full: bool = Field(
+        ...,
+        description="True si es una sincronización completa: el cliente debe reemplazar su copia local"
+    )
+    periods: List[PeriodResponse] = Field(default_factory=list)
+    expenses: List[ExpenseResponse] = Field(default_factory=list)
+    aportes: List[AporteResponse] = Field(default_factory=list)
+    categories: List[CategoryResponse] = Field(default_factory=list)
+    deleted: SyncDeletions = Field(default_factory=SyncDeletions)
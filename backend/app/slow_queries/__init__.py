@@ -0,0 +1,146 @@
+"""
+Consultas lentas a partir del profiler de MongoDB (system.profile).
+
+- El profiler se activa en nivel 1: MongoDB guarda en system.profile solo
+  las operaciones que tardan más que slowms (colección capped, por base de datos)
+- El reporte agrupa las operaciones por forma normalizada (operación +
+  colección + filtro o pipeline sin valores, la misma de
+  app.core.command_accounting) con cantidad, p50/p95, claves y documentos
+  examinados frente a los devueltos, y los planes usados
+- Cada forma se asocia al método del CRUD que la lanzó gracias al comment
+  que agregan las colecciones del CRUD (app.core.query_tags)
+
+Se usa desde GET/PUT /admin/slow-queries y desde la CLI:
+    python -m app.slow_queries status
+    python -m app.slow_queries on [--slowms MS]
+    python -m app.slow_queries off
+    python -m app.slow_queries report [--minutes M] [--limit N]
+"""
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.core.command_accounting import command_method, command_shape
+from app.core.config import settings
+
+PROFILE_COLLECTION = "system.profile"
+
+# Operaciones de system.profile que describen una sola sentencia de un update/delete
+_STATEMENT_OPS = {"update": "update", "remove": "delete"}
+
+
+async def get_profiler_status(db) -> Dict:
+    result = await db.command("profile", -1)
+    return {
+        "enabled": result.get("was", 0) > 0,
+        "level": result.get("was", 0),
+        "slowms": result.get("slowms"),
+        "sample_rate": result.get("sampleRate"),
+    }
+
+
+async def set_profiler(db, enabled: bool, slowms: Optional[int] = None) -> Dict:
+    """
+    Activar (nivel 1, solo lentas) o desactivar el profiler; retorna el estado nuevo.
+
+    slowms es del servidor completo (también decide qué va al log de operaciones
+    lentas): al desactivar sin indicarlo no se toca el valor actual.
+    """
+    command = {"profile": 1 if enabled else 0}
+    if slowms is not None:
+        command["slowms"] = slowms
+    elif enabled:
+        command["slowms"] = settings.SLOW_QUERY_DEFAULT_SLOWMS
+    await db.command(command)
+    return await get_profiler_status(db)
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    # Nearest-rank
+    index = max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _entry_shape(entry: dict) -> Tuple[str, str, Optional[str]]:
+    """
+    (colección, forma, método de origen) de una entrada de system.profile
+    """
+    collection = entry.get("ns", "").partition(".")[2]
+    command = entry.get("originatingCommand") or entry.get("command") or {}
+
+    op = entry.get("op")
+    if op in _STATEMENT_OPS and "q" in command:
+        name = _STATEMENT_OPS[op]
+        shape = command_shape(name, {name: collection, f"{name}s": [command]})
+    else:
+        name = next(iter(command), op or "")
+        shape = command_shape(name, command)
+
+    return collection, shape, command_method(command)
+
+
+def analyze(entries: List[dict]) -> List[Dict]:
+    """
+    Agrupar entradas de system.profile por forma, de mayor a menor tiempo total
+    """
+    groups: Dict[Tuple[str, str], Dict] = {}
+    for entry in entries:
+        collection, shape, method = _entry_shape(entry)
+        group = groups.get((collection, shape))
+        if group is None:
+            group = groups[(collection, shape)] = {
+                "collection": collection,
+                "shape": shape,
+                "durations": [],
+                "keys_examined": 0,
+                "docs_examined": 0,
+                "docs_returned": 0,
+                "plans": Counter(),
+                "methods": Counter(),
+            }
+        group["durations"].append(entry.get("millis", 0))
+        group["keys_examined"] += entry.get("keysExamined", 0)
+        group["docs_examined"] += entry.get("docsExamined", 0)
+        group["docs_returned"] += entry.get("nreturned", 0)
+        if entry.get("planSummary"):
+            group["plans"][entry["planSummary"]] += 1
+        group["methods"][method or "desconocido"] += 1
+
+    report = []
+    for group in groups.values():
+        durations = sorted(group.pop("durations"))
+        docs_returned = group["docs_returned"]
+        report.append({
+            **group,
+            "count": len(durations),
+            "total_ms": sum(durations),
+            "p50_ms": _percentile(durations, 50),
+            "p95_ms": _percentile(durations, 95),
+            "max_ms": durations[-1],
+            # Muy por encima de 1: el índice no filtra y MongoDB lee de más
+            "examined_per_returned": round(max(group["keys_examined"], group["docs_examined"]) / max(docs_returned, 1), 1),
+            "plans": dict(group["plans"].most_common()),
+            "methods": dict(group["methods"].most_common()),
+        })
+    report.sort(key=lambda item: item["total_ms"], reverse=True)
+    return report
+
+
+async def slow_query_report(db, since: datetime, limit: int) -> Dict:
+    """
+    Formas de consulta lentas desde `since` (las `limit` de mayor tiempo total)
+    """
+    cursor = db[PROFILE_COLLECTION].find(
+        {"ts": {"$gte": since}, "ns": {"$ne": f"{db.name}.{PROFILE_COLLECTION}"}},
+        {"ns": 1, "op": 1, "command": 1, "originatingCommand": 1, "millis": 1,
+         "keysExamined": 1, "docsExamined": 1, "nreturned": 1, "planSummary": 1}
+    ).sort("ts", -1).limit(settings.SLOW_QUERY_MAX_ENTRIES)
+    entries = await cursor.to_list(length=settings.SLOW_QUERY_MAX_ENTRIES)
+
+    return {
+        "since": since,
+        "entries": len(entries),
+        "truncated": len(entries) >= settings.SLOW_QUERY_MAX_ENTRIES,
+        "shapes": analyze(entries)[:limit],
+    }
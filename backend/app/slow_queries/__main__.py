@@ -0,0 +1,58 @@
+"""
+CLI del profiler de consultas lentas.
+
+Uso (desde backend/):
+    python -m app.slow_queries status
+    python -m app.slow_queries on [--slowms MS]
+    python -m app.slow_queries off
+    python -m app.slow_queries report [--minutes M] [--limit N]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.slow_queries import get_profiler_status, set_profiler, slow_query_report
+
+
+def _print_status(status: dict) -> None:
+    state = "activo" if status["enabled"] else "inactivo"
+    print(f"Profiler {state} (nivel {status['level']}, slowms={status['slowms']})")
+
+
+async def main(args: argparse.Namespace) -> int:
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB_NAME]
+
+    try:
+        if args.command == "status":
+            _print_status(await get_profiler_status(db))
+        elif args.command in ("on", "off"):
+            _print_status(await set_profiler(db, args.command == "on", args.slowms))
+        else:
+            since = datetime.utcnow() - timedelta(minutes=args.minutes)
+            report = await slow_query_report(db, since, args.limit)
+            print(f"{report['entries']} operaciones lentas desde {since:%Y-%m-%d %H:%M} UTC"
+                  f"{' (truncado)' if report['truncated'] else ''}")
+            for shape in report["shapes"]:
+                print(f"\n{shape['count']:>6}x  p50={shape['p50_ms']}ms  p95={shape['p95_ms']}ms  "
+                      f"total={shape['total_ms']}ms  examinados/devueltos={shape['examined_per_returned']}")
+                print(f"        {shape['shape']}")
+                print(f"        métodos: {', '.join(f'{method} ({count})' for method, count in shape['methods'].items())}")
+                if shape["plans"]:
+                    print(f"        planes: {', '.join(f'{plan} ({count})' for plan, count in shape['plans'].items())}")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.slow_queries", description="Profiler de consultas lentas de MongoDB")
+    parser.add_argument("command", choices=["status", "on", "off", "report"])
+    parser.add_argument("--slowms", type=int, default=None, help="Umbral en milisegundos (on)")
+    parser.add_argument("--minutes", type=int, default=60, help="Ventana del reporte en minutos (report)")
+    parser.add_argument("--limit", type=int, default=20, help="Formas de consulta a mostrar (report)")
+
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
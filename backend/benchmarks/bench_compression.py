@@ -0,0 +1,63 @@
+"""
+Benchmark: compresión de la lista de gastos (GET /expenses).
+
+Mide, para cada codificación y nivel, el tamaño resultante y el tiempo de
+compresión del JSON de una lista de gastos, para elegir los niveles por
+defecto de COMPRESSION_*.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_compression [--items 500] [--repeat 20]
+"""
+import argparse
+import time
+import zlib
+
+from app.api.v1.endpoints.expenses import serialize_expense
+from app.core.serialization import dumps
+from app.crud.document_layout import from_storage
+from benchmarks.bench_list_serialization import make_documents
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def candidates():
+    for level in (1, 6, 9):
+        yield "gzip", level, lambda data, level=level: zlib.compress(data, level)
+    if brotli is not None:
+        for quality in (1, 4, 6, 11):
+            yield "br", quality, lambda data, quality=quality: brotli.compress(data, quality=quality)
+    if zstandard is not None:
+        for level in (1, 3, 9, 19):
+            compressor = zstandard.ZstdCompressor(level=level)
+            yield "zstd", level, compressor.compress
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = dumps([serialize_expense(from_storage(doc)) for doc in make_documents(args.items)])
+    print(f"Payload: {args.items} gastos, {len(payload)} bytes sin comprimir\n")
+    print(f"{'codificación':<14}{'nivel':>6}{'bytes':>10}{'ratio':>8}{'ms':>9}")
+
+    for encoding, level, compress in candidates():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            compressed = compress(payload)
+        elapsed_ms = (time.perf_counter() - start) * 1000 / args.repeat
+        ratio = len(payload) / len(compressed)
+        print(f"{encoding:<14}{level:>6}{len(compressed):>10}{ratio:>8.1f}{elapsed_ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
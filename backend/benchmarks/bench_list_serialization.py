@@ -0,0 +1,113 @@
+"""
+Benchmark: serialización de listas de gastos (GET /expenses).
+
+Compara el camino anterior (documento -> ExpenseInDB -> ExpenseResponse ->
+validación de response_model + jsonable_encoder -> json) con el camino rápido
+(serializador precompilado + orjson).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_list_serialization [--items 5000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from starlette.responses import JSONResponse
+
+from app.api.v1.endpoints.expenses import serialize_expense
+from app.core.serialization import dumps
+from app.crud.document_layout import from_storage
+from app.models.expense import ExpenseInDB, ExpenseResponse
+
+
+def make_documents(count: int) -> List[dict]:
+    """Documentos con la forma compacta almacenada en MongoDB"""
+    user_id, periodo_id = ObjectId(), ObjectId()
+    categorias = [ObjectId() for _ in range(4)]
+    base = datetime(2025, 1, 1)
+    documents = []
+    for i in range(count):
+        document = {
+            "_id": ObjectId.from_datetime(base + timedelta(minutes=i)),
+            "user_id": user_id,
+            "periodo_id": periodo_id,
+            "categoria_id": categorias[i % 4],
+            "nombre": f"Gasto {i}",
+            "monto": 1000 + i,
+            "tipo": "fijo" if i % 3 == 0 else "variable",
+        }
+        if i % 3 == 0:
+            document["es_permanente"] = True
+        if i % 5 == 0:
+            document["descripcion"] = "Nota del gasto"
+        documents.append(document)
+    return documents
+
+
+def old_path(documents: List[dict], response_field) -> bytes:
+    expenses = [ExpenseInDB(**from_storage(dict(doc))) for doc in documents]
+    responses = [
+        ExpenseResponse(
+            _id=str(exp.id),
+            user_id=str(exp.user_id),
+            periodo_id=str(exp.periodo_id),
+            categoria_id=str(exp.categoria_id),
+            nombre=exp.nombre,
+            monto=exp.monto,
+            tipo=exp.tipo,
+            es_permanente=exp.es_permanente,
+            periodos_restantes=exp.periodos_restantes,
+            descripcion=exp.descripcion,
+            fecha_registro=exp.fecha_registro,
+            created_at=exp.created_at,
+            updated_at=exp.updated_at
+        )
+        for exp in expenses
+    ]
+    content = asyncio.run(serialize_response(field=response_field, response_content=responses))
+    return JSONResponse(content).body
+
+
+def fast_path(documents: List[dict]) -> bytes:
+    return dumps([serialize_expense(from_storage(dict(doc))) for doc in documents])
+
+
+def timed(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = make_documents(args.items)
+    response_field = create_response_field(name="response", type_=List[ExpenseResponse])
+
+    # Ambos caminos deben producir el mismo JSON
+    assert json.loads(old_path(documents, response_field)) == json.loads(fast_path(documents))
+
+    old = timed(lambda: old_path(documents, response_field), args.repeat)
+    fast = timed(lambda: fast_path(documents), args.repeat)
+    size = len(fast_path(documents))
+
+    print(f"{args.items} gastos, {size / 1024:.0f} KiB de JSON (mejor de {args.repeat})")
+    print(f"  modelos + response_model + json: {old * 1000:8.1f} ms")
+    print(f"  serializador + orjson:           {fast * 1000:8.1f} ms  ({old / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: JSON vs MessagePack para la lista de gastos (GET /expenses).
+
+Mide, para cada formato, codificar en el servidor (serializador precompilado +
+orjson / packb), el tamaño del body y decodificar en un cliente Python
+(orjson.loads / unpackb con ObjectId y timestamps nativos).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_msgpack [--items 5000] [--repeat 5]
+"""
+import argparse
+
+import orjson
+
+from app.api.v1.endpoints.expenses import serialize_expense
+from app.core.serialization import MSGPACK_MEDIA_TYPE, dumps, packb, response_format, unpackb
+from app.crud.document_layout import from_storage
+from benchmarks.bench_list_serialization import make_documents, timed
+
+
+def encode_json(documents) -> bytes:
+    serialize = serialize_expense.only(None)
+    return dumps([serialize(from_storage(dict(doc))) for doc in documents])
+
+
+def encode_msgpack(documents) -> bytes:
+    token = response_format.set(MSGPACK_MEDIA_TYPE)
+    try:
+        serialize = serialize_expense.only(None)
+        return packb([serialize(from_storage(dict(doc))) for doc in documents])
+    finally:
+        response_format.reset(token)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = make_documents(args.items)
+    json_body = encode_json(documents)
+    msgpack_body = encode_msgpack(documents)
+
+    # Mismo contenido: los IDs nativos de MessagePack equivalen a los strings de JSON
+    decoded = orjson.loads(dumps(unpackb(msgpack_body)))
+    assert [{**item, "fecha_registro": None, "created_at": None, "updated_at": None} for item in decoded] == \
+        [{**item, "fecha_registro": None, "created_at": None, "updated_at": None} for item in orjson.loads(json_body)]
+
+    rows = [
+        ("JSON (orjson)", json_body, lambda: encode_json(documents), lambda: orjson.loads(json_body)),
+        ("MessagePack", msgpack_body, lambda: encode_msgpack(documents), lambda: unpackb(msgpack_body)),
+    ]
+
+    print(f"{args.items} gastos (mejor de {args.repeat})")
+    print(f"  {'formato':<16}{'KiB':>8}{'codificar ms':>15}{'decodificar ms':>17}")
+    for name, body, encode, decode in rows:
+        encode_ms = timed(encode, args.repeat) * 1000
+        decode_ms = timed(decode, args.repeat) * 1000
+        print(f"  {name:<16}{len(body) / 1024:>8.0f}{encode_ms:>15.1f}{decode_ms:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
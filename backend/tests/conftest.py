@@ -0,0 +1,35 @@
+"""
+Fixtures comunes: una base de datos mongomock por test.
+
+mongomock no acepta el argumento comment que agregan las colecciones del CRUD
+(app.core.query_tags), así que se descarta antes de llegar a mongomock.
+"""
+import functools
+
+import mongomock
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core.query_tags import _TAGGED_METHODS
+
+
+def _without_comment(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        kwargs.pop("comment", None)
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+for _name in _TAGGED_METHODS:
+    setattr(mongomock.Collection, _name, _without_comment(getattr(mongomock.Collection, _name)))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test"]
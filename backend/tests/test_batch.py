@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.dependencies import get_current_active_user
+from app.api.v1.endpoints import batch
+from app.core import unit_of_work
+from app.core.config import settings
+from app.models.user import UserInDB
+
+probe = APIRouter()
+seen_units = []
+
+
+@probe.get("/probe")
+async def probe_unit_of_work():
+    current = unit_of_work.current_unit_of_work()
+    seen_units.append(current)
+    # Deja correr a la otra sub-request en el medio
+    await asyncio.sleep(0.01)
+    return {"same_during_request": unit_of_work.current_unit_of_work() is current}
+
+
+@probe.get("/slow")
+async def slow():
+    await asyncio.sleep(5)
+    return {}
+
+
+@probe.get("/events/summary")
+async def stream():
+    raise AssertionError("las rutas de streaming no se despachan")
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(batch.router, prefix=f"{settings.API_V1_STR}/batch")
+    app.include_router(probe, prefix=settings.API_V1_STR)
+    user = UserInDB(_id=ObjectId(), username="batch", email="batch@example.com", first_name="B",
+                    last_name="T", hashed_password="x", created_at=datetime.utcnow(), updated_at=datetime.utcnow())
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    seen_units.clear()
+    return TestClient(app, headers={"Authorization": "Bearer token"})
+
+
+def post_batch(client, *items):
+    response = client.post(f"{settings.API_V1_STR}/batch", json={"requests": list(items)})
+    assert response.status_code == 200
+    return {item["id"]: item for item in response.json()["responses"]}
+
+
+def test_each_sub_request_gets_its_own_unit_of_work(client):
+    responses = post_batch(client, {"id": "a", "path": "/probe"}, {"id": "b", "path": "/probe"})
+
+    assert responses["a"]["body"] == {"same_during_request": True}
+    assert responses["b"]["body"] == {"same_during_request": True}
+    assert len(seen_units) == 2
+    assert None not in seen_units
+    assert seen_units[0] is not seen_units[1]
+
+
+def test_streaming_routes_are_rejected(client):
+    responses = post_batch(client, {"id": "sse", "path": "/events/summary"})
+
+    assert responses["sse"]["status"] == 400
+
+
+def test_slow_sub_request_times_out_without_blocking_the_batch(client, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_ITEM_TIMEOUT_SECONDS", 0.05)
+
+    responses = post_batch(client, {"id": "slow", "path": "/slow"}, {"id": "fast", "path": "/probe"})
+
+    assert responses["slow"]["status"] == 504
+    assert responses["fast"]["status"] == 200
+
+
+def test_request_limit_is_enforced_by_the_schema(client):
+    items = [{"id": str(index), "path": "/probe"} for index in range(settings.BATCH_MAX_REQUESTS + 1)]
+
+    response = client.post(f"{settings.API_V1_STR}/batch", json={"requests": items})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "too_long"
+    assert seen_units == []
+    schema = client.app.openapi()["components"]["schemas"]["BatchRequest"]["properties"]["requests"]
+    assert schema["maxItems"] == settings.BATCH_MAX_REQUESTS
@@ -0,0 +1,91 @@
+import pytest
+from bson import ObjectId
+from pydantic import ValidationError
+
+from app.api.bulk import apply_bulk_operations
+from app.api.v1.endpoints.expenses import serialize_expense
+from app.core.config import settings
+from app.crud.expense import ExpenseCRUD
+from app.schemas.bulk import ExpenseBulkRequest
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = ObjectId()
+CATEGORIA_ID = str(ObjectId())
+
+
+def expense(nombre):
+    return {"nombre": nombre, "monto": 1000, "categoria_id": CATEGORIA_ID, "tipo": "variable"}
+
+
+@pytest.fixture
+async def period_id(db):
+    result = await db.periods.insert_one({"user_id": USER_ID, "tipo_periodo": "mensual_estandar"})
+    return result.inserted_id
+
+
+async def insert_expense(db, period_id, nombre):
+    result = await db.expenses.insert_one({**expense(nombre), "categoria_id": ObjectId(CATEGORIA_ID),
+                                           "user_id": USER_ID, "periodo_id": period_id})
+    return str(result.inserted_id)
+
+
+async def run_bulk(db, operations):
+    request = ExpenseBulkRequest(operations=operations)
+    return await apply_bulk_operations(db, str(USER_ID), request.operations, ExpenseCRUD(db),
+                                       serialize_expense, not_found_detail="Expense not found")
+
+
+async def period_version(db, period_id):
+    versions = await db.data_versions.find_one({"_id": USER_ID}) or {}
+    return versions.get("periods", {}).get(str(period_id), 0)
+
+
+async def test_applies_all_operations_with_versions_and_tombstones(db, period_id):
+    to_update = await insert_expense(db, period_id, "luz")
+    to_delete = await insert_expense(db, period_id, "agua")
+
+    results = await run_bulk(db, [
+        {"op": "create", "periodo_id": str(period_id), "data": expense("pan")},
+        {"op": "update", "id": to_update, "data": {"monto": 2500}},
+        {"op": "delete", "id": to_delete},
+    ])
+
+    assert [result["op"] for result in results] == ["create", "update", "delete"]
+    assert not any(result.get("error") for result in results)
+    assert results[1]["item"]["monto"] == 2500
+    assert await db.expenses.count_documents({}) == 2
+    assert await db.deletions.count_documents({"doc_id": ObjectId(to_delete)}) == 1
+    assert await period_version(db, period_id) == 1
+
+
+async def test_partial_failure_keeps_versions_of_applied_writes(db, period_id):
+    await db.expenses.create_index("nombre", unique=True)
+    to_update = await insert_expense(db, period_id, "luz")
+    to_delete = await insert_expense(db, period_id, "agua")
+
+    results = await run_bulk(db, [
+        {"op": "delete", "id": to_delete},
+        {"op": "create", "periodo_id": str(period_id), "data": expense("pan")},
+        {"op": "create", "periodo_id": str(period_id), "data": expense("luz")},
+        {"op": "update", "id": to_update, "data": {"monto": 2500}},
+    ])
+
+    # Orden de escritura: creaciones, ediciones, eliminaciones; se detiene en la duplicada
+    delete, created, duplicate, update = results
+    assert created["item"]["nombre"] == "pan" and "error" not in created
+    assert "E11000" in duplicate["error"]
+    assert update["error"] and update["item"] is None
+    assert delete["error"] and delete["item"] is None
+
+    assert await db.expenses.count_documents({"_id": ObjectId(to_delete)}) == 1
+    assert await db.deletions.count_documents({}) == 0
+    # La creación aplicada sí invalida los ETags del período
+    assert await period_version(db, period_id) == 1
+
+
+def test_operation_limit_is_enforced_by_the_schema():
+    operation = {"op": "delete", "id": str(ObjectId())}
+    with pytest.raises(ValidationError) as error:
+        ExpenseBulkRequest(operations=[operation] * (settings.BULK_MAX_OPERATIONS + 1))
+    assert error.value.errors()[0]["type"] == "too_long"
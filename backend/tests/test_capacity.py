@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pytest
+
+from app.capacity import _cache_outlook, _month_start, _percentile, project_growth
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def capacity_settings(monkeypatch):
+    monkeypatch.setattr(settings, "CAPACITY_TREND_MONTHS", 3)
+    monkeypatch.setattr(settings, "CAPACITY_INDEX_CACHE_TARGET", 0.5)
+
+
+@pytest.mark.parametrize("percentile, expected", [(50, 5), (90, 9), (99, 10), (100, 10), (0, 1)])
+def test_percentile_is_nearest_rank(percentile, expected):
+    assert _percentile(list(range(1, 11)), percentile) == expected
+
+
+def test_percentile_of_a_single_value():
+    assert _percentile([7], 50) == 7
+    assert _percentile([7], 99) == 7
+
+
+def test_month_start_crosses_years():
+    moment = datetime(2024, 2, 15, 10, 30)
+
+    assert _month_start(moment) == datetime(2024, 2, 1)
+    assert _month_start(moment, 2) == datetime(2023, 12, 1)
+    assert _month_start(moment, 14) == datetime(2022, 12, 1)
+
+
+def histogram(*counts):
+    return [{"month": datetime(2024, month, 1), "count": count} for month, count in enumerate(counts, 1)]
+
+
+def test_project_growth_uses_complete_months_only():
+    stats = {"count": 1000, "size": 200_000, "storage_size": 80_000, "total_index_size": 50_000}
+
+    # Se promedian los 3 últimos meses completos (20, 30, 40); el mes actual (500) está incompleto
+    projection = project_growth(stats, histogram(999, 20, 30, 40, 500), projection_months=12)
+
+    assert projection["monthly_documents"] == 30
+    assert projection["documents"] == 1000 + 30 * 12
+    assert projection["size"] == round(200_000 * 1.36)
+    assert projection["storage_size"] == round(80_000 * 1.36)
+    assert projection["total_index_size"] == round(50_000 * 1.36)
+    assert projection["monthly_index_bytes"] == 50 * 30
+
+
+def test_project_growth_without_history_or_documents():
+    stats = {"count": 0, "size": 0, "storage_size": 4096, "total_index_size": 4096}
+
+    projection = project_growth(stats, histogram(0), projection_months=6)
+
+    assert projection["monthly_documents"] == 0
+    assert projection["documents"] == 0
+    assert projection["storage_size"] == 0
+    assert projection["monthly_index_bytes"] == 0
+
+
+def totals(index_bytes, monthly_index_bytes, projected_index_size):
+    return {
+        "total_index_size": index_bytes,
+        "monthly_index_bytes": monthly_index_bytes,
+        "projected_index_size": projected_index_size,
+    }
+
+
+def test_cache_outlook_months_until_index_target():
+    cache = {"maximum_bytes": 1000, "current_bytes": 600}
+
+    outlook = _cache_outlook(totals(200, 25, 500), cache, projection_months=12)
+
+    # Objetivo: 50% de 1000 = 500 bytes; faltan 300 a 25 por mes
+    assert outlook["months_until_index_target"] == 12
+    assert outlook["index_ratio"] == 0.2
+    assert outlook["projected_index_ratio"] == 0.5
+    assert outlook["current_bytes"] == 600
+
+
+def test_cache_outlook_edge_cases():
+    cache = {"maximum_bytes": 1000, "current_bytes": 0}
+
+    assert _cache_outlook(totals(600, 25, 900), cache, 12)["months_until_index_target"] == 0
+    assert _cache_outlook(totals(200, 0, 200), cache, 12)["months_until_index_target"] is None
+    assert _cache_outlook(totals(200, 25, 500), None, 12) is None
+    assert _cache_outlook(totals(200, 25, 500), {"maximum_bytes": 0, "current_bytes": 0}, 12) is None
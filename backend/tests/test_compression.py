@@ -0,0 +1,101 @@
+import asyncio
+import gzip
+
+import brotli
+import pytest
+import zstandard
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+SUPPORTED = ["br", "zstd", "gzip"]
+
+DECODERS = {
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+    "gzip": gzip.decompress,
+}
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br, zstd", "br"),
+    ("gzip, zstd", "zstd"),
+    ("gzip", "gzip"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("br;q=0, *", "zstd"),
+    ("*;q=0.1, gzip;q=0", "br"),
+    ("identity", None),
+    ("", None),
+    ("gzip;q=abc", None),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding, SUPPORTED) == expected
+
+
+async def send_through(response, accept_encoding):
+    """
+    Pasar una respuesta por el middleware y retornar (headers, mensajes de body)
+    """
+    messages = []
+
+    async def receive():
+        # El cliente sigue conectado mientras dura la respuesta
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    await CompressionMiddleware(response)(scope, receive, send)
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    return headers, messages[1:]
+
+
+def large_body():
+    return b'{"nombre": "Arriendo", "monto": 450000}' * 100
+
+
+@pytest.mark.parametrize("encoding", SUPPORTED)
+async def test_large_response_is_compressed(encoding):
+    headers, bodies = await send_through(Response(large_body(), media_type="application/json"), encoding)
+
+    assert headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in headers["vary"]
+    assert int(headers["content-length"]) == len(bodies[0]["body"]) < len(large_body())
+    assert DECODERS[encoding](bodies[0]["body"]) == large_body()
+
+
+async def test_response_under_min_size_is_sent_as_is():
+    body = b"x" * (settings.COMPRESSION_MIN_SIZE - 1)
+
+    headers, bodies = await send_through(PlainTextResponse(body), "br, gzip")
+
+    assert "content-encoding" not in headers
+    assert bodies[0]["body"] == body
+
+
+async def test_other_content_types_and_304_are_not_compressed():
+    headers, _ = await send_through(Response(large_body(), media_type="image/png"), "gzip")
+    assert "content-encoding" not in headers
+
+    headers, _ = await send_through(Response(status_code=304), "gzip")
+    assert "content-encoding" not in headers
+
+
+async def test_streaming_response_is_compressed_in_parts():
+    parts = [b"data: %d\n\n" % number for number in range(5)]
+
+    async def events():
+        for part in parts:
+            yield part
+
+    headers, bodies = await send_through(StreamingResponse(events(), media_type="text/event-stream"), "gzip")
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    # Cada parte sale comprimida y con flush, sin esperar el final del stream
+    assert len([message for message in bodies if message.get("more_body")]) == len(parts)
+    assert gzip.decompress(b"".join(message["body"] for message in bodies)) == b"".join(parts)
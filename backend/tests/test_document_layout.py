@@ -0,0 +1,140 @@
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.crud.document_layout import from_storage, to_storage
+from app.migrations.runner import STATUS_COMPLETED, MigrationRunner
+from app.migrations.versions.v0003_compact_expense_aporte_layout import migration
+from app.models.aporte import AporteInDB
+from app.models.expense import ExpenseInDB
+
+pytestmark = pytest.mark.anyio
+
+
+def created_now():
+    _id = ObjectId()
+    return _id, _id.generation_time.replace(tzinfo=None)
+
+
+def expense(**fields):
+    _id, created_at = created_now()
+    document = {
+        "_id": _id,
+        "user_id": ObjectId(),
+        "periodo_id": ObjectId(),
+        "categoria_id": ObjectId(),
+        "nombre": "Netflix",
+        "monto": 9990,
+        "tipo": "fijo",
+        "es_permanente": None,
+        "periodos_restantes": None,
+        "descripcion": None,
+        "fecha_registro": created_at,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+    document.update(fields)
+    return document
+
+
+def aporte(**fields):
+    _id, created_at = created_now()
+    document = {
+        "_id": _id,
+        "user_id": ObjectId(),
+        "periodo_id": ObjectId(),
+        "categoria_id": ObjectId(),
+        "nombre": "Aporte pareja",
+        "monto": 170000,
+        "es_fijo": True,
+        "descripcion": None,
+        "fecha_registro": created_at,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+    document.update(fields)
+    return document
+
+
+def stored(document):
+    compact = to_storage(dict(document))
+    compact["_id"] = document["_id"]
+    return compact
+
+
+@pytest.mark.parametrize("fields", [
+    {},
+    {"es_permanente": True},
+    {"es_permanente": False, "periodos_restantes": 3},
+    {"descripcion": "Plan familiar"},
+])
+def test_expense_round_trip(fields):
+    original = expense(**fields)
+
+    compact = stored(original)
+
+    assert not {"fecha_registro", "created_at", "updated_at"} & compact.keys()
+    assert None not in compact.values()
+    assert ExpenseInDB(**from_storage(compact)) == ExpenseInDB(**original)
+
+
+@pytest.mark.parametrize("descripcion", [None, "Venta de celular"])
+def test_aporte_round_trip(descripcion):
+    original = aporte(descripcion=descripcion)
+
+    assert AporteInDB(**from_storage(stored(original))) == AporteInDB(**original)
+
+
+def test_created_at_is_derived_from_the_object_id():
+    _id = ObjectId()
+
+    document = from_storage({"_id": _id})
+
+    assert document["created_at"] == _id.generation_time.replace(tzinfo=None)
+    assert document["fecha_registro"] == document["created_at"]
+    assert document["updated_at"] == document["created_at"]
+
+
+def test_explicit_timestamps_are_kept():
+    original = expense()
+    edited_at = original["created_at"] + timedelta(days=3)
+    fecha_registro = original["created_at"] - timedelta(days=10)
+
+    document = from_storage({"_id": original["_id"], "updated_at": edited_at, "fecha_registro": fecha_registro})
+
+    assert document["updated_at"] == edited_at
+    assert document["fecha_registro"] == fecha_registro
+
+
+async def test_migration_compacts_documents_without_changing_what_is_read(db):
+    created_at = expense()["created_at"]
+    expenses = [
+        expense(),
+        expense(es_permanente=False, periodos_restantes=2, descripcion="Cuotas"),
+        # Editado después de crearse y con una fecha de registro elegida por el usuario
+        expense(updated_at=created_at + timedelta(hours=5), fecha_registro=created_at - timedelta(days=2)),
+    ]
+    aportes = [aporte(), aporte(descripcion="Reembolso")]
+    await db.expenses.insert_many([dict(document) for document in expenses])
+    await db.aportes.insert_many([dict(document) for document in aportes])
+    runner = MigrationRunner(db, batch_size=2, batch_delay_ms=0, lock_ttl_seconds=60, on_progress=lambda progress: None)
+
+    result = await runner.run(migration)
+
+    assert result.status == STATUS_COMPLETED
+    for original in expenses:
+        compact = await db.expenses.find_one({"_id": original["_id"]})
+        assert "created_at" not in compact and None not in compact.values()
+        assert ExpenseInDB(**from_storage(compact)) == ExpenseInDB(**original)
+    for original in aportes:
+        compact = await db.aportes.find_one({"_id": original["_id"]})
+        assert "created_at" not in compact and None not in compact.values()
+        assert AporteInDB(**from_storage(compact)) == AporteInDB(**original)
+
+    edited = await db.expenses.find_one({"_id": expenses[2]["_id"]})
+    assert {"updated_at", "fecha_registro"} <= edited.keys()
+    # Lo que aún coincide con el filtro (timestamps propios) no genera más cambios
+    for collection in migration.collections:
+        async for document in db[collection].find(migration.query(collection)):
+            assert migration.build_operations(collection, document) == []
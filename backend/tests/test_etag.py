@@ -0,0 +1,29 @@
+from fastapi import Request
+
+from app.core.etag import is_not_modified, make_etag
+
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/api/v1/expenses/",
+                    "query_string": b"periodo_id=1", "headers": headers})
+
+
+def test_etag_is_weak_because_it_identifies_data_not_bytes():
+    assert make_etag("user", 3, make_request()).startswith('W/"3-')
+
+
+def test_if_none_match_matches_weak_and_strong_forms():
+    etag = make_etag("user", 3, make_request())
+    opaque = etag.removeprefix("W/")
+
+    assert is_not_modified(make_request(etag), etag)
+    assert is_not_modified(make_request(f'"other", {opaque}'), etag)
+    assert not is_not_modified(make_request('W/"4-abc"'), etag)
+    assert not is_not_modified(make_request(), etag)
+
+
+def test_etag_changes_with_version_and_query():
+    request = make_request()
+    assert make_etag("user", 3, request) != make_etag("user", 4, request)
+    assert make_etag("user", 3, request) != make_etag("other", 3, request)
@@ -0,0 +1,33 @@
+import pytest
+
+from app.core import command_accounting, health
+from app.core.command_accounting import RequestCommandStats, current_command_stats
+
+pytestmark = pytest.mark.anyio
+
+
+class PingRecorder:
+    """
+    Base de datos que registra la contabilidad de comandos activa en cada ping
+    """
+
+    def __init__(self):
+        self.stats_seen = []
+
+    async def command(self, name):
+        self.stats_seen.append(current_command_stats())
+        return {"ok": 1}
+
+
+async def test_shared_readiness_check_is_not_charged_to_the_first_probe(monkeypatch):
+    monkeypatch.setattr(health, "_cached", None)
+    monkeypatch.setattr(health, "_in_flight", None)
+    db = PingRecorder()
+    token = command_accounting._current.set(RequestCommandStats())
+    try:
+        result = await health.readiness(db)
+    finally:
+        command_accounting._current.reset(token)
+
+    assert "mongo" in result["checks"]
+    assert db.stats_seen == [None]
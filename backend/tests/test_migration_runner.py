@@ -0,0 +1,102 @@
+import pytest
+from pymongo import UpdateOne
+
+from app.migrations.base import BatchedMigration
+from app.migrations.runner import (
+    LOCK_ID, STATUS_COMPLETED, STATUS_FAILED, MigrationRunner
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class MarkMigration(BatchedMigration):
+    version = "9999"
+    name = "mark"
+    description = "Marcar documentos"
+    collections = ("items",)
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+
+    def query(self, collection):
+        return {"marked": {"$exists": False}}
+
+    def build_operations(self, collection, document):
+        if document["_id"] == self.fail_on:
+            raise RuntimeError("falla simulada")
+        return [UpdateOne({"_id": document["_id"]}, {"$set": {"marked": True}})]
+
+
+def make_runner(db, **kwargs):
+    return MigrationRunner(db, batch_size=2, batch_delay_ms=0, lock_ttl_seconds=60,
+                           on_progress=lambda progress: None, **kwargs)
+
+
+async def test_run_migrates_in_batches_and_completes(db):
+    await db.items.insert_many([{"_id": i} for i in range(5)])
+    runner = make_runner(db)
+
+    result = await runner.run(MarkMigration())
+
+    assert result.status == STATUS_COMPLETED
+    assert result.progress[0].processed == 5
+    assert result.progress[0].modified == 5
+    assert result.progress[0].batches == 3
+    assert await db.items.count_documents({"marked": True}) == 5
+    state = await db.migrations.find_one({"_id": "9999_mark"})
+    assert state["status"] == STATUS_COMPLETED
+    assert state["progress"]["items"]["last_id"] == 4
+
+
+async def test_failed_migration_resumes_after_last_saved_batch(db):
+    await db.items.insert_many([{"_id": i} for i in range(5)])
+    runner = make_runner(db)
+
+    failed = await runner.run(MarkMigration(fail_on=3))
+    assert failed.status == STATUS_FAILED
+    assert (await db.migrations.find_one({"_id": "9999_mark"}))["progress"]["items"]["processed"] == 2
+
+    resumed = await runner.run(MarkMigration())
+    assert resumed.status == STATUS_COMPLETED
+    # Retoma desde el último _id guardado sin volver a leer los dos primeros
+    assert resumed.progress[0].processed == 5
+    assert resumed.progress[0].batches == 2
+    assert await db.items.count_documents({"marked": True}) == 5
+
+
+async def test_dry_run_counts_without_writing(db):
+    await db.items.insert_many([{"_id": i} for i in range(3)])
+
+    result = await make_runner(db).run(MarkMigration(), dry_run=True)
+
+    assert result.progress[0].modified == 3
+    assert await db.items.count_documents({"marked": True}) == 0
+    assert await db.migrations.find_one({"_id": "9999_mark"}) is None
+
+
+async def test_lock_is_exclusive_until_released(db):
+    first, second = make_runner(db), make_runner(db)
+    second.owner = "otro:1"
+
+    assert await first.acquire_lock()
+    assert not await second.acquire_lock()
+
+    await first.release_lock()
+    assert await second.acquire_lock()
+    assert (await db.migrations.find_one({"_id": LOCK_ID}))["owner"] == "otro:1"
+
+
+async def test_expired_lock_can_be_taken_over(db):
+    stale = MigrationRunner(db, lock_ttl_seconds=-1)
+    stale.owner = "caido:1"
+    assert await stale.acquire_lock()
+
+    assert await make_runner(db).acquire_lock()
+
+
+async def test_run_pending_skips_when_locked(db):
+    other = make_runner(db)
+    other.owner = "otro:1"
+    await other.acquire_lock()
+
+    assert await make_runner(db).run_pending() == []
@@ -0,0 +1,92 @@
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from app.migrations.runner import STATUS_COMPLETED, MigrationRunner
+from app.migrations.versions.v0002_money_minor_units import migration
+from app.models.common import Money, to_minor_units
+
+pytestmark = pytest.mark.anyio
+
+INT32_MAX = 2 ** 31 - 1
+
+
+class Amount(BaseModel):
+    monto: Money
+
+
+@pytest.mark.parametrize("value, expected", [
+    (9990.0, 9990),
+    (1234.5, 1235),
+    (1234.49, 1234),
+    (0.5, 1),
+    # Decimal(str(v)): 2.675 no se redondea a 2 por su representación binaria
+    (2.675, 3),
+    (-10.5, -11),
+    (-10.4, -10),
+])
+def test_floats_are_rounded_half_up(value, expected):
+    assert to_minor_units(value) == expected
+    assert Amount(monto=value).monto == expected
+
+
+def test_ints_and_numeric_strings_pass_through():
+    assert to_minor_units(9990) == 9990
+    assert Amount(monto=9990).monto == 9990
+    assert Amount(monto="9990").monto == 9990
+    assert Amount(monto=-500).monto == -500
+
+
+@pytest.mark.parametrize("value", [INT32_MAX, INT32_MAX + 1, float(INT32_MAX + 1), 2 ** 53])
+def test_amounts_beyond_int32_are_kept_exactly(value):
+    assert Amount(monto=value).monto == int(value)
+    assert isinstance(Amount(monto=value).monto, int)
+
+
+@pytest.mark.parametrize("value", ["abc", "", "12,5", None, [100], {"monto": 1}])
+def test_non_numeric_input_is_rejected(value):
+    with pytest.raises(ValidationError):
+        Amount(monto=value)
+
+
+async def total(collection, field):
+    result = await collection.aggregate([{"$group": {"_id": None, "total": {"$sum": f"${field}"}}}]).to_list(1)
+    return result[0]["total"]
+
+
+async def test_migration_converts_doubles_and_keeps_totals(db):
+    await db.expenses.insert_many([
+        {"_id": 1, "monto": 9990.0},
+        {"_id": 2, "monto": 150000.0},
+        {"_id": 3, "monto": 2500},
+        {"_id": 4, "monto": float(INT32_MAX + 10)},
+    ])
+    await db.aportes.insert_many([{"_id": 1, "monto": 170000.0}, {"_id": 2, "monto": 20000}])
+    await db.periods.insert_one({
+        "_id": 1,
+        "sueldo": 1500000.0,
+        "total_gastado": 162490.0,
+        "metas_categorias": {"credito_usable": 300000.0},
+    })
+    before = {
+        "expenses": await total(db.expenses, "monto"),
+        "aportes": await total(db.aportes, "monto"),
+    }
+    runner = MigrationRunner(db, batch_size=2, batch_delay_ms=0, lock_ttl_seconds=60, on_progress=lambda progress: None)
+
+    result = await runner.run(migration)
+
+    assert result.status == STATUS_COMPLETED
+    assert await total(db.expenses, "monto") == before["expenses"]
+    assert await total(db.aportes, "monto") == before["aportes"]
+    async for document in db.expenses.find():
+        assert type(document["monto"]) is int
+    period = await db.periods.find_one({"_id": 1})
+    assert period == {
+        "_id": 1,
+        "sueldo": 1500000,
+        "total_gastado": 162490,
+        "metas_categorias": {"credito_usable": 300000},
+    }
+    assert all(type(value) is int for value in (period["sueldo"], period["total_gastado"]))
+    for collection in migration.collections:
+        assert await db[collection].count_documents(migration.query(collection)) == 0
@@ -0,0 +1,43 @@
+import msgpack
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.core.metrics import HTTP_REQUEST_DURATION, MetricsMiddleware
+from app.core.negotiation import ContentNegotiationMiddleware
+
+
+class Payload(BaseModel):
+    nombre: str
+
+
+def request_count(route: str, method: str, status: str) -> float:
+    for metric in HTTP_REQUEST_DURATION.collect():
+        for sample in metric.samples:
+            labels = sample.labels
+            if (sample.name.endswith("_count") and labels["route"] == route
+                    and labels["method"] == method and labels["status"] == status):
+                return sample.value
+    return 0.0
+
+
+def test_msgpack_body_keeps_the_route_label():
+    app = FastAPI()
+
+    @app.post("/items/{item_id}")
+    async def create(item_id: str, payload: Payload):
+        return {"id": item_id, "nombre": payload.nombre}
+
+    app.add_middleware(ContentNegotiationMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    before = request_count("/items/{item_id}", "POST", "200")
+
+    response = TestClient(app).post(
+        "/items/abc",
+        content=msgpack.packb({"nombre": "Arriendo"}),
+        headers={"Content-Type": "application/msgpack"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"id": "abc", "nombre": "Arriendo"}
+    assert request_count("/items/{item_id}", "POST", "200") == before + 1
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.profiling import StackSampler
+
+uvloop = pytest.importorskip("uvloop")
+
+
+def sample_loop_thread(main, loop_factory):
+    """
+    Correr main() en un event loop en otro thread y muestrearlo mientras corre
+    """
+    started = threading.Event()
+
+    async def run():
+        started.set()
+        await main()
+
+    def target():
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(run())
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    started.wait()
+    sampler = StackSampler(thread.ident, interval=0.005, flush_seconds=60)
+    while thread.is_alive():
+        sampler.sample()
+        time.sleep(0.005)
+    thread.join()
+    return sampler.stacks
+
+
+def busy_for(seconds):
+    async def main():
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            sum(range(1000))
+    return main
+
+
+@pytest.mark.parametrize("loop_factory", [uvloop.new_event_loop, asyncio.new_event_loop])
+def test_idle_loop_produces_no_samples(loop_factory):
+    async def main():
+        await asyncio.sleep(0.3)
+
+    assert sample_loop_thread(main, loop_factory) == {}
+
+
+@pytest.mark.parametrize("loop_factory", [uvloop.new_event_loop, asyncio.new_event_loop])
+def test_busy_loop_is_sampled(loop_factory):
+    stacks = sample_loop_thread(busy_for(0.3), loop_factory)
+
+    assert sum(stacks.values()) > 10
+    assert all("main" in stack for stack in stacks)
@@ -0,0 +1,124 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import msgpack
+import pytest
+from bson import ObjectId
+from pydantic import BaseModel
+
+from app.core.serialization import make_serializer, packb, parse_fields, restore_native_types, unpackb
+from app.crud.document_layout import storage_projection
+from app.models.aporte import AporteResponse
+
+
+class Item(BaseModel):
+    id: str
+    nombre: str
+    created_at: datetime
+    closed_at: Optional[datetime] = None
+
+
+class Page(BaseModel):
+    items: List[Item]
+
+
+def test_object_id_and_datetime_round_trip():
+    object_id = ObjectId()
+    moment = datetime(2024, 5, 17, 13, 45, 12, 123457)
+
+    decoded = unpackb(packb({"_id": object_id, "at": moment}))
+
+    assert decoded["_id"] == object_id
+    assert isinstance(decoded["at"], msgpack.Timestamp)
+    assert decoded["at"].to_datetime() == moment.replace(tzinfo=timezone.utc)
+
+
+def test_datetime_before_epoch_and_aware_datetime():
+    before = datetime(1960, 1, 1, 0, 0, 0, 500)
+    aware = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+
+    decoded = unpackb(packb([before, aware]))
+
+    assert decoded[0].to_datetime() == before.replace(tzinfo=timezone.utc)
+    assert decoded[1].to_datetime() == aware
+
+
+def test_restore_uses_model_types_not_key_names():
+    content = Page(items=[Item(id=str(ObjectId()), nombre="507f1f77bcf86cd799439011",
+                               created_at=datetime(2024, 1, 2))]).model_dump(mode="json")
+    content["items"][0]["fecha_texto"] = "2024-01-01"
+
+    restored = restore_native_types(content, Page)
+    item = restored["items"][0]
+
+    assert item["created_at"] == datetime(2024, 1, 2)
+    assert item["closed_at"] is None
+    # Strings que parecen IDs o fechas quedan igual
+    assert isinstance(item["id"], str)
+    assert item["nombre"] == "507f1f77bcf86cd799439011"
+    assert item["fecha_texto"] == "2024-01-01"
+
+
+def test_restore_without_model_leaves_content_untouched():
+    content = {"user_id": "507f1f77bcf86cd799439011", "updated_at": "2024-01-01T00:00:00"}
+    assert restore_native_types(content, None) == content
+
+
+def aporte_document():
+    return {
+        "_id": ObjectId(),
+        "user_id": ObjectId(),
+        "periodo_id": ObjectId(),
+        "categoria_id": ObjectId(),
+        "nombre": "Aporte pareja",
+        "monto": 170000,
+        "es_fijo": True,
+        "descripcion": None,
+        "fecha_registro": datetime(2024, 1, 2),
+        "created_at": datetime(2024, 1, 2),
+        "updated_at": datetime(2024, 1, 3),
+    }
+
+
+def test_parse_fields_returns_model_order_and_always_the_id():
+    assert parse_fields(AporteResponse, None) is None
+    assert parse_fields(AporteResponse, "") is None
+    assert parse_fields(AporteResponse, " monto , nombre,,monto") == ["_id", "nombre", "monto"]
+    # El nombre del campo y su alias son equivalentes
+    assert parse_fields(AporteResponse, "id,es_fijo") == ["_id", "es_fijo"]
+    assert parse_fields(AporteResponse, "_id") == ["_id"]
+
+
+def test_parse_fields_rejects_unknown_fields():
+    with pytest.raises(ValueError) as error:
+        parse_fields(AporteResponse, "nombre,password,total")
+
+    assert "password, total" in str(error.value)
+    assert "monto" in str(error.value)
+
+
+def test_sparse_projection_and_serializer():
+    fields = parse_fields(AporteResponse, "nombre,created_at")
+
+    # Los campos derivados piden created_at explícito (documentos antiguos); _id viene siempre
+    assert storage_projection(fields) == {"nombre": 1, "created_at": 1}
+    assert storage_projection(None) is None
+
+    document = aporte_document()
+    serialized = make_serializer(AporteResponse).only(fields)(document)
+
+    assert serialized == {
+        "_id": str(document["_id"]),
+        "nombre": "Aporte pareja",
+        "created_at": document["created_at"],
+    }
+
+
+def test_full_serializer_matches_the_response_model():
+    document = aporte_document()
+
+    serialized = make_serializer(AporteResponse).only(None)(document)
+
+    assert serialized == AporteResponse(**{**document, **{
+        key: str(document[key]) for key in ("_id", "user_id", "periodo_id", "categoria_id")
+    }}).model_dump(by_alias=True)
@@ -0,0 +1,69 @@
+import pytest
+
+from app.core.command_accounting import RequestCommandStats, command_method, command_shape
+from app.core.config import settings
+from app.slow_queries import analyze, set_profiler
+
+
+def profile_entry(comment, user_id, millis):
+    return {
+        "op": "query",
+        "ns": "emo_finance.expenses",
+        "command": {"find": "expenses", "filter": {"user_id": user_id}, "comment": comment},
+        "millis": millis,
+        "nreturned": 1,
+    }
+
+
+def test_same_shape_from_different_methods_is_one_group():
+    report = analyze([
+        profile_entry("ExpenseCRUD.get_by_periodo", "a", 10),
+        profile_entry("ExpenseCRUD.get_by_periodo", "b", 30),
+        profile_entry("ExpenseCRUD.get_by_categoria", "c", 20),
+    ])
+
+    assert len(report) == 1
+    assert "ExpenseCRUD" not in report[0]["shape"]
+    assert report[0]["count"] == 3
+    assert report[0]["methods"] == {"ExpenseCRUD.get_by_periodo": 2, "ExpenseCRUD.get_by_categoria": 1}
+
+
+def test_n_plus_one_keeps_the_originating_methods():
+    stats = RequestCommandStats()
+    for index in range(3):
+        command = {"find": "categories", "filter": {"_id": index}, "comment": "CategoryCRUD.get_by_id"}
+        stats.record_start(command_shape("find", command), command_method(command))
+
+    [(shape, count, methods)] = stats.repeated_shapes(3)
+    assert shape == "find categories filter={'_id': '?'}"
+    assert count == 3
+    assert methods == ["CategoryCRUD.get_by_id"]
+
+
+class ProfileCommands:
+    """
+    Base de datos que registra los comandos profile recibidos
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    async def command(self, command, *args):
+        self.commands.append(command)
+        return {"was": 0, "slowms": 250}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("enabled, slowms, expected", [
+    (True, None, {"profile": 1, "slowms": settings.SLOW_QUERY_DEFAULT_SLOWMS}),
+    (True, 50, {"profile": 1, "slowms": 50}),
+    # slowms es de todo el servidor: desactivar no lo reinicia
+    (False, None, {"profile": 0}),
+    (False, 300, {"profile": 0, "slowms": 300}),
+])
+async def test_set_profiler_only_sends_slowms_when_needed(enabled, slowms, expected):
+    db = ProfileCommands()
+
+    await set_profiler(db, enabled, slowms)
+
+    assert db.commands[0] == expected
@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api.dependencies import authenticate_token
+from app.core.security import STREAM_TICKET_PURPOSE, create_access_token, create_stream_ticket
+from app.core.structured_logging import RedactSecretsFilter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def user_id(db):
+    result = await db.users.insert_one({
+        "username": "stream", "email": "stream@example.com", "first_name": "S", "last_name": "T",
+        "hashed_password": "x", "is_active": True,
+        "created_at": datetime.utcnow(), "updated_at": datetime.utcnow(),
+    })
+    return str(result.inserted_id)
+
+
+async def test_stream_ticket_opens_streams(db, user_id):
+    user = await authenticate_token(create_stream_ticket(user_id), db, purpose=STREAM_TICKET_PURPOSE)
+    assert str(user.id) == user_id
+
+
+async def test_access_token_is_not_accepted_as_ticket(db, user_id):
+    with pytest.raises(HTTPException) as error:
+        await authenticate_token(create_access_token({"sub": user_id}), db, purpose=STREAM_TICKET_PURPOSE)
+    assert error.value.status_code == 401
+
+
+async def test_ticket_is_not_accepted_as_access_token(db, user_id):
+    with pytest.raises(HTTPException) as error:
+        await authenticate_token(create_stream_ticket(user_id), db)
+    assert error.value.status_code == 401
+
+
+def test_credentials_in_logged_urls_are_redacted():
+    record = logging.LogRecord(
+        "uvicorn.access", logging.INFO, "", 0, '%s - "%s %s HTTP/%s" %d',
+        ("127.0.0.1:5000", "GET", f"/api/v1/events/summary?periodo_id={ObjectId()}&ticket=abc.def.ghi", "1.1", 200),
+        None
+    )
+
+    RedactSecretsFilter().filter(record)
+
+    message = record.getMessage()
+    assert "abc.def.ghi" not in message
+    assert "ticket=[redacted]" in message
+    assert "periodo_id=" in message
@@ -0,0 +1,48 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.api.v1.endpoints.sync import decode_sync_token, encode_sync_token
+from app.crud.document_layout import changed_since_filter
+
+
+@pytest.fixture
+def non_utc_timezone(monkeypatch):
+    monkeypatch.setenv("TZ", "America/Santiago")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_sync_token_round_trip_is_utc(non_utc_timezone):
+    moment = datetime(2024, 3, 10, 15, 30, 45, 123000)
+    assert decode_sync_token(encode_sync_token(moment)) == moment
+
+
+@pytest.mark.parametrize("token", ["", "not-base64!", "bnVsbA", "eyJ4IjoxfQ", "eyJ0IjoiYSJ9"])
+def test_invalid_sync_tokens_raise_value_error(token):
+    with pytest.raises(ValueError):
+        decode_sync_token(token)
+
+
+@pytest.mark.anyio
+async def test_changed_since_filter_uses_updated_at_or_object_id(db):
+    since = datetime(2024, 6, 1, 12, 0, 0)
+    before, after = since - timedelta(days=1), since + timedelta(seconds=1)
+
+    await db.items.insert_many([
+        # Compactos sin updated_at: la creación sale del _id
+        {"_id": ObjectId.from_datetime(before), "name": "old-compact"},
+        {"_id": ObjectId.from_datetime(after), "name": "new-compact"},
+        {"_id": ObjectId.from_datetime(since), "name": "same-second-compact"},
+        # Editados: manda updated_at aunque el _id sea antiguo
+        {"_id": ObjectId.from_datetime(before - timedelta(days=1)), "name": "old-edited-recently", "updated_at": after},
+        {"_id": ObjectId.from_datetime(before - timedelta(days=2)), "name": "old-edited-long-ago", "updated_at": before},
+    ])
+
+    found = {doc["name"] async for doc in db.items.find(changed_since_filter(since))}
+
+    assert found == {"new-compact", "same-second-compact", "old-edited-recently"}
@@ -0,0 +1,100 @@
+import asyncio
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from app.core import unit_of_work
+from app.core.config import settings
+from app.core.unit_of_work import UnitOfWork, UnitOfWorkMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+class FlakyCollection:
+    """
+    Colección cuyo bulk_write falla las primeras `failures` veces
+    """
+
+    def __init__(self, collection, failures: int, error=None):
+        self.collection = collection
+        self.name = collection.name
+        self.failures = failures
+        self.error = error or AutoReconnect("primario no disponible")
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        return await self.collection.bulk_write(operations, ordered=ordered)
+
+
+async def test_failed_flush_keeps_version_bumps_and_tombstones(db):
+    versions = FlakyCollection(db["data_versions"], failures=1)
+    tombstones = FlakyCollection(db["deletions"], failures=1)
+    user_id = ObjectId()
+    notified = []
+
+    work = UnitOfWork()
+    work.increment(versions, user_id, {"version": 1})
+    work.insert(tombstones, [{"doc_id": ObjectId()}])
+    work.after_flush(lambda: notified.append(user_id))
+
+    with pytest.raises(AutoReconnect):
+        await work.flush()
+    assert work.has_pending()
+    assert notified == []
+
+    # Escrituras agregadas después del fallo se combinan con las que quedaron pendientes
+    work.increment(versions, user_id, {"version": 1})
+    await work.flush()
+    await work.flush()
+
+    assert not work.has_pending()
+    assert (await db["data_versions"].find_one({"_id": user_id}))["version"] == 2
+    assert await db["deletions"].count_documents({}) == 1
+    assert notified == [user_id]
+
+
+async def test_partial_bulk_failure_retries_only_what_was_not_applied(db):
+    work = UnitOfWork()
+    tombstone = {"_id": ObjectId(), "doc_id": ObjectId()}
+    await db["deletions"].insert_one(dict(tombstone))
+    work.insert(db["deletions"], [{"_id": ObjectId(), "doc_id": ObjectId()}, tombstone])
+
+    # El primer tombstone se insertó y el segundo ya existía: no queda nada por reintentar
+    error = BulkWriteError({"writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}]})
+    work._collections["deletions"] = FlakyCollection(db["deletions"], failures=1, error=error)
+
+    with pytest.raises(BulkWriteError):
+        await work.flush()
+
+    assert not work.has_pending()
+
+
+async def test_response_is_sent_and_writes_applied_in_background(db, monkeypatch):
+    monkeypatch.setattr(settings, "UNIT_OF_WORK_FLUSH_ATTEMPTS", 2)
+    monkeypatch.setattr(unit_of_work, "RETRY_DELAY_SECONDS", 0.01)
+    # Fallan los dos intentos del request y el primer reintento en segundo plano
+    versions = FlakyCollection(db["data_versions"], failures=3)
+    user_id = ObjectId()
+
+    app = FastAPI()
+
+    @app.post("/write")
+    async def write():
+        unit_of_work.current_unit_of_work().increment(versions, user_id, {"version": 1})
+        return {"ok": True}
+
+    app.add_middleware(UnitOfWorkMiddleware)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/write")
+
+    assert response.status_code == 200
+    assert await db["data_versions"].find_one({"_id": user_id}) is None
+
+    await asyncio.wait_for(asyncio.gather(*unit_of_work._retries), timeout=5)
+    assert (await db["data_versions"].find_one({"_id": user_id}))["version"] == 1